@@ -0,0 +1,112 @@
+import zlib
+
+
+HASH_MASK = (1 << 64) - 1
+DEFAULT_LSH = (16, 2)  # bands, rows in a band
+
+
+class CasesIndex:
+    """Inverted index from io hashes of cases to the problems having them.
+
+    A problem is compared only with the problems sharing at least one case with it, so the work depends on
+    the number of shared cases instead of the square of the number of problems.
+    """
+
+    def __init__(self):
+        self.postings = dict()  # io_hash -> indices of the added problems which have it
+        self.size = 0
+
+    def add(self, cases):
+        # Adds the next problem, its index is the number of the problems added before
+        for io_hash in set(cases):
+            self.postings.setdefault(io_hash, []).append(self.size)
+        self.size += 1
+
+    def overlaps(self, cases):
+        # Returns index of an added problem -> number of the given cases which it has
+        counts = dict()
+        for io_hash in cases:
+            for index in self.postings.get(io_hash, ()):
+                counts[index] = counts.get(index, 0) + 1
+        return counts
+
+
+class MinHashIndex:
+    """Approximate CasesIndex, overlaps are counted only with the candidates found by MinHash LSH.
+
+    Problems get into the same bucket of a band if their MinHash signatures are equal in all rows of the band.
+    Problems with similarity above SIMILAR_PROBLEMS_MIN_RATIO have Jaccard index J of the cases above 1/3 and
+    become candidates with probability about 1 - (1 - J ** rows) ** bands, so more bands give better recall and
+    more rows give less candidates. similarity_benchmark.py compares recall with the exact search.
+    """
+
+    def __init__(self, bands, rows, seed=0):
+        self.bands, self.rows = bands, rows
+        self.seed = seed
+        self.buckets = dict()  # (band, rows of the signature) -> indices of the added problems
+        self.cases = []  # index -> set of cases
+        self.size = 0
+
+    def signature(self, cases):
+        # One permutation hashing: each case falls into one of the bins and a bin keeps the minimal hash,
+        # an empty bin takes the value of the next non-empty one shifted by the distance to it
+        size = self.bands * self.rows
+        bins = [None] * size
+        for io_hash in set(cases):
+            value = hash((zlib.crc32(str(io_hash).encode()), self.seed)) & HASH_MASK
+            position, value = value % size, value // size
+            if bins[position] is None or value < bins[position]:
+                bins[position] = value
+        filled = [position for position in range(size) if bins[position] is not None]
+        if not filled:
+            return None
+        source = filled[0]
+        for position in range(size - 1, -1, -1):
+            if bins[position] is None:
+                bins[position] = bins[source] + ((source - position) % size) * (HASH_MASK + 1)
+            else:
+                source = position
+        return bins
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def add(self, cases, signature=None):
+        signature = signature or self.signature(cases)
+        if signature is not None:
+            for key in self._band_keys(signature):
+                self.buckets.setdefault(key, []).append(self.size)
+        self.cases.append(set(cases))
+        self.size += 1
+
+    def overlaps(self, cases, signature=None):
+        signature = signature or self.signature(cases)
+        if signature is None:
+            return {}
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        counts = dict()
+        for index in candidates:
+            count = sum(1 for io_hash in cases if io_hash in self.cases[index])
+            if count:
+                counts[index] = count
+        return counts
+
+
+def overlaps_with_previous(problems, distinct=False, approximate=None):
+    # Yields for each problem the overlaps with the problems before it, cases are counted once if distinct.
+    # approximate is (bands, rows) of MinHashIndex, only the overlaps with its candidates are yielded then
+    if approximate:
+        index = MinHashIndex(*approximate)
+        for problem in problems:
+            cases = set(problem.cases) if distinct else problem.cases
+            signature = index.signature(problem.cases)
+            yield index.overlaps(cases, signature)
+            index.add(problem.cases, signature)
+        return
+    index = CasesIndex()
+    for problem in problems:
+        yield index.overlaps(set(problem.cases) if distinct else problem.cases)
+        index.add(problem.cases)
@@ -204,6 +204,22 @@ class SubmitsDAO:
         submit.problem_ref, submit.user_ref = row['problem_ref'], row['user_ref']
         return submit
 
+    @staticmethod
+    def load_with_runs(submits_rows, runs_rows):
+        # Merges tuple rows of submits (columns, scoring, contest_id, problem_id) with tuple rows of their runs
+        # (RunsDAO.joined_columns), both ordered by submit
+        runs_rows = iter(runs_rows)
+        run_row = next(runs_rows, None)
+        for ref, submit_id, lang_id, problem_ref, user_ref, outcome, timestamp, scoring, contest_id, problem_id \
+                in submits_rows:
+            submit = Submit(submit_id, (contest_id, problem_id), '', lang_id, [], outcome, scoring, timestamp)
+            submit.problem_ref, submit.user_ref = problem_ref, user_ref
+            while run_row is not None and run_row[0] == ref:
+                submit.runs.append(RunsDAO.load_joined(run_row))
+                run_row = next(runs_rows, None)
+            submit.count_results()
+            yield submit
+
     def deep_load(self, row, problem_id=None, scoring=None):
         submit = self.load(row)
         cursor = self.connector.get_cursor()
@@ -254,17 +270,27 @@ class SubmitsDAO:
 
 class RunsDAO:
     columns = 'realtime, time, outcome, submit_ref, case_ref'
+    joined_columns = 'Runs.submit_ref, Runs.case_ref, Runs.realtime, Runs.time, Runs.outcome, Cases.case_id'
     case_cache = {}
+    outcomes = {}  # to keep one copy of each outcome string for all runs
 
     def __init__(self, sqlite_connector):
         self.connector = sqlite_connector
 
     @staticmethod
     def load(row):
-        run = Run('', '', '', row['realtime'], row['time'], row['outcome'])
+        outcome = row['outcome']
+        run = Run('', '', '', row['realtime'], row['time'], RunsDAO.outcomes.setdefault(outcome, outcome))
         run.submit_ref, run.case_ref = row['submit_ref'], row['case_ref']
         return run
 
+    @staticmethod
+    def load_joined(row):
+        submit_ref, case_ref, realtime, time, outcome, case_id = row
+        run = Run('', '', case_id, realtime, time, RunsDAO.outcomes.setdefault(outcome, outcome))
+        run.submit_ref, run.case_ref = submit_ref, case_ref
+        return run
+
     def deep_load(self, row):
         run = self.load(row)
         cursor = self.connector.get_cursor()
@@ -318,3 +344,69 @@ class RunsDAO:
         new_def['id'] = ref
         cursor.execute('UPDATE Runs SET submit_ref = :submit_ref, case_ref = :case_ref, realtime = :realtime, '
                        'time = :time, outcome = :outcome WHERE id = :id', new_def)
+
+
+class RunsColumns:
+    """Submits of one problem with their runs stored column by column instead of as objects.
+
+    Runs of the i-th submit are runs_*[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, problem_ref, problem_id, scoring):
+        self.problem_ref = problem_ref
+        self.problem_id = problem_id
+        self.scoring = scoring
+        self.submit_refs, self.submit_ids, self.lang_ids, self.user_refs = [], [], [], []
+        self.outcomes, self.timestamps = [], []
+        self.offsets = [0]
+        self.case_refs, self.case_ids, self.runs_outcomes, self.times, self.real_times = [], [], [], [], []
+
+    def __len__(self):
+        return len(self.submit_refs)
+
+    def runs_numbers(self):
+        return [self.offsets[i + 1] - self.offsets[i] for i in range(len(self))]
+
+    def submits(self):
+        for i in range(len(self)):
+            submit = Submit(self.submit_ids[i], self.problem_id, '', self.lang_ids[i], [], self.outcomes[i],
+                            self.scoring, self.timestamps[i])
+            submit.problem_ref, submit.user_ref = self.problem_ref, self.user_refs[i]
+            for j in range(self.offsets[i], self.offsets[i + 1]):
+                run = Run('', '', self.case_ids[j], self.real_times[j], self.times[j], self.runs_outcomes[j])
+                run.submit_ref, run.case_ref = self.submit_refs[i], self.case_refs[j]
+                submit.runs.append(run)
+            submit.count_results()
+            yield submit
+
+    @staticmethod
+    def load_all(submits_rows, runs_rows):
+        # Rows are the same as for SubmitsDAO.load_with_runs but ordered by problem_ref first,
+        # columns of a problem are yielded as soon as its rows end
+        runs_rows = iter(runs_rows)
+        run_row = next(runs_rows, None)
+        columns = None
+        outcomes = RunsDAO.outcomes
+        for ref, submit_id, lang_id, problem_ref, user_ref, outcome, timestamp, scoring, contest_id, problem_id \
+                in submits_rows:
+            if columns is None or columns.problem_ref != problem_ref:
+                if columns is not None:
+                    yield columns
+                columns = RunsColumns(problem_ref, (contest_id, problem_id), scoring)
+            columns.submit_refs.append(ref)
+            columns.submit_ids.append(submit_id)
+            columns.lang_ids.append(lang_id)
+            columns.user_refs.append(user_ref)
+            columns.outcomes.append(outcome)
+            columns.timestamps.append(timestamp)
+            while run_row is not None and run_row[0] == ref:
+                _, case_ref, realtime, time, run_outcome, case_id = run_row
+                columns.case_refs.append(case_ref)
+                columns.case_ids.append(case_id)
+                columns.runs_outcomes.append(outcomes.setdefault(run_outcome, run_outcome))
+                columns.times.append(time)
+                columns.real_times.append(realtime)
+                run_row = next(runs_rows, None)
+            columns.offsets.append(len(columns.case_refs))
+        if columns is not None:
+            yield columns
@@ -30,6 +30,7 @@ class DBSubmitsFiller:
 
             keys, values = ['realtime', 'time', 'outcome'], [run.real_time, run.time, run.outcome]
             self.db_update('Runs', run_ref, keys, values)
+        return submit_ref
 
     def db_define_ref(self, table, keys, values):
         ref = self.db_find_ref(table, keys, values)
@@ -49,3 +50,134 @@ class DBSubmitsFiller:
     def db_update(self, table, ref, keys, values):
         equals = ', '.join(['{} = ?'] * len(keys)).format(*keys)
         self.db_cur.execute('UPDATE {} SET {} WHERE id = {}'.format(table, equals, ref), values)
+
+    def flush(self):
+        pass
+
+
+class BulkSubmitsFiller(DBSubmitsFiller):
+    """Fills the database in batches instead of one round trip per row.
+
+    Contests, users, problems, cases and submits already seen are kept in memory, so
+    new submits and runs get their ids here and are written with executemany once
+    batch_size submits have been buffered. Each flush is committed as one transaction.
+    The resulting tables are the same as the ones DBSubmitsFiller produces, as long as
+    nobody else writes into the database while filling.
+    """
+
+    def __init__(self, db_cur, batch_size=1000):
+        super().__init__(db_cur)
+        self.batch_size = batch_size
+        self.contests, self.users, self.problems = dict(), dict(), dict()
+        self.cases = dict()  # problem_ref -> {case_id: case_ref}
+        self.submits = dict()  # problem_ref -> {submit_id: submit_ref}
+        self.next_ids = dict()
+        self._clear_buffers()
+
+    def _clear_buffers(self):
+        self.new_cases, self.new_submits, self.new_runs = [], [], []
+        self.updated_submits, self.updated_runs = [], []
+        self.pending_submits, self.pending_runs = dict(), dict()  # ref -> buffered row
+        self.batch_runs = dict()  # submit_ref -> {case_ref: run_ref} for submits touched in this batch
+        self.buffered_submits = 0
+
+    def fill_db_from_submit(self, submit, origin):
+        submit.problem_id = [submit.problem_id[0].rjust(6, '0'), submit.problem_id[1]]
+
+        keys, values = ['origin', 'scoring', 'contest_id'], [origin, submit.scoring, submit.problem_id[0]]
+        contest_ref = self.cached_define_ref(self.contests, 'Contests', keys, values)
+
+        keys, values = ['origin', 'user_id'], [origin, submit.user_id]
+        user_ref = self.cached_define_ref(self.users, 'Users', keys, values)
+
+        keys, values = ['contest_ref', 'problem_id'], [contest_ref, submit.problem_id[1]]
+        problem_ref = self.cached_define_ref(self.problems, 'Problems', keys, values)
+
+        submit_ref, runs = self._define_submit(problem_ref, submit, user_ref)
+
+        cases = self._get_problem_cases(problem_ref)
+        for run in submit.runs:
+            case_ref = cases.get(str(run.case_id))
+            if case_ref is None:
+                case_ref = self._allocate_id('Cases')
+                cases[str(run.case_id)] = case_ref
+                self.new_cases.append([case_ref, problem_ref, run.case_id])
+
+            run_ref = runs.get(case_ref)
+            if run_ref is None:
+                run_ref = self._allocate_id('Runs')
+                runs[case_ref] = run_ref
+                row = [run_ref, submit_ref, case_ref, run.real_time, run.time, run.outcome]
+                self.new_runs.append(row)
+                self.pending_runs[run_ref] = row
+            elif run_ref in self.pending_runs:
+                self.pending_runs[run_ref][3:] = [run.real_time, run.time, run.outcome]
+            else:
+                self.updated_runs.append([run.real_time, run.time, run.outcome, run_ref])
+
+        self.buffered_submits += 1
+        if self.buffered_submits >= self.batch_size:
+            self.flush()
+        return submit_ref
+
+    def _define_submit(self, problem_ref, submit, user_ref):
+        submits = self._get_problem_submits(problem_ref)
+        submit_ref = submits.get(str(submit.submit_id))
+        values = [submit.lang_id, submit.outcome, submit.timestamp, user_ref]
+        if submit_ref is None:
+            submit_ref = self._allocate_id('Submits')
+            submits[str(submit.submit_id)] = submit_ref
+            row = [submit_ref, submit.submit_id, problem_ref] + values
+            self.new_submits.append(row)
+            self.pending_submits[submit_ref] = row
+            self.batch_runs[submit_ref] = dict()
+        elif submit_ref in self.pending_submits:
+            self.pending_submits[submit_ref][3:] = values
+        else:
+            self.updated_submits.append(values + [submit_ref])
+            if submit_ref not in self.batch_runs:
+                self.db_cur.execute('SELECT case_ref, id FROM Runs WHERE submit_ref = ?', [submit_ref])
+                self.batch_runs[submit_ref] = {row[0]: row[1] for row in self.db_cur.fetchall()}
+        return submit_ref, self.batch_runs[submit_ref]
+
+    def cached_define_ref(self, cache, table, keys, values):
+        key = tuple(map(str, values))
+        if key not in cache:
+            cache[key] = self.db_define_ref(table, keys, values)
+        return cache[key]
+
+    def _get_problem_cases(self, problem_ref):
+        if problem_ref not in self.cases:
+            self.db_cur.execute('SELECT case_id, id FROM Cases WHERE problem_ref = ?', [problem_ref])
+            self.cases[problem_ref] = {str(row[0]): row[1] for row in self.db_cur.fetchall()}
+        return self.cases[problem_ref]
+
+    def _get_problem_submits(self, problem_ref):
+        if problem_ref not in self.submits:
+            self.db_cur.execute('SELECT submit_id, id FROM Submits WHERE problem_ref = ?', [problem_ref])
+            self.submits[problem_ref] = {str(row[0]): row[1] for row in self.db_cur.fetchall()}
+        return self.submits[problem_ref]
+
+    def _allocate_id(self, table):
+        if table not in self.next_ids:
+            self.db_cur.execute('SELECT MAX(id) FROM {}'.format(table))
+            max_id = self.db_cur.fetchone()[0] or 0
+            self.db_cur.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', [table])
+            response = self.db_cur.fetchone()
+            self.next_ids[table] = max(max_id, response[0] if response else 0) + 1
+        ref = self.next_ids[table]
+        self.next_ids[table] += 1
+        return ref
+
+    def flush(self):
+        self.db_cur.executemany('INSERT INTO Cases (id, problem_ref, case_id) VALUES (?, ?, ?)', self.new_cases)
+        self.db_cur.executemany('INSERT INTO Submits (id, submit_id, problem_ref, lang_id, outcome, timestamp, '
+                                'user_ref) VALUES (?, ?, ?, ?, ?, ?, ?)', self.new_submits)
+        self.db_cur.executemany('UPDATE Submits SET lang_id = ?, outcome = ?, timestamp = ?, user_ref = ? '
+                                'WHERE id = ?', self.updated_submits)
+        self.db_cur.executemany('INSERT INTO Runs (id, submit_ref, case_ref, realtime, time, outcome) '
+                                'VALUES (?, ?, ?, ?, ?, ?)', self.new_runs)
+        self.db_cur.executemany('UPDATE Runs SET realtime = ?, time = ?, outcome = ? WHERE id = ?',
+                                self.updated_runs)
+        self.db_cur.connection.commit()
+        self._clear_buffers()
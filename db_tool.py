@@ -32,14 +32,14 @@ def update_database(path):
     return connection
 
 
-def fill_cases_hashes(cursor, base_dir, origin, startfrom):
+def fill_cases_hashes(cursor, base_dir, origin, startfrom, jobs=1):
     startfrom = startfrom
     logging.info("Filling cases starting from contest #{}".format(startfrom))
     extract_cases_to_db(MultipleContestWalker().walk(base_dir, path_only=True), cursor,
-                        origin, startfrom)
+                        origin, startfrom, jobs)
 
 
-def fill_submits(sqlite_cursor, base_dir, origin, mysql_config):
+def fill_submits(sqlite_cursor, base_dir, origin, mysql_config, batch_size=None, jobs=1, use_manifest=False):
     if '' in mysql_config.values():
         logging.error('MySQL parameters are not specified')
         exit()
@@ -50,7 +50,7 @@ def fill_submits(sqlite_cursor, base_dir, origin, mysql_config):
     logging.info('Connected to MySQL database')
     ej_cursor = mysql_connector.get_cursor()
     logging.info("Filling database from XML's and MySQL database")
-    fill_from_xml(sqlite_cursor, ej_cursor, base_dir, origin)
+    fill_from_xml(sqlite_cursor, ej_cursor, base_dir, origin, batch_size, jobs, use_manifest)
     mysql_connector.close()
 
 
@@ -79,16 +79,17 @@ def fill_database(output_database, base_dir, contests_info_dir, mysql_config, or
             connection.close_connection()
             exit()
         if 'hashes_only' in extra:
-            fill_cases_hashes(sqlite_cursor, base_dir, origin, extra['start_from'])
+            fill_cases_hashes(sqlite_cursor, base_dir, origin, extra['start_from'], extra.get('jobs', 1))
             connection.close_connection()
             logging.info('Case hashes were filled successfully')
             logging.info('Connection closed')
             exit()
-        fill_submits(sqlite_cursor, base_dir, origin, mysql_config)
+        fill_submits(sqlite_cursor, base_dir, origin, mysql_config, extra.get('batch_size'),
+                     extra.get('jobs', 1), 'ignore_manifest' not in extra)
         connection.commit()
 
         if 'no_hashes' not in extra:
-            fill_cases_hashes(sqlite_cursor, base_dir, origin, extra['start_from'])
+            fill_cases_hashes(sqlite_cursor, base_dir, origin, extra['start_from'], extra.get('jobs', 1))
 
         fill_contests_names(sqlite_cursor, contests_info_dir, origin)
 
@@ -1,3 +1,5 @@
+import functools
+
 import PIL.Image
 import PIL.ImageDraw
 import PIL.ImageFont
@@ -7,15 +9,34 @@ def RGB(r, g, b):
     return 2 ** 16 * b + 2 ** 8 * g + r
 
 
+@functools.lru_cache(maxsize=None)
+def get_font(font, size):
+    # A font file is loaded once for each size
+    return PIL.ImageFont.truetype(font, size)
+
+
+@functools.lru_cache(maxsize=4096)
+def get_text_size(text, font, size):
+    # The box is measured from the point where the text is drawn
+    left, top, right, bottom = get_font(font, size).getbbox(text)
+    return right, bottom
+
+
 class Image:
-    def __init__(self, img_size, background_color):
+    # origin is the point of the whole picture which is the top left corner of the image (of its strip)
+    def __init__(self, img_size, background_color, origin=(0, 0)):
         self.image = PIL.Image.new("RGB", img_size, background_color)
         self.draw = PIL.ImageDraw.Draw(self.image)
+        self.origin = origin
+
+    def _move(self, point):
+        return (point[0] - self.origin[0], point[1] - self.origin[1])
 
     def draw_line(self, begin, end, line_thickness, line_color):
-        self.draw.line(begin + end, line_color, line_thickness)
+        self.draw.line(self._move(begin) + self._move(end), line_color, line_thickness)
 
     def draw_circle(self, center, radius, border_thickness, border_color, circle_color):
+        center = self._move(center)
         self.draw.ellipse((center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius),
                           circle_color, border_color)
 
@@ -25,17 +46,21 @@ class Image:
 
     # begin is a tuple (x0, y0), size is a tuple (size_x, size_y)
     def draw_rectangle(self, begin, size, border_thickness, border_color, rectangle_color):
+        begin = self._move(begin)
         self.draw.rectangle(begin + (begin[0] + size[0], begin[1] + size[1]), rectangle_color, border_color)
 
     def draw_text(self, text, begin, font, size, color, align="left"):
-        font = PIL.ImageFont.truetype(font, size)
-        self.draw.setfont(font)
-        size_x, size_y = self.draw.textsize(text, font)
+        begin = self._move(begin)
+        size_x, size_y = get_text_size(text, font, size)
         if align == "left":
             coords = (begin[0], begin[1] - size_y // 2)
         else:
             coords = (begin[0] - size_x // 2, begin[1] - size_y // 2)
-        self.draw.text(coords, text, color)
+        self.draw.text(coords, text, color, get_font(font, size))
+
+    def tobytes(self):
+        # Raw RGB rows
+        return self.image.tobytes()
 
     def save_png(self, file_name):
         self.image.save(file_name, 'PNG')
@@ -1,6 +1,10 @@
 import logging
 
 
+PREFETCH_CHUNK_SIZE = 10000  # rows fetched from MySQL at once while prefetching a contest
+MISSES_IN_WARNING = 20
+
+
 class EjudgeSubmitInfo:
     def __init__(self, problem_id, user_id, lang_id, timestamp):
         self.problem_id = problem_id
@@ -13,8 +17,32 @@ class EjudgeDatabase:
     def __init__(self, ejudge_cursor):
         self.data = {}
         self.db_cursor = ejudge_cursor
+        self.misses = {}
+
+    def prefetch_contest(self, contest_id):
+        query = ('SELECT run_id,prob_id,user_id,lang_id,create_time '
+                 'FROM ejudge.runs '
+                 'WHERE contest_id=%(contest)s')
+        self.db_cursor.execute(query, {'contest': contest_id})
+        runs = {}
+        while True:
+            rows = self.db_cursor.fetchmany(PREFETCH_CHUNK_SIZE)
+            if not rows:
+                break
+            for run_id, problem_id, user_id, lang_id, timestamp in rows:
+                runs[str(run_id)] = (problem_id, user_id, lang_id, timestamp)
+        self.data = {contest_id: runs}
+        self.misses = {contest_id: []}
+        logging.info('Prefetched {} runs of contest {}'.format(len(runs), contest_id))
 
     def get_submit_info(self, contest_id, submit_id):
+        if contest_id in self.data:
+            response = self.data[contest_id].get(str(submit_id))
+            if response is None:
+                self.misses[contest_id].append(submit_id)
+                return None
+            return EjudgeSubmitInfo(*response)
+
         query = ('SELECT prob_id,user_id,lang_id,create_time '
                  'FROM ejudge.runs '
                  'WHERE contest_id=%(contest)s AND run_id=%(submit)s')
@@ -25,3 +53,12 @@ class EjudgeDatabase:
             return None
         problem_id, user_id, lang_id, timestamp = list(response)
         return EjudgeSubmitInfo(problem_id, user_id, lang_id, timestamp)
+
+    def report_misses(self, contest_id):
+        misses = self.misses.pop(contest_id, [])
+        if misses:
+            shown = ', '.join(str(submit_id) for submit_id in misses[:MISSES_IN_WARNING])
+            if len(misses) > MISSES_IN_WARNING:
+                shown += ', ...'
+            logging.warning('{} submits from contest {} not found in database: {}'.format(len(misses), contest_id,
+                                                                                         shown))
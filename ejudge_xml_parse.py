@@ -1,6 +1,10 @@
+import codecs
 import xml.etree.ElementTree as ETree
 
 
+READ_CHUNK_SIZE = 64 * 1024
+
+
 class EjudgeXmlParseResult:
     def __init__(self, submit_id, submit_outcome, scoring, run_outcomes):
         self.submit_id = submit_id
@@ -9,32 +13,58 @@ class EjudgeXmlParseResult:
         self.run_outcomes = run_outcomes
 
 
+class _ReportTarget:
+    # Parser target that keeps only the attributes we need instead of building a tree
+    def __init__(self):
+        self.submit_id, self.submit_outcome, self.scoring = None, None, None
+        self.run_outcomes = []
+
+    def start(self, tag, attrib):
+        if tag == 'testing-report':
+            self.submit_id = attrib['run-id']
+            self.submit_outcome = attrib['status']
+            self.scoring = attrib['scoring']
+        elif tag == 'test':
+            self.run_outcomes.append((attrib.get('real-time', attrib['time']), attrib['time'], attrib['status']))
+
+    def close(self):
+        if self.submit_id is None or self.submit_outcome is None or self.scoring is None:
+            return None
+        return EjudgeXmlParseResult(self.submit_id, self.submit_outcome, self.scoring, self.run_outcomes)
+
+
+def _read_chunks(file):
+    # Yields decoded text of the file after the first two lines, which are not XML
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def decode(data):
+        return decoder.decode(data) if type(data) == bytes else data
+
+    first_line = file.readline()  # invalid .gz
+    if not first_line:
+        return
+    decode(first_line)
+    decode(file.readline())
+    while True:
+        data = file.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        yield decode(data)
+    if type(first_line) == bytes:
+        yield decoder.decode(b'', final=True)
+
+
 def ejudge_xml_parse(file):
+    parser = ETree.XMLParser(target=_ReportTarget())
     try:
-        lines = file.readlines()  # invalid .gz
-        if not lines:
+        fed = False
+        for data in _read_chunks(file):
+            parser.feed(data)
+            fed = True
+        if not fed:
             return None
-        if type(lines[0]) == bytes:
-            for i in range(len(lines)):
-                lines[i] = lines[i].decode()
+        return parser.close()
     except UnicodeError:
         return None
-    # Removing first two lines, because they are not XML
-    data = ''.join(lines[2:])
-    try:
-        xml_root = ETree.fromstring(data)
     except ETree.ParseError:
         return None
-    run_outcomes = []
-    submit_id, submit_outcome, scoring = None, None, None
-    for child in xml_root.iter():
-        if child.tag == 'testing-report':
-            submit_id = child.attrib['run-id']
-            submit_outcome = child.attrib['status']
-            scoring = child.attrib['scoring']
-        elif child.tag == 'test':
-            run_outcomes.append(
-                (child.attrib.get('real-time', child.attrib['time']), child.attrib['time'], child.attrib['status']))
-    if submit_id is None or submit_outcome is None or scoring is None:
-        return None
-    return EjudgeXmlParseResult(submit_id, submit_outcome, scoring, run_outcomes)
@@ -16,6 +16,17 @@ class ElectorVisitor(Visitor):
         if key == self.key:
             self.visitor.visit(submit)
 
+    def empty(self):
+        return type(self)(self.factory)
+
+    def merge(self, other):
+        if other.key is None:
+            return
+        if self.is_key_better(other.key):
+            self.key, self.visitor = other.key, other.visitor
+        elif other.key == self.key:
+            self.visitor.merge(other.visitor)
+
     def build_key(self, submit):
         return str(submit)
 
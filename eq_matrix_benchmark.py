@@ -0,0 +1,69 @@
+import argparse
+import random
+import time
+from unittest.mock import patch
+
+import stats.eq_matrix
+from model import Submit, Run
+from stats.eq_matrix import EqMatrix
+
+
+OUTCOMES = ['OK', 'OK', 'OK', 'WA', 'TL', 'RE']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reports time per submit of EqMatrix with numpy and with bitsets, '
+                                                 'compared with the loop over the pairs of runs of each submit')
+    parser.add_argument('--submits', help='number of submits', type=int, default=5000)
+    parser.add_argument('--cases', help='maximal number of runs of a submit', type=int, default=60)
+    parser.add_argument('--seed', help='seed of the submits', type=int, default=0)
+    return vars(parser.parse_args())
+
+
+class LoopEqMatrix(EqMatrix):
+    # EqMatrix as it was before the batches, every submit adds one to the pairs of its runs with the same OK-ness
+
+    def visit(self, submit):
+        case_amount = len(submit.runs)
+        self.runs_num += case_amount
+        result = self.result
+        for row in result:
+            row.extend([0] * (case_amount - len(row)))
+        result.extend([[0] * case_amount for i in range(case_amount - len(result))])
+        passed = [run.outcome == 'OK' for run in submit.runs]
+        for i in range(case_amount):
+            for j in range(case_amount):
+                if passed[i] == passed[j]:
+                    result[i][j] += 1
+
+
+def measure(matrix, submits):
+    start = time.time()
+    for submit in submits:
+        matrix.visit(submit)
+    result = matrix.get_stat_data()
+    return result, time.time() - start
+
+
+def main():
+    args = parse_args()
+    generator = random.Random(args['seed'])
+    submits = []
+    for submit_id in range(args['submits']):
+        runs = [Run(('1', 'A'), submit_id, case_id + 1, '0.1', '100', generator.choice(OUTCOMES))
+                for case_id in range(generator.randint(1, args['cases']))]
+        submits.append(Submit(submit_id, ('1', 'A'), '1', '1', runs, runs[-1].outcome, 'ACM', submit_id))
+    expected, spent = measure(LoopEqMatrix(), submits)
+    print('loop: {:.1f}us per submit'.format(spent * 1e6 / len(submits)))
+    with patch('stats.eq_matrix.numpy', None):
+        result, spent = measure(EqMatrix(), submits)
+    print('bitsets: {:.1f}us per submit, {}'.format(spent * 1e6 / len(submits),
+                                                   'same' if result == expected else 'DIFFERENT'))
+    if stats.eq_matrix.numpy is not None:
+        result, spent = measure(EqMatrix(), submits)
+        print('numpy: {:.1f}us per submit, {}'.format(spent * 1e6 / len(submits),
+                                                     'same' if result == expected else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,114 @@
 import logging
 
+from hash_cache import HashCache
 from problem_generator import problem_generator
+from similarity_index import SimilarityIndex
 
 
-def extract_cases_to_db(contest_dirs, cursor, origin, start_from='1'):
-    problems = problem_generator(contest_dirs)
+CONTESTS_IN_BATCH = 20
+
+
+class CasesHashesWriter:
+    """Writes problems and hashes of their cases with a few set-based statements per batch of contests.
+
+    Problems are staged into temporary tables, then existing problems are updated, missing ones are
+    inserted and io hashes of their cases are updated, all in one transaction per batch.
+    """
+
+    def __init__(self, cursor, origin):
+        self.cursor = cursor
+        self.origin = origin
+        self.problems = dict()  # (contest_id, problem_id) -> problem, the last one wins
+        self.contests = []
+        self.cursor.execute('CREATE TEMP TABLE IF NOT EXISTS StagedProblems ('
+                            'id INTEGER PRIMARY KEY, contest_id TEXT, problem_id TEXT, name TEXT, polygon_id TEXT, '
+                            'contest_ref INTEGER, problem_ref INTEGER)')
+        self.cursor.execute('CREATE TEMP TABLE IF NOT EXISTS StagedCases ('
+                            'staged_problem INTEGER, case_id TEXT, io_hash TEXT, problem_ref INTEGER)')
+
+    def add(self, problem):
+        contest_id = problem.problem_id[0].rjust(6, '0')
+        if contest_id not in self.contests:
+            if len(self.contests) >= CONTESTS_IN_BATCH:
+                self.flush()
+            self.contests.append(contest_id)
+        self.problems[contest_id, problem.problem_id[1]] = problem
+
+    def flush(self):
+        if not self.problems:
+            return
+        staged_problems, staged_cases = [], []
+        for (contest_id, problem_id), problem in self.problems.items():
+            staged_problem = len(staged_problems) + 1
+            staged_problems.append([staged_problem, contest_id, problem_id, problem.name, problem.polygon_id])
+            staged_cases.extend([staged_problem, case_num + 1, io_hash]
+                                for case_num, io_hash in enumerate(problem.cases))
+        self.cursor.executemany('INSERT INTO StagedProblems (id, contest_id, problem_id, name, polygon_id) '
+                                'VALUES (?, ?, ?, ?, ?)', staged_problems)
+        self.cursor.executemany('INSERT INTO StagedCases (staged_problem, case_id, io_hash) VALUES (?, ?, ?)',
+                                staged_cases)
+
+        self.cursor.execute('UPDATE StagedProblems SET contest_ref = (SELECT MIN(id) FROM Contests '
+                            'WHERE origin = ? AND contest_id = StagedProblems.contest_id)', (self.origin,))
+        for row in self.cursor.execute('SELECT DISTINCT contest_id FROM StagedProblems '
+                                       'WHERE contest_ref IS NULL').fetchall():
+            logging.warning('Contest #{} not found'.format(row[0].lstrip('0')))
+        self.cursor.execute('DELETE FROM StagedProblems WHERE contest_ref IS NULL')
+
+        self.cursor.execute('UPDATE Problems SET (name, polygon_id) = (SELECT name, polygon_id FROM StagedProblems '
+                            'WHERE contest_ref = Problems.contest_ref AND problem_id = Problems.problem_id) '
+                            'WHERE id IN (SELECT Problems.id FROM StagedProblems JOIN Problems '
+                            'ON Problems.contest_ref = StagedProblems.contest_ref '
+                            'AND Problems.problem_id = StagedProblems.problem_id)')
+        self.cursor.execute('INSERT INTO Problems (id, contest_ref, polygon_id, problem_id, name) '
+                            'SELECT NULL, contest_ref, polygon_id, problem_id, name FROM StagedProblems '
+                            'WHERE NOT EXISTS (SELECT 1 FROM Problems WHERE contest_ref = StagedProblems.contest_ref '
+                            'AND problem_id = StagedProblems.problem_id) ORDER BY id')
+        self.cursor.execute('UPDATE StagedProblems SET problem_ref = (SELECT MIN(id) FROM Problems '
+                            'WHERE contest_ref = StagedProblems.contest_ref AND problem_id = StagedProblems.problem_id)')
+
+        self.cursor.execute('UPDATE StagedCases SET problem_ref = (SELECT problem_ref FROM StagedProblems '
+                            'WHERE id = StagedCases.staged_problem)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS temp.staged_cases_index ON StagedCases (problem_ref, case_id)')
+        # Overlaps are recalculated only for the problems whose hashes change
+        changed_problems = [row[0] for row in self.cursor.execute(
+            'SELECT DISTINCT Cases.problem_ref FROM StagedCases JOIN Cases '
+            'ON Cases.problem_ref = StagedCases.problem_ref AND Cases.case_id = StagedCases.case_id '
+            'WHERE Cases.io_hash IS NOT StagedCases.io_hash').fetchall()]
+        self.cursor.execute('UPDATE Cases SET io_hash = (SELECT io_hash FROM StagedCases '
+                            'WHERE problem_ref = Cases.problem_ref AND case_id = Cases.case_id) '
+                            'WHERE id IN (SELECT Cases.id FROM StagedCases JOIN Cases '
+                            'ON Cases.problem_ref = StagedCases.problem_ref AND Cases.case_id = StagedCases.case_id)')
+        updated_cases = self.cursor.rowcount
+        if changed_problems:
+            SimilarityIndex(self.cursor).update(changed_problems)
+
+        self.cursor.execute('DELETE FROM StagedCases')
+        self.cursor.execute('DELETE FROM StagedProblems')
+        self.cursor.connection.commit()
+
+        for contest_id in self.contests:
+            problems = [problem for key, problem in self.problems.items() if key[0] == contest_id]
+            logging.info('Filled in {0} cases of {1} problems from contest #{2}'.format(
+                sum(len(problem.cases) for problem in problems), len(problems), contest_id.lstrip('0')))
+        logging.info('Updated {0} cases of {1} contests'.format(updated_cases, len(self.contests)))
+        self.problems = dict()
+        self.contests = []
+
+
+def extract_cases_to_db(contest_dirs, cursor, origin, start_from='1', jobs=1):
+    problems = problem_generator(contest_dirs, HashCache(cursor), jobs)
     contests_len = cursor.execute('SELECT COUNT(id) FROM Contests').fetchone()
     if contests_len is None or contests_len[0] == 0:
         logging.info('Database is empty')
         return
 
+    writer = CasesHashesWriter(cursor, origin)
     for problem in problems:
         if problem.problem_id[0].rjust(6, '0') < start_from.rjust(6, '0'):
             continue
 
-        logging.info('Filling in cases for problem #{0} from contest #{1}'.format(problem.problem_id[1],
-                                                                                  problem.problem_id[0]))
-        contest_response = cursor.execute('SELECT id FROM Contests WHERE origin = ? AND contest_id = ?',
-                                          (origin, problem.problem_id[0].rjust(6, '0'))).fetchone()
-        if contest_response is None:
-            logging.warning('Contest #{} not found'.format(problem.problem_id[0]))
-            continue
-
-        for contest_ref in contest_response:
-            problem_in_db = len(cursor.execute('SELECT id FROM Problems WHERE contest_ref = ? AND problem_id = ?',
-                                               (contest_ref, problem.problem_id[1])).fetchall())
-            if problem_in_db:
-                cursor.execute('UPDATE Problems SET name = ?, polygon_id = ? WHERE contest_ref = ? AND problem_id = ?',
-                               (problem.name, problem.polygon_id, contest_ref, problem.problem_id[1]))
-            else:
-                cursor.execute('INSERT INTO Problems (id, contest_ref, polygon_id, problem_id, name) VALUES (NULL, ?, ?, ?, ?)',
-                               (contest_ref, problem.polygon_id, problem.problem_id[1], problem.name))
-            problem_response = cursor.execute('SELECT id FROM Problems WHERE contest_ref = ? AND problem_id = ?',
-                                              (contest_ref, problem.problem_id[1])).fetchone()
-            if problem_response is None:
-                logging.warning('Problem {} not found'.format(problem.problem_id))
-                continue
-
-            for problem_ref in problem_response:
-                for case_num in range(len(problem.cases)):
-                    cursor.execute('UPDATE Cases SET io_hash = ? WHERE problem_ref = ? AND case_id = ?',
-                                   (problem.cases[case_num], problem_ref, case_num + 1))
-                    if case_num % 50 == 0 and case_num != 0:
-                        logging.info('Filled in {0} cases of problem # {1} from contest #{2}'.format(case_num,
-                                                                                                     problem.problem_id[
-                                                                                                         1],
-                                                                                                     problem.problem_id[
-                                                                                                         0]))
-
-                logging.info('Filled in {0} cases of problem #{1} from contest #{2}'.format(case_num,
-                                                                                            problem.problem_id[1],
-                                                                                            problem.problem_id[0]))
+        logging.debug('Hashed cases of problem #{0} from contest #{1}'.format(problem.problem_id[1],
+                                                                              problem.problem_id[0]))
+        writer.add(problem)
+    writer.flush()
@@ -1,9 +1,18 @@
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-from db_submits_filler import DBSubmitsFiller
+from db_submits_filler import DBSubmitsFiller, BulkSubmitsFiller
 
 from ejudge_database import EjudgeDatabase
-from walker import SubmitWalker, MultipleContestWalker, EjudgeRunsFilesWorker
+from reports_manifest import ReportsManifest
+from materialized_stats import MaterializedStats
+from walker import SubmitWalker, MultipleContestWalker, EjudgeRunsFilesWorker, parse_report_files, \
+    scan_report_file, scan_report_files
+
+
+PARSE_CHUNK_SIZE = 32  # reports sent to a worker process at once
+CHUNKS_IN_FLIGHT_PER_JOB = 4
 
 
 def create_submit_walker(cursor=None):
@@ -12,22 +21,108 @@ def create_submit_walker(cursor=None):
     return SubmitWalker(None)
 
 
-def fill_from_xml(sqlite_cursor, ejudge_cursor, start_dir, origin):
+def create_filler(cursor, batch_size=None):
+    if batch_size:
+        return BulkSubmitsFiller(cursor, batch_size)
+    return DBSubmitsFiller(cursor)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_reports(file_names, executor, max_chunks_in_flight, parse_chunk=None):
+    # Yields (file name, parse result) in the order of file_names
+    parse_chunk = parse_chunk or parse_report_files
+    pending = deque()
+    for chunk in _chunks(file_names, PARSE_CHUNK_SIZE):
+        pending.append((chunk, executor.submit(parse_chunk, chunk)))
+        if len(pending) >= max_chunks_in_flight:
+            chunk, future = pending.popleft()
+            yield from zip(chunk, future.result())
+    while pending:
+        chunk, future = pending.popleft()
+        yield from zip(chunk, future.result())
+
+
+def _walk_contest_submits(walker, contest_dir, executor, jobs):
+    # Yields (file name, submit, None), the submit is None for broken reports
+    file_names = (filename[1] for filename in EjudgeRunsFilesWorker().walk(contest_dir))
+    if executor is None:
+        for file_name in file_names:
+            for submit in walker.walk(file_name):
+                yield file_name, submit, None
+    else:
+        for file_name, result in parse_reports(file_names, executor, jobs * CHUNKS_IN_FLIGHT_PER_JOB):
+            yield file_name, walker.get_submit_from_parse_result(result), None
+
+
+def _scan_contest_reports(walker, manifest, contest_dir, executor, jobs):
+    # Yields (file name, submit, content hash) of the new and changed reports. The hash is None if the
+    # report should not be recorded in the manifest. Reports which content did not change are only touched.
+    file_names = (filename[1] for filename in EjudgeRunsFilesWorker().walk(contest_dir))
+    reports = manifest.changed_reports(file_names)
+    if executor is None:
+        scanned = ((report, scan_report_file(*report)) for report in reports)
+    else:
+        scanned = parse_reports(reports, executor, jobs * CHUNKS_IN_FLIGHT_PER_JOB, scan_report_files)
+    for (file_name, known_hash), (content_hash, result) in scanned:
+        if content_hash is not None and content_hash == known_hash:
+            manifest.touch(file_name)
+            continue
+        submit = walker.get_submit_from_parse_result(result)
+        if submit is None and result is not None:
+            # The report is fine, but its run is not in the ejudge database yet, so try it again next time
+            content_hash = None
+        yield file_name, submit, content_hash
+
+
+def fill_from_xml(sqlite_cursor, ejudge_cursor, start_dir, origin, batch_size=None, jobs=1, use_manifest=False):
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as executor:
+            _fill_from_xml(sqlite_cursor, ejudge_cursor, start_dir, origin, batch_size, executor, jobs,
+                           use_manifest)
+    else:
+        _fill_from_xml(sqlite_cursor, ejudge_cursor, start_dir, origin, batch_size, None, 1, use_manifest)
+
+
+def _fill_from_xml(sqlite_cursor, ejudge_cursor, start_dir, origin, batch_size, executor, jobs, use_manifest):
     walker = create_submit_walker(ejudge_cursor)
-    filler = DBSubmitsFiller(sqlite_cursor)
+    filler = create_filler(sqlite_cursor, batch_size)
+    manifest = ReportsManifest(sqlite_cursor, origin) if use_manifest else None
     for contest_id, contest_dir in MultipleContestWalker().walk(start_dir):
         logging.info("Filling contest #{0}".format(contest_id))
-        walker.contest_id = contest_id
+        walker.start_contest(contest_id)
+        if manifest is not None:
+            manifest.start_contest(contest_id, contest_dir)
+            submits = _scan_contest_reports(walker, manifest, contest_dir, executor, jobs)
+        else:
+            submits = _walk_contest_submits(walker, contest_dir, executor, jobs)
         processed_submits = 0
-        for filename in EjudgeRunsFilesWorker().walk(contest_dir):
-            for submit in walker.walk(filename[1]):
-                if submit is not None:
-                    filler.fill_db_from_submit(submit, origin)
-                    processed_submits += 1
-                    if processed_submits % 100 == 0:
-                        logging.info('Filled in {0} submits from contest #{1}'.format(processed_submits,
-                                                                                      contest_id))
-                else:
-                    logging.debug('{} is broken, skipping'.format(filename[1]))
+        for file_name, submit, content_hash in submits:
+            submit_ref = None
+            if submit is not None:
+                submit_ref = filler.fill_db_from_submit(submit, origin)
+                processed_submits += 1
+                if processed_submits % 100 == 0:
+                    logging.info('Filled in {0} submits from contest #{1}'.format(processed_submits,
+                                                                                  contest_id))
+            else:
+                logging.debug('{} is broken, skipping'.format(file_name))
+            if content_hash is not None:
+                manifest.record(file_name, content_hash, submit_ref)
+        if manifest is not None:
+            manifest.flush()
+        filler.flush()
+        if processed_submits:
+            MaterializedStats.invalidate(sqlite_cursor, str(contest_id).rjust(6, '0'))
+        walker.finish_contest()
         logging.info('Contest #{0} was finished, filled in {1} submits'.format(contest_id,
                                                                                processed_submits))
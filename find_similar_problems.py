@@ -1,45 +1,58 @@
+from array import array
+from bisect import bisect_left
+
+from cases_index import overlaps_with_previous
+
+
 SIMILAR_PROBLEMS_MIN_RATIO = 0.5
 
 
 class SimilarProblemsFinder:
-    def __init__(self, problems):
-        self.same_tests_count_dict = dict()
-        self.similarity_dict = dict()
+    def __init__(self, problems, approximate=None, index=None):
         problem_list = list(problems)
+        self.positions = {problem: position for position, problem in enumerate(problem_list)}
+        # Only the pairs with same tests are kept: position -> ascending positions of the previous problems
+        # sharing tests with it and the numbers of the same tests
+        self.neighbours = []
+        self.same_tests = []
         self.result = []
-        for i in range(len(problem_list)):
-            problem_1 = problem_list[i]
-            problem_1_tests = set(problem_1.cases)
-            for problem_2 in problem_list[i + 1:]:
-                same_tests_count = 0
-                for problem_2_test in problem_2.cases:
-                    if problem_2_test in problem_1_tests:
-                        same_tests_count += 1
-                try:
-                    similarity = same_tests_count / max(len(problem_1.cases), len(problem_2.cases))
-                except ZeroDivisionError:
-                    similarity = 0.0
+        if index is not None:
+            overlaps_list = index.overlaps_with_previous(problem_list)
+        else:
+            overlaps_list = overlaps_with_previous(problem_list, approximate=approximate)
+        for j, overlaps in enumerate(overlaps_list):
+            problem_2 = problem_list[j]
+            neighbours = sorted(overlaps)
+            for i in neighbours:
+                similarity = overlaps[i] / max(len(problem_list[i].cases), len(problem_2.cases))
                 if similarity > SIMILAR_PROBLEMS_MIN_RATIO:
-                    self.result.append((problem_1, problem_2))
-                self.same_tests_count_dict[(problem_1, problem_2)] = same_tests_count
-                self.similarity_dict[(problem_1, problem_2)] = similarity
-                self.same_tests_count_dict[(problem_2, problem_1)] = same_tests_count
-                self.similarity_dict[(problem_2, problem_1)] = similarity
+                    self.result.append((i, j))
+            self.neighbours.append(array('i', neighbours))
+            self.same_tests.append(array('i', [overlaps[i] for i in neighbours]))
+        self.result = [(problem_list[i], problem_list[j]) for i, j in sorted(self.result)]
 
     def get_stat_data(self):
         return self.result
 
     def get_same_tests_count(self, problem_1, problem_2):
-        return self.same_tests_count_dict[(problem_1, problem_2)]
+        position_1, position_2 = sorted([self.positions[problem_1], self.positions[problem_2]])
+        neighbours = self.neighbours[position_2]
+        k = bisect_left(neighbours, position_1)
+        if k < len(neighbours) and neighbours[k] == position_1:
+            return self.same_tests[position_2][k]
+        return 0
 
     def get_added_tests_count(self, problem_1, problem_2):
-        return len(problem_2.cases) - self.same_tests_count_dict[(problem_1, problem_2)]
+        return len(problem_2.cases) - self.get_same_tests_count(problem_1, problem_2)
 
     def get_removed_tests_count(self, problem_1, problem_2):
-        return len(problem_1.cases) - self.same_tests_count_dict[(problem_1, problem_2)]
+        return len(problem_1.cases) - self.get_same_tests_count(problem_1, problem_2)
 
     def get_similarity(self, problem_1, problem_2):
-        return self.similarity_dict[(problem_1, problem_2)]
+        try:
+            return self.get_same_tests_count(problem_1, problem_2) / max(len(problem_1.cases), len(problem_2.cases))
+        except ZeroDivisionError:
+            return 0.0
 
     def __str__(self):
         resulting_string = ''
@@ -0,0 +1,38 @@
+import os
+
+
+class HashCache:
+    """Keeps io hashes of tests, so that tests which files did not change are not read again."""
+
+    def __init__(self, db_cur):
+        self.db_cur = db_cur
+        self.stats = dict()  # (input path, output path) -> stats of the files when they were looked up
+        self.updated = []
+
+    @staticmethod
+    def _get_stats(input_path, output_path):
+        input_stat, output_stat = os.stat(input_path), os.stat(output_path)
+        return [input_stat.st_size, input_stat.st_mtime_ns, output_stat.st_size, output_stat.st_mtime_ns]
+
+    def get(self, input_path, output_path):
+        try:
+            stats = self._get_stats(input_path, output_path)
+        except OSError:
+            return None
+        self.stats[input_path, output_path] = stats
+        self.db_cur.execute('SELECT input_size, input_mtime, output_size, output_mtime, io_hash FROM HashCache '
+                            'WHERE input_path = ? AND output_path = ?', [input_path, output_path])
+        row = self.db_cur.fetchone()
+        if row is None or list(row[:4]) != stats:
+            return None
+        return row[4]
+
+    def put(self, input_path, output_path, io_hash):
+        stats = self.stats.pop((input_path, output_path), None)
+        if stats is not None:
+            self.updated.append([input_path, output_path] + stats + [io_hash])
+
+    def flush(self):
+        self.db_cur.executemany('INSERT OR REPLACE INTO HashCache (input_path, output_path, input_size, input_mtime, '
+                                'output_size, output_mtime, io_hash) VALUES (?, ?, ?, ?, ?, ?, ?)', self.updated)
+        self.updated = []
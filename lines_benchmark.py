@@ -0,0 +1,46 @@
+import argparse
+import os
+import random
+import time
+
+from lines_router import route_lines
+
+
+PROBLEM_RADIUS = 10
+PROBLEMS_IN_ROW = 60
+PROBLEM_WIDTH = 40
+ROW_HEIGHT = 250
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reports time per line of routing lines of a problems tree')
+    parser.add_argument('--problems', help='number of problems', type=int, default=3000)
+    parser.add_argument('--lines', help='number of routed lines', type=int, default=200)
+    parser.add_argument('--seed', help='seed of the lines', type=int, default=0)
+    parser.add_argument('-j', '--jobs', help='number of parallel jobs to compare with one',
+                        type=int, default=os.cpu_count())
+    return vars(parser.parse_args())
+
+
+def main():
+    args = parse_args()
+    # Rows of problems like in the drawn tree, a line goes from a problem to one of the next rows
+    coords = [(200.0 + PROBLEM_WIDTH * (i % PROBLEMS_IN_ROW), 85.0 + ROW_HEIGHT * (i // PROBLEMS_IN_ROW))
+              for i in range(args['problems'])]
+    size = (int(max(x for x, y in coords)) + 50, int(max(y for x, y in coords)) + 50)
+    generator = random.Random(args['seed'])
+    pairs = []
+    for i in range(args['lines']):
+        source = generator.randrange(len(coords) - PROBLEMS_IN_ROW)
+        destination = min(len(coords) - 1, source + generator.randrange(PROBLEMS_IN_ROW, 3 * PROBLEMS_IN_ROW))
+        pairs.append((source, destination))
+    for jobs in sorted({1, args['jobs']}):
+        start = time.time()
+        lines = route_lines(coords, size, PROBLEM_RADIUS, pairs, jobs)
+        spent = time.time() - start
+        print('{} jobs: {:.2f}ms per line, {} lines are not located'.format(
+            jobs, spent * 1000 / len(pairs), sum(1 for line in lines if not line)))
+
+
+if __name__ == '__main__':
+    main()
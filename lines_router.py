@@ -0,0 +1,224 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+LOCATE_LINES_MAX_SPEED = 3.0
+LOCATE_LINES_MAX_SPEED_SQR = LOCATE_LINES_MAX_SPEED ** 2
+LOCATE_LINES_PROBLEMS_FORCE = -150.0
+LOCATE_LINES_DESTINATION_CONSTANT_FORCE = 2.0
+LOCATE_LINES_MAX_ITERATIONS = 40000
+CHUNK_SIZE = 200
+LINES_IN_TASK = 16
+LINES_IN_TICK = 8  # LinesEngine leaves less active lines to LinesRouter
+
+
+class LinesRouter:
+    """Routes lines between problems, a line flies to its destination and the other problems repel it.
+
+    The plane is split into chunks of CHUNK_SIZE, a point of a line is repelled by the problems of its chunk and
+    the eight chunks around. The problems of these nine chunks are gathered once per chunk.
+    """
+
+    def __init__(self, coords, size, radius):
+        self.coords = [(float(x), float(y)) for x, y in coords]
+        self.radius = radius
+        self.chunks_x, self.chunks_y = (size[0] + CHUNK_SIZE - 1) // CHUNK_SIZE, \
+                                       (size[1] + CHUNK_SIZE - 1) // CHUNK_SIZE
+        self.chunks = [[] for i in range(self.chunks_x * self.chunks_y)]
+        for index, (x, y) in enumerate(self.coords):
+            self.chunks[int(x) // CHUNK_SIZE * self.chunks_y + int(y) // CHUNK_SIZE].append(index)
+        self.neighbours = dict()  # (chunk_x, chunk_y) -> [(index, x, y)] of the problems repelling in it
+
+    def route_all(self, pairs):
+        return [self.route(source, destination) for source, destination in pairs]
+
+    def _get_neighbours(self, chunk_x, chunk_y):
+        neighbours = []
+        for curr_chunk_x in range(chunk_x - 1, chunk_x + 2):
+            for curr_chunk_y in range(chunk_y - 1, chunk_y + 2):
+                if 0 <= curr_chunk_x < self.chunks_x and 0 <= curr_chunk_y < self.chunks_y:
+                    neighbours.extend((index,) + self.coords[index]
+                                      for index in self.chunks[curr_chunk_x * self.chunks_y + curr_chunk_y])
+        self.neighbours[chunk_x, chunk_y] = neighbours
+        return neighbours
+
+    def route(self, source, destination):
+        # Returns points of the line from the problem source to the problem destination, [] if it is not found
+        curr_x, curr_y = self.coords[source]
+        destination_x, destination_y = self.coords[destination]
+        curr_vx, curr_vy = 0.0, 3.0
+        radius, radius_sqr = self.radius, self.radius ** 2
+        neighbours_cache = self.neighbours
+        line = []
+        steps = 0
+        while True:
+            steps += 1
+            if steps == LOCATE_LINES_MAX_ITERATIONS:
+                return []
+            speed_sqr = curr_vx * curr_vx + curr_vy * curr_vy
+            if speed_sqr > LOCATE_LINES_MAX_SPEED_SQR:
+                speed = math.sqrt(speed_sqr)
+                curr_vx *= LOCATE_LINES_MAX_SPEED / speed
+                curr_vy *= LOCATE_LINES_MAX_SPEED / speed
+            new_line_point = (int(curr_x), int(curr_y))
+            if not line or new_line_point != line[-1]:
+                line.append(new_line_point)
+            curr_x += curr_vx
+            curr_y += curr_vy
+            dx, dy = curr_x - destination_x, curr_y - destination_y
+            if dx * dx + dy * dy <= radius_sqr:
+                return line
+            chunk = (int(curr_x) // CHUNK_SIZE, int(curr_y) // CHUNK_SIZE)
+            neighbours = neighbours_cache.get(chunk)
+            if neighbours is None:
+                neighbours = self._get_neighbours(*chunk)
+            for index, x, y in neighbours:
+                if index == source or index == destination:
+                    continue
+                dx, dy = curr_x - x, curr_y - y
+                distance = math.sqrt(dx * dx + dy * dy)
+                inverse_distance_sqr = 1.0 / ((distance - radius) * (distance - radius))
+                dx, dy = x - curr_x, y - curr_y
+                length = math.sqrt(dx * dx + dy * dy)
+                curr_vx += LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * (dx / length)
+                curr_vy += LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * (dy / length)
+            dx, dy = destination_x - curr_x, destination_y - curr_y
+            length = math.sqrt(dx * dx + dy * dy)
+            curr_vx += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (dx / length)
+            curr_vy += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (dy / length)
+
+
+class LinesEngine:
+    """LinesRouter for many lines at once, a tick makes one step of all the active lines with numpy arrays.
+
+    The forces of the neighbours are added one by one in the order of LinesRouter, so the lines are the same.
+    """
+
+    def __init__(self, coords, size, radius):
+        self.router = router = LinesRouter(coords, size, radius)
+        self.radius = float(radius)
+        self.coords = numpy.array(router.coords, dtype=float).reshape(-1, 2)
+        # Chunks from -1 to chunks_x (chunks_y) have neighbours, the last row of the table is for the others
+        self.table_x, self.table_y = router.chunks_x + 2, router.chunks_y + 2
+        chunks = [[index for index, x, y in router._get_neighbours(chunk_x, chunk_y)]
+                  for chunk_x in range(-1, router.chunks_x + 1) for chunk_y in range(-1, router.chunks_y + 1)]
+        chunks.append([])
+        self.widths = numpy.array([len(chunk) for chunk in chunks], dtype=numpy.intp)
+        self.neighbours = numpy.full((len(chunks), max(self.widths.max(), 1)), -1, dtype=numpy.intp)
+        for row, chunk in enumerate(chunks):
+            self.neighbours[row, :len(chunk)] = chunk
+
+    def _get_rows(self, x, y):
+        chunk_x = x.astype(numpy.intp) // CHUNK_SIZE + 1
+        chunk_y = y.astype(numpy.intp) // CHUNK_SIZE + 1
+        rows = chunk_x * self.table_y + chunk_y
+        rows[(chunk_x < 0) | (chunk_x >= self.table_x) | (chunk_y < 0) | (chunk_y >= self.table_y)] = \
+            len(self.neighbours) - 1
+        return rows
+
+    def route_all(self, pairs):
+        if not pairs:
+            return []
+        pairs = numpy.array(pairs, dtype=numpy.intp).reshape(-1, 2)
+        ids = numpy.arange(len(pairs))
+        source, destination = pairs[:, 0], pairs[:, 1]
+        x, y = self.coords[source, 0], self.coords[source, 1]
+        destination_x, destination_y = self.coords[destination, 0], self.coords[destination, 1]
+        vx, vy = numpy.zeros(len(pairs)), numpy.full(len(pairs), 3.0)
+        last_x, last_y = numpy.full(len(pairs), -1), numpy.full(len(pairs), -1)
+        radius_sqr = self.radius ** 2
+        history = []  # (ids, x, y) of the new points of the lines on each tick
+        found = numpy.zeros(len(pairs), dtype=bool)
+        for steps in range(1, LOCATE_LINES_MAX_ITERATIONS):
+            if len(ids) < LINES_IN_TICK:
+                break
+            speed_sqr = vx * vx + vy * vy
+            fast = speed_sqr > LOCATE_LINES_MAX_SPEED_SQR
+            if fast.any():
+                speed = numpy.sqrt(speed_sqr[fast])
+                vx[fast] *= LOCATE_LINES_MAX_SPEED / speed
+                vy[fast] *= LOCATE_LINES_MAX_SPEED / speed
+            point_x, point_y = x.astype(numpy.int32), y.astype(numpy.int32)
+            new = (steps == 1) | (point_x != last_x) | (point_y != last_y)
+            history.append((ids[new].astype(numpy.int32), point_x[new], point_y[new]))
+            last_x, last_y = point_x, point_y
+            x, y = x + vx, y + vy
+            dx, dy = x - destination_x, y - destination_y
+            arrived = dx * dx + dy * dy <= radius_sqr
+            if arrived.any():
+                found[ids[arrived]] = True
+                active = ~arrived
+                ids, source, destination, x, y, vx, vy, destination_x, destination_y, last_x, last_y = (
+                    array[active] for array in (ids, source, destination, x, y, vx, vy,
+                                                destination_x, destination_y, last_x, last_y))
+            rows = self._get_rows(x, y)
+            width = self.widths[rows].max() if len(ids) else 0
+            if width:
+                neighbours = self.neighbours[rows, :width]
+                repelling = (neighbours >= 0) & (neighbours != source[:, None]) & \
+                            (neighbours != destination[:, None])
+                neighbours_x, neighbours_y = self.coords[neighbours, 0], self.coords[neighbours, 1]
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    dx, dy = x[:, None] - neighbours_x, y[:, None] - neighbours_y
+                    distance = numpy.sqrt(dx * dx + dy * dy) - self.radius
+                    inverse_distance_sqr = 1.0 / (distance * distance)
+                    dx, dy = neighbours_x - x[:, None], neighbours_y - y[:, None]
+                    length = numpy.sqrt(dx * dx + dy * dy)
+                    force = LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr
+                    force_x = numpy.where(repelling, force * (dx / length), 0.0)
+                    force_y = numpy.where(repelling, force * (dy / length), 0.0)
+                for column in range(width):
+                    vx += force_x[:, column]
+                    vy += force_y[:, column]
+            dx, dy = destination_x - x, destination_y - y
+            length = numpy.sqrt(dx * dx + dy * dy)
+            vx += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (dx / length)
+            vy += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (dy / length)
+        else:
+            ids = ids[:0]  # the lines which are still active are not found
+        lines = [[] for i in range(len(pairs))]
+        if history:
+            # Points of a line are in the order of ticks after the stable sort by line
+            points_ids, points_x, points_y = (numpy.concatenate(arrays) for arrays in zip(*history))
+            order = numpy.argsort(points_ids, kind='stable')
+            points_ids, points_x, points_y = points_ids[order], points_x[order], points_y[order]
+            bounds = numpy.searchsorted(points_ids, numpy.arange(len(pairs) + 1)).tolist()
+            for i in numpy.flatnonzero(found).tolist():
+                lines[i] = list(zip(points_x[bounds[i]:bounds[i + 1]].tolist(),
+                                    points_y[bounds[i]:bounds[i + 1]].tolist()))
+        # A few slow lines are routed faster one by one
+        for i in ids.tolist():
+            lines[i] = self.router.route(*pairs[i].tolist())
+        return lines
+
+
+def _create_router(coords, size, radius):
+    return LinesRouter(coords, size, radius) if numpy is None else LinesEngine(coords, size, radius)
+
+
+_router = None
+
+
+def _init_router(coords, size, radius):
+    global _router
+    _router = _create_router(coords, size, radius)
+
+
+def _route_lines(pairs):
+    return _router.route_all(pairs)
+
+
+def route_lines(coords, size, radius, pairs, jobs=1):
+    # Returns the lines for pairs (source, destination) of indices of problems, lines do not affect each other
+    if jobs <= 1 or len(pairs) <= LINES_IN_TASK:
+        return _create_router(coords, size, radius).route_all(pairs)
+    # LinesEngine is faster on more lines at once, it gets a few tasks for each job
+    task_size = LINES_IN_TASK if numpy is None else max(LINES_IN_TASK, len(pairs) // (4 * jobs) + 1)
+    tasks = [pairs[i:i + task_size] for i in range(0, len(pairs), task_size)]
+    with ProcessPoolExecutor(jobs, initializer=_init_router, initargs=(coords, size, radius)) as executor:
+        return [line for lines in executor.map(_route_lines, tasks) for line in lines]
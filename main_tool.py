@@ -3,13 +3,15 @@
 import toollib
 import tool_config
 from argparse import ArgumentParser
+from datetime import datetime
 import db_tool
 from  sqlite_connector import SQLiteConnector
 import update_db
 import os.path
+from cases_index import DEFAULT_LSH
 
 
-SCHEMA_VERSION = 3
+SCHEMA_VERSION = 8
 
 
 def die(message):
@@ -22,21 +24,31 @@ def parse_args():
     parser.add_argument('--cfg', help="config file")
     parser.add_argument('--database', help="database file")
     parser.add_argument('-c', '--console', help='output to console', action='store_true')
-    parser.add_argument('-o', '--output', help='output file')
+    parser.add_argument('-o', '--output', help='output file (a tree is drawn to SVG if it is named *.svg)')
     parser.add_argument('action', help='action to perform (stat, fill)')  # TODO all actions
 
     # tool
     parser.add_argument('-p', '--problem', help='process only submits for the problem selected (contest:problem)')
     parser.add_argument('-s', '--scoring', help="contest scoring (acm, kirov)")
+    parser.add_argument('--since', help='process only submits sent since this time (YYYY-MM-DD [HH:MM:SS])')
+    parser.add_argument('--until', help='process only submits sent before this time (YYYY-MM-DD [HH:MM:SS])')
+    parser.add_argument('--origin', help='process only contests of this origin')
+    parser.add_argument('--lang', help='process only submits in these languages (comma separated ids)')
+    parser.add_argument('--users', help='process only submits of these users (comma separated ids)')
+    parser.add_argument('--contests', help='process only contests from the range (FIRST-LAST, FIRST- or -LAST)')
     parser.add_argument('--lang-sharding', help="shard by language in submits_by_signature",
                         action="store_true")
     parser.add_argument('--min-submits', help="minimal submits count for submits_by_signature")
     parser.add_argument('--pretty-json', help="prettify build_tree output",
                         action="store_true")
+    parser.add_argument('--approximate', help='find similar problems with MinHash LSH (BANDS:ROWS, 16:2 by default), '
+                                              'more bands find more of them, more rows work faster',
+                        nargs='?', const='{}:{}'.format(*DEFAULT_LSH))
     parser.add_argument('preset', help="name or number of statistics preset", nargs='?')
 
     # run_cases_stats
-    parser.add_argument('--tree-json', help="saved tree (only for draw_saved_tree)")
+    parser.add_argument('--tree', '--tree-json', help="saved tree file or json (only for draw_saved_tree)",
+                        dest='tree_json')
 
     # db_tool
     parser.add_argument('--clean', help='Create new or overwrite existing database',
@@ -51,10 +63,25 @@ def parse_args():
                         default='1')
     parser.add_argument('--contests-names', help='Fill in contests names only',
                         action='store_true')
+    parser.add_argument('--batch-size', help='Write submits in transactions of this many submits',
+                        type=int)
+    parser.add_argument('--ignore-manifest', help='Parse all reports, even the ones filled in before',
+                        action='store_true')
+    parser.add_argument('-j', '--jobs', help='Number of parallel jobs', type=int, default=1)
+    parser.add_argument('--incremental', help='Save statistics per contest and visit only submits added since '
+                                              'the previous --incremental run', action='store_true')
 
     return vars(parser.parse_args())
 
 
+def parse_time(value):
+    for time_format in ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(value, time_format).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    die('Time should be specified as YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.')
+
 def get_arguments():
     args = parse_args()
     config_name = args['cfg'] or 'config.ini'
@@ -110,6 +137,24 @@ def get_arguments():
         filters['scoring'] = config['stat']['scoring'].upper()
     if 'scoring' in filters and filters['scoring'] == 'ALL':
         del filters['scoring']
+    if args['since']:
+        filters['since'] = parse_time(args['since'])
+    if args['until']:
+        filters['until'] = parse_time(args['until'])
+    if args['origin']:
+        filters['origin'] = args['origin']
+    if args['lang']:
+        filters['langs'] = args['lang'].split(',')
+    if args['users']:
+        filters['users'] = args['users'].split(',')
+    if args['contests']:
+        if args['contests'].count('-') != 1:
+            die('Contests filter should be specified as FIRST-LAST. You can also write FIRST- or -LAST.')
+        first, last = args['contests'].split('-')
+        if first:
+            filters['contests_from'] = first.rjust(6, '0')
+        if last:
+            filters['contests_to'] = last.rjust(6, '0')
 
     extra = {}
     extra['min_submits'] = 0
@@ -134,6 +179,20 @@ def get_arguments():
     if args['contests_names']:
         extra['contests_names'] = True
     extra['start_from'] = args['start_from']
+    if args['batch_size']:
+        extra['batch_size'] = args['batch_size']
+    if args['ignore_manifest']:
+        extra['ignore_manifest'] = True
+    if args['jobs'] > 1:
+        extra['jobs'] = args['jobs']
+    if args['incremental']:
+        extra['incremental'] = True
+    if args['approximate']:
+        try:
+            bands, rows = map(int, args['approximate'].split(':'))
+        except ValueError:
+            die('LSH parameters should be specified as BANDS:ROWS.')
+        extra['approximate'] = (bands, rows)
 
 
 
@@ -0,0 +1,57 @@
+import logging
+import pickle
+
+
+class MaterializedStats:
+    """Keeps visitors of a statistics per contest with the last Submits.id they visited.
+
+    The next incremental run of the statistics visits only the submits added after it.
+    """
+
+    def __init__(self, db_cur, stat_name, state_key):
+        self.db_cur = db_cur
+        self.stat_name = stat_name
+        self.state_key = state_key
+        self.db_cur.execute('SELECT contest_id, high_water, state FROM MaterializedStats '
+                            'WHERE stat_name = ? AND state_key = ?', [stat_name, state_key])
+        self.states = {row[0]: (row[1], row[2]) for row in self.db_cur.fetchall()}
+        self.updated = []
+
+    def get(self, contest_id):
+        # Returns the high water mark and the visitor of the contest, or (0, None) if it is not saved
+        if contest_id not in self.states:
+            return 0, None
+        high_water, state = self.states[contest_id]
+        try:
+            return high_water, pickle.loads(state)
+        except Exception:
+            logging.warning('Saved {} of contest #{} is broken, it will be recalculated'.format(self.stat_name,
+                                                                                               contest_id))
+            return 0, None
+
+    def get_high_water(self, contest_id):
+        # The last visited submit, 0 if the contest is not saved
+        return self.states[contest_id][0] if contest_id in self.states else 0
+
+    def advance(self, high_water, contest_ids=None):
+        # Saved visitors of the contests (all if None) which have no new submits cover them up to high_water
+        query = 'UPDATE MaterializedStats SET high_water = ? WHERE stat_name = ? AND state_key = ? AND high_water < ?'
+        vals = [high_water, self.stat_name, self.state_key, high_water]
+        if contest_ids is not None:
+            query += ' AND contest_id IN ({})'.format(', '.join('?' * len(contest_ids)))
+            vals.extend(contest_ids)
+        self.db_cur.execute(query, vals)
+
+    def put(self, contest_id, high_water, visitor):
+        self.updated.append([self.stat_name, self.state_key, contest_id, high_water, pickle.dumps(visitor)])
+
+    def flush(self):
+        self.db_cur.executemany('INSERT OR REPLACE INTO MaterializedStats '
+                                '(stat_name, state_key, contest_id, high_water, state) VALUES (?, ?, ?, ?, ?)',
+                                self.updated)
+        self.updated = []
+
+    @staticmethod
+    def invalidate(db_cur, contest_id):
+        # Submits of the contest could be refilled in place, so they have to be visited again
+        db_cur.execute('DELETE FROM MaterializedStats WHERE contest_id = ?', [contest_id])
@@ -1,9 +1,16 @@
 import hashlib
 
 
+CHUNK_SIZE = 1024 * 1024
+
+
 def _md5_update(md5, filename):
     with open(filename, "rb") as file:
-        md5.update(file.read())
+        while True:
+            data = file.read(CHUNK_SIZE)
+            if not data:
+                break
+            md5.update(data)
 
 
 def get_hash(input_data_filename, output_data_filename):
@@ -11,4 +18,3 @@ def get_hash(input_data_filename, output_data_filename):
     _md5_update(md5, input_data_filename)
     _md5_update(md5, output_data_filename)
     return md5.hexdigest()
-
@@ -1,4 +1,8 @@
 class Submit:
+    # Millions of submits are loaded at once, so they have no __dict__
+    __slots__ = ('problem_id', 'submit_id', 'runs', 'outcome', 'user_id', 'lang_id', 'scoring', 'timestamp',
+                 'problem_ref', 'user_ref', '_runs_results')
+
     def __init__(self, submit_id, problem_id, user_id, lang_id, runs, outcome, scoring, timestamp):
         self.problem_id = problem_id
         self.submit_id = submit_id
@@ -8,11 +12,21 @@ class Submit:
         self.lang_id = lang_id
         self.scoring = scoring
         self.timestamp = timestamp
-        self.runs_results = ''
         self.count_results()
 
     def count_results(self):
-        self.runs_results = ''.join([str(run.outcome) for run in self.runs])
+        # runs_results is built on the first access, most statistics never use it
+        self._runs_results = None
+
+    @property
+    def runs_results(self):
+        if self._runs_results is None:
+            self._runs_results = ''.join([str(run.outcome) for run in self.runs])
+        return self._runs_results
+
+    @runs_results.setter
+    def runs_results(self, value):
+        self._runs_results = value
 
     def __str__(self):
         return "Submit: {0}; Result: {1}; User id: {2}; Runs: {3}.".format(self.submit_id, self.outcome,
@@ -22,6 +36,8 @@ class Submit:
 
 
 class Run:
+    __slots__ = ('problem_id', 'submit_id', 'case_id', 'real_time', 'time', 'outcome', 'submit_ref', 'case_ref')
+
     def __init__(self, problem_id, submit_id, case_id, real_time, time, outcome):
         self.problem_id = problem_id
         self.submit_id = submit_id
@@ -1,6 +1,9 @@
 import unittest
 import configparser
 import os
+import sqlite3
+
+import scheme_update_funcs
 
 
 class PestoTestCase(unittest.TestCase):
@@ -14,3 +17,17 @@ class PestoTestCase(unittest.TestCase):
             self.temp_dir = parser['dirs']['temp_dir']
         else:
             self.temp_dir = 'testdata'
+
+
+def create_test_database():
+    # In-memory database with the latest schema
+    connection = sqlite3.connect(':memory:')
+    with open('tables_script.txt') as script:
+        connection.executescript(script.read())
+    cursor = connection.cursor()
+    version = 0
+    while hasattr(scheme_update_funcs, 'update_from_v{}_to_v{}'.format(version, version + 1)):
+        getattr(scheme_update_funcs, 'update_from_v{}_to_v{}'.format(version, version + 1))(cursor)
+        version += 1
+    connection.commit()
+    return connection
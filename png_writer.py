@@ -0,0 +1,44 @@
+import struct
+import zlib
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+COMPRESSION_LEVEL = 6
+
+
+class PngWriter:
+    """Writes an RGB PNG by strips of rows, so the whole picture is never kept in memory.
+
+    Rows are not filtered, each written strip is compressed into the next IDAT chunks.
+    """
+
+    def __init__(self, file, size):
+        self.file = file
+        self.size_x, self.size_y = size
+        self.rows = 0
+        self.compressor = zlib.compressobj(COMPRESSION_LEVEL)
+        self.file.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', self.size_x, self.size_y, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self.file.write(struct.pack('>I', len(data)) + chunk_type + data +
+                        struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def write_rows(self, data):
+        # data are the next rows, 3 bytes for a pixel
+        row_size = 3 * self.size_x
+        if len(data) % row_size:
+            raise ValueError('Rows of {} pixels are expected'.format(self.size_x))
+        self.rows += len(data) // row_size
+        if self.rows > self.size_y:
+            raise ValueError('Image has only {} rows'.format(self.size_y))
+        compressed = self.compressor.compress(b''.join(b'\0' + data[i:i + row_size]
+                                                       for i in range(0, len(data), row_size)))
+        if compressed:
+            self._write_chunk(b'IDAT', compressed)
+
+    def close(self):
+        if self.rows != self.size_y:
+            raise ValueError('{} rows of {} are written'.format(self.rows, self.size_y))
+        self._write_chunk(b'IDAT', self.compressor.flush())
+        self._write_chunk(b'IEND', b'')
@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from dao import ContestsDAO, ProblemsDAO
 import ejudge_contest
@@ -6,7 +7,37 @@ import model
 import md5_hasher
 
 
-def problem_generator(contest_dirs):
+def _hash_test(test_path):
+    return md5_hasher.get_hash(test_path[0], test_path[1])
+
+
+def get_tests_hashes(tests_paths, hash_cache=None, executor=None):
+    tests_hashes = [hash_cache.get(*test_path) if hash_cache else None for test_path in tests_paths]
+    missing = [i for i in range(len(tests_paths)) if tests_hashes[i] is None]
+    missing_paths = [tests_paths[i] for i in missing]
+    if executor is not None:
+        computed = executor.map(_hash_test, missing_paths)
+    else:
+        computed = map(_hash_test, missing_paths)
+    for i, io_hash in zip(missing, computed):
+        tests_hashes[i] = io_hash
+        if hash_cache:
+            hash_cache.put(tests_paths[i][0], tests_paths[i][1], io_hash)
+    if hash_cache:
+        hash_cache.flush()
+    return tests_hashes
+
+
+def problem_generator(contest_dirs, hash_cache=None, jobs=1):
+    if jobs > 1:
+        # hashlib releases the GIL while hashing, so threads are enough
+        with ThreadPoolExecutor(jobs) as executor:
+            yield from _problem_generator(contest_dirs, hash_cache, executor)
+    else:
+        yield from _problem_generator(contest_dirs, hash_cache, None)
+
+
+def _problem_generator(contest_dirs, hash_cache, executor):
     for contest_dir in contest_dirs:
         logging.debug('Entering {}'.format(contest_dir))
         contest = ejudge_contest.EjudgeContest(contest_dir)
@@ -16,9 +47,7 @@ def problem_generator(contest_dirs):
             problem_name = contest.get_short_name_by_problem_id(problem_id)
             polygon_id = contest.get_polygon_id_by_problem_id(problem_id)
             tests_paths = contest.get_test_paths_by_problem_id(problem_id)
-            tests_hashes = []
-            for test_path in tests_paths:
-                tests_hashes.append(md5_hasher.get_hash(test_path[0], test_path[1]))
+            tests_hashes = get_tests_hashes(tests_paths, hash_cache, executor)
             yield model.Problem(problem_id, polygon_id, problem_name, tests_hashes)
 
 
@@ -1,24 +1,27 @@
 import logging
 
+from cases_index import overlaps_with_previous
+
 SIMILAR_PROBLEMS_MIN_RATIO = 0.5
 EPS = 1e-9
 
 
 class ProblemsTree:
-    def __init__(self, problems):
+    def __init__(self, problems, approximate=None, index=None):
         self.problems = list(problems)
         self.problem_previous = dict()  # problem -> (previous, similarity, same, added, removed)
-        for index, problem_1 in enumerate(self.problems):
+        if index is not None:
+            overlaps_list = index.overlaps_with_previous(self.problems, distinct=True)
+        else:
+            overlaps_list = overlaps_with_previous(self.problems, distinct=True, approximate=approximate)
+        for index, overlaps in enumerate(overlaps_list):
             if index % 100 == 0 and index > 0:
                 logging.info("Build tree: {}/{}".format(index, len(problems)))
-            problem_1_tests = set(problem_1.cases)
-            for problem_2 in self.problems[index + 1:]:
-                problem_2_tests = set(problem_2.cases)
-                same_tests_count = len(problem_1_tests & problem_2_tests)
-                try:
-                    similarity = same_tests_count / max(len(problem_1.cases), len(problem_2.cases))
-                except ZeroDivisionError:
-                    similarity = 0.0
+            problem_2 = self.problems[index]
+            for previous in sorted(overlaps):
+                problem_1 = self.problems[previous]
+                same_tests_count = overlaps[previous]
+                similarity = same_tests_count / max(len(problem_1.cases), len(problem_2.cases))
                 if similarity > SIMILAR_PROBLEMS_MIN_RATIO:
                     if problem_2 not in self.problem_previous or \
                                     similarity > self.problem_previous[problem_2][1] - EPS:
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+import model
+import problems_tree
+import stats.contests_grouper
+
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+MMAP_SIZE = 1 << 30
+
+
+def is_tree_file(filename):
+    # Tree files are SQLite databases, saved trees of problems_tree_json are json
+    with open(filename, 'rb') as file:
+        return file.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+
+def save_tree(tree, contests_grouper, filename):
+    # The tree is written to a new file which replaces the old one (of any format) at the end
+    temp_filename = filename + '.tmp'
+    if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+    connection = sqlite3.connect(temp_filename)
+    cursor = connection.cursor()
+    # Problems are numbered from 0 in the order of the tree, parent is the number of the previous problem
+    cursor.execute('CREATE TABLE TreeProblems (id INTEGER PRIMARY KEY, contest_id, problem_id, name TEXT, '
+                   'cases_count INTEGER, parent INTEGER, similarity REAL, same_cases INTEGER, added_cases INTEGER, '
+                   'removed_cases INTEGER)')
+    cursor.execute('CREATE TABLE TreeContests (contest_id PRIMARY KEY, year, season, day, parallel)')
+    problem_to_index = {problem: index for index, problem in enumerate(tree.get_problems())}
+
+    def problems_rows():
+        for index, problem in enumerate(tree.get_problems()):
+            relation_to_parent = tree.get_relation_to_parent(problem)
+            if relation_to_parent is None:
+                relation_to_parent = (None, ) * 5
+            else:
+                relation_to_parent = (problem_to_index[relation_to_parent[0]], ) + tuple(relation_to_parent[1:])
+            yield (index, problem.problem_id[0], problem.problem_id[1], problem.name,
+                   len(problem.cases)) + relation_to_parent
+
+    cursor.executemany('INSERT INTO TreeProblems VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', problems_rows())
+    cursor.executemany('INSERT INTO TreeContests VALUES (?, ?, ?, ?, ?)',
+                       ((contest_id, contest.year, contest.season, contest.day, contest.parallel)
+                        for contest_id, contest in contests_grouper.contests.items()))
+    connection.commit()
+    connection.close()
+    os.replace(temp_filename, filename)
+
+
+class SavedProblemsTree(problems_tree.ProblemsTree):
+    """ProblemsTree of a tree file, the problems and their relations are read on the first access.
+
+    The file is closed when both are read or by close().
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.db_cur = connection.cursor()
+        self._problems = None
+        self._problem_previous = None
+
+    @property
+    def problems(self):
+        if self._problems is None:
+            self._problems = [model.Problem((contest_id, problem_id), '', name, (None, ) * cases_count)
+                              for contest_id, problem_id, name, cases_count in self.db_cur.execute(
+                                  'SELECT contest_id, problem_id, name, cases_count FROM TreeProblems ORDER BY id')]
+        return self._problems
+
+    @property
+    def problem_previous(self):
+        if self._problem_previous is None:
+            problems = self.problems
+            self._problem_previous = {problems[index]: (problems[parent], ) + tuple(relation)
+                                      for index, parent, *relation in self.db_cur.execute(
+                                          'SELECT id, parent, similarity, same_cases, added_cases, removed_cases '
+                                          'FROM TreeProblems WHERE parent IS NOT NULL')}
+            self.close()
+        return self._problem_previous
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection, self.db_cur = None, None
+
+
+def load_tree(filename):
+    connection = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(filename)), uri=True)
+    connection.execute('PRAGMA mmap_size = {}'.format(MMAP_SIZE))
+    contests_grouper = stats.contests_grouper.ContestsGrouper([])
+    contests_grouper.contests = dict()
+    for contest_id, year, season, day, parallel in connection.execute(
+            'SELECT contest_id, year, season, day, parallel FROM TreeContests'):
+        contests_grouper.contests[contest_id] = stats.contests_grouper._Contest(year, season, day, parallel)
+    return SavedProblemsTree(connection), contests_grouper
@@ -0,0 +1,58 @@
+import os
+
+
+class ReportsManifest:
+    """Remembers which report files were already filled in, so that refills parse only new or changed ones.
+
+    Paths are stored relative to the contest directory, so moving the archive does not invalidate it.
+    """
+
+    def __init__(self, db_cur, origin):
+        self.db_cur = db_cur
+        self.origin = origin
+        self.contest_id = None
+        self.contest_dir = None
+        self.entries = dict()  # path -> [size, mtime, content_hash, submit_ref]
+        self.stats = dict()  # file name -> (size, mtime) of the files returned by changed_reports
+        self.updated = []
+
+    def start_contest(self, contest_id, contest_dir):
+        self.contest_id = contest_id
+        self.contest_dir = contest_dir
+        self.db_cur.execute('SELECT path, size, mtime, content_hash, submit_ref FROM ReportsManifest '
+                            'WHERE origin = ? AND contest_id = ?', [self.origin, contest_id])
+        self.entries = {row[0]: list(row[1:]) for row in self.db_cur.fetchall()}
+        self.stats = dict()
+
+    def _path(self, file_name):
+        return os.path.relpath(file_name, self.contest_dir)
+
+    def changed_reports(self, file_names):
+        # Yields (file name, known content hash) of the files which size or mtime changed since the last fill
+        for file_name in file_names:
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            size, mtime = stat.st_size, stat.st_mtime_ns
+            entry = self.entries.get(self._path(file_name))
+            if entry is not None and entry[:2] == [size, mtime]:
+                continue
+            self.stats[file_name] = (size, mtime)
+            yield file_name, entry[2] if entry is not None else None
+
+    def record(self, file_name, content_hash, submit_ref):
+        size, mtime = self.stats.pop(file_name)
+        self.updated.append([self.origin, self.contest_id, self._path(file_name), size, mtime, content_hash,
+                             submit_ref])
+
+    def touch(self, file_name):
+        # The content is the same, only the stat changed
+        entry = self.entries[self._path(file_name)]
+        self.record(file_name, entry[2], entry[3])
+
+    def flush(self):
+        self.db_cur.executemany('INSERT OR REPLACE INTO ReportsManifest '
+                                '(origin, contest_id, path, size, mtime, content_hash, submit_ref) '
+                                'VALUES (?, ?, ?, ?, ?, ?, ?)', self.updated)
+        self.updated = []
@@ -18,3 +18,73 @@ def update_from_v2_to_v3(db_cursor):
     db_cursor.execute('DROP INDEX `submits_index_2`')
     db_cursor.execute('CREATE INDEX `submits_index_2` ON `Submits` (`problem_ref`, `submit_id`)')
     _update_scheme_version(db_cursor, 3)
+
+def update_from_v3_to_v4(db_cursor):
+    db_cursor.execute('CREATE TABLE `ReportsManifest` ('
+                      '`id` INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, '
+                      '`origin` TEXT, '
+                      '`contest_id` TEXT, '
+                      '`path` TEXT, '
+                      '`size` INTEGER, '
+                      '`mtime` INTEGER, '
+                      '`content_hash` TEXT, '
+                      '`submit_ref` INTEGER)')
+    db_cursor.execute('CREATE UNIQUE INDEX `reports_manifest_index` ON `ReportsManifest` '
+                      '(`origin`, `contest_id`, `path`)')
+    _update_scheme_version(db_cursor, 4)
+
+def update_from_v4_to_v5(db_cursor):
+    db_cursor.execute('CREATE TABLE `HashCache` ('
+                      '`id` INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, '
+                      '`input_path` TEXT, '
+                      '`output_path` TEXT, '
+                      '`input_size` INTEGER, '
+                      '`input_mtime` INTEGER, '
+                      '`output_size` INTEGER, '
+                      '`output_mtime` INTEGER, '
+                      '`io_hash` TEXT)')
+    db_cursor.execute('CREATE UNIQUE INDEX `hash_cache_index` ON `HashCache` (`input_path`, `output_path`)')
+    _update_scheme_version(db_cursor, 5)
+
+def update_from_v5_to_v6(db_cursor):
+    db_cursor.execute('CREATE TABLE `MaterializedStats` ('
+                      '`id` INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, '
+                      '`stat_name` TEXT, '
+                      '`state_key` TEXT, '
+                      '`contest_id` TEXT, '
+                      '`high_water` INTEGER, '
+                      '`state` BLOB)')
+    db_cursor.execute('CREATE UNIQUE INDEX `materialized_stats_index` ON `MaterializedStats` '
+                      '(`stat_name`, `state_key`, `contest_id`)')
+    _update_scheme_version(db_cursor, 6)
+
+def update_from_v6_to_v7(db_cursor):
+    # Indexes for the filters of statistics
+    db_cursor.execute('CREATE INDEX `submits_index_4` ON `Submits` (`timestamp`, `problem_ref`)')
+    db_cursor.execute('CREATE INDEX `submits_index_5` ON `Submits` (`problem_ref`, `timestamp`)')
+    db_cursor.execute('CREATE INDEX `contests_index_2` ON `Contests` (`contest_id`, `origin`)')
+    db_cursor.execute('CREATE INDEX `users_index_2` ON `Users` (`user_id`, `origin`)')
+    _update_scheme_version(db_cursor, 7)
+
+def update_from_v7_to_v8(db_cursor):
+    # Posting lists of the hashes and the overlaps of the problems sharing them
+    db_cursor.execute('CREATE INDEX `cases_index_2` ON `Cases` (`io_hash`, `problem_ref`)')
+    db_cursor.execute('CREATE TABLE `ProblemsOverlaps` ('
+                      '`id` INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, '
+                      '`problem_1` INTEGER, '
+                      '`problem_2` INTEGER, '
+                      '`same_cases` INTEGER, '
+                      '`cases_1` INTEGER, '
+                      '`cases_2` INTEGER)')
+    db_cursor.execute('CREATE UNIQUE INDEX `problems_overlaps_index` ON `ProblemsOverlaps` (`problem_1`, `problem_2`)')
+    db_cursor.execute('CREATE INDEX `problems_overlaps_index_2` ON `ProblemsOverlaps` (`problem_2`)')
+    db_cursor.execute('CREATE TEMP TABLE `HashesCounts` AS SELECT problem_ref, io_hash, COUNT(*) AS cases FROM Cases '
+                      'WHERE io_hash IS NOT NULL GROUP BY problem_ref, io_hash')
+    db_cursor.execute('CREATE INDEX temp.`hashes_counts_index` ON `HashesCounts` (`io_hash`)')
+    db_cursor.execute('INSERT INTO ProblemsOverlaps (problem_1, problem_2, same_cases, cases_1, cases_2) '
+                      'SELECT First.problem_ref, Second.problem_ref, COUNT(*), SUM(First.cases), SUM(Second.cases) '
+                      'FROM HashesCounts AS First JOIN HashesCounts AS Second '
+                      'ON First.io_hash = Second.io_hash AND First.problem_ref < Second.problem_ref '
+                      'GROUP BY First.problem_ref, Second.problem_ref')
+    db_cursor.execute('DROP TABLE temp.`HashesCounts`')
+    _update_scheme_version(db_cursor, 8)
@@ -2,6 +2,9 @@ from visitor import Visitor
 
 
 class ShardingVisitor(Visitor):
+    problem_level = False  # all submits of a problem have the same key
+    partition_filter = None  # the statistics filter which selects the submits of one key
+
     def __init__(self, factory):
         super().__init__()
         self.visitors = dict()
@@ -13,6 +16,25 @@ class ShardingVisitor(Visitor):
             self.visitors[key] = self.factory.create(key)
         self.visitors[key].visit(submit)
 
+    def visit_columns(self, columns):
+        if not self.problem_level:
+            super().visit_columns(columns)
+            return
+        key = self.build_key(columns)
+        if key not in self.visitors:
+            self.visitors[key] = self.factory.create(key)
+        self.visitors[key].visit_columns(columns)
+
+    def empty(self):
+        return type(self)(self.factory)
+
+    def merge(self, other):
+        for key, visitor in other.visitors.items():
+            if key not in self.visitors:
+                self.visitors[key] = visitor
+            else:
+                self.visitors[key].merge(visitor)
+
     def _enum_visitors(self):
         result = list(self.visitors.items())
         try:
@@ -53,6 +75,8 @@ class ShardingVisitor(Visitor):
 
 
 class ShardingByProblemVisitor(ShardingVisitor):
+    problem_level = True
+
     def build_key(self, submit):
         return submit.problem_id
 
@@ -64,6 +88,9 @@ class ShardingByProblemVisitor(ShardingVisitor):
 
 
 class ShardingByContestVisitor(ShardingVisitor):
+    problem_level = True
+    partition_filter = 'contest'
+
     def build_key(self, submit):
         return submit.problem_id[0]
 
@@ -88,6 +115,8 @@ class ShardingByLangVisitor(ShardingVisitor):
 
 
 class ShardingByScoringVisitor(ShardingVisitor):
+    problem_level = True
+
     def build_key(self, submit):
         return 'ACM' if submit.scoring == 'ACM' else 'kirov'
 
@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+
+from cases_index import DEFAULT_LSH
+from find_similar_problems import SimilarProblemsFinder
+from model import Problem
+from problem_generator import sqlite_problem_generator
+from problems_tree import ProblemsTree
+from sqlite_connector import SQLiteConnector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compares recall and speed of the approximate (MinHash LSH) search '
+                                                 'of similar problems with the exact one')
+    parser.add_argument('--database', help='take problems from the database instead of generating them')
+    parser.add_argument('--problems', help='number of generated problems', type=int, default=5000)
+    parser.add_argument('--seed', help='seed of generated problems', type=int, default=0)
+    parser.add_argument('--common', help='number of tests which are common for many generated problems '
+                                         '(like an empty input)', type=int, default=0)
+    parser.add_argument('settings', help='BANDS:ROWS of LSH to compare', nargs='*',
+                        default=['8:2', '{}:{}'.format(*DEFAULT_LSH), '16:4', '32:3'])
+    return vars(parser.parse_args())
+
+
+def generate_problems(count, seed, common=0):
+    # Families of problems where each problem is a copy of a previous one with a few tests changed
+    generator = random.Random(seed)
+    common_cases = [str(generator.getrandbits(64)) for i in range(common)]
+    problems = []
+    for i in range(count):
+        if problems and generator.random() < 0.6:
+            cases = list(generator.choice(problems).cases)
+            for j in range(generator.randint(0, len(cases) // 2)):
+                action = generator.randrange(3)
+                if action == 0 and cases:
+                    cases.pop(generator.randrange(len(cases)))
+                elif action == 1 and cases:
+                    cases[generator.randrange(len(cases))] = str(generator.getrandbits(64))
+                else:
+                    cases.append(str(generator.getrandbits(64)))
+        else:
+            cases = [str(generator.getrandbits(64)) for j in range(generator.randint(1, 50))]
+            cases += generator.sample(common_cases, generator.randint(0, common))
+        problems.append(Problem((str(i // 10), str(i % 10)), '', str(i), cases))
+    return problems
+
+
+def measure(function):
+    start = time.time()
+    result = function()
+    return result, time.time() - start
+
+
+def main():
+    args = parse_args()
+    if args['database']:
+        connector = SQLiteConnector()
+        connector.create_connection(args['database'], read_only=True)
+        problems = list(sqlite_problem_generator(connector))
+        connector.close_connection()
+    else:
+        problems = generate_problems(args['problems'], args['seed'], args['common'])
+    print('{} problems'.format(len(problems)))
+
+    finder, finder_time = measure(lambda: SimilarProblemsFinder(problems))
+    tree, tree_time = measure(lambda: ProblemsTree(problems))
+    exact_pairs = set(finder.result)
+    exact_parents = tree.problem_previous
+    print('exact: {} similar pairs in {:.2f}s, tree in {:.2f}s'.format(len(exact_pairs), finder_time, tree_time))
+
+    for setting in args['settings']:
+        approximate = tuple(map(int, setting.split(':')))
+        finder, finder_time = measure(lambda: SimilarProblemsFinder(problems, approximate))
+        tree, tree_time = measure(lambda: ProblemsTree(problems, approximate))
+        pairs_recall = len(exact_pairs & set(finder.result)) / max(len(exact_pairs), 1)
+        same_parents = sum(1 for problem, relation in exact_parents.items()
+                           if tree.get_previous_problem(problem) is relation[0])
+        parents_recall = same_parents / max(len(exact_parents), 1)
+        print('{}: pairs recall {:.4f} in {:.2f}s, tree parents recall {:.4f} in {:.2f}s'.format(
+            setting, pairs_recall, finder_time, parents_recall, tree_time))
+
+
+if __name__ == '__main__':
+    main()
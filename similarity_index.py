@@ -0,0 +1,58 @@
+class SimilarityIndex:
+    """Stored overlaps of the problems which have same tests.
+
+    Cases (io_hash, problem_ref) index is the posting list of each hash. ProblemsOverlaps keeps for each pair
+    of problems sharing tests (problem_1 < problem_2) the number of their distinct same tests and the number of
+    tests of each of them found in the other one. Pairs of a problem are recalculated when its hashes change.
+    """
+
+    def __init__(self, db_cur):
+        self.db_cur = db_cur
+
+    def update(self, problem_refs):
+        problem_refs = list(problem_refs)
+        if not problem_refs:
+            return
+        self.db_cur.execute('CREATE TEMP TABLE IF NOT EXISTS ChangedProblems (problem_ref INTEGER PRIMARY KEY)')
+        self.db_cur.execute('DELETE FROM ChangedProblems')
+        self.db_cur.executemany('INSERT OR IGNORE INTO ChangedProblems (problem_ref) VALUES (?)',
+                                [[ref] for ref in problem_refs])
+        self.db_cur.execute('DELETE FROM ProblemsOverlaps WHERE problem_1 IN ChangedProblems '
+                            'OR problem_2 IN ChangedProblems')
+        self.db_cur.execute('CREATE TEMP TABLE IF NOT EXISTS ChangedHashes '
+                            '(problem_ref INTEGER, io_hash TEXT, cases INTEGER)')
+        self.db_cur.execute('DELETE FROM ChangedHashes')
+        self.db_cur.execute('INSERT INTO ChangedHashes SELECT problem_ref, io_hash, COUNT(*) FROM Cases '
+                            'WHERE problem_ref IN ChangedProblems AND io_hash IS NOT NULL '
+                            'GROUP BY problem_ref, io_hash')
+        # Posting lists of the changed hashes only, each changed pair is found from both sides
+        self.db_cur.execute('INSERT OR REPLACE INTO ProblemsOverlaps (problem_1, problem_2, same_cases, cases_1, cases_2) '
+                            'SELECT MIN(Changed.problem_ref, Other.problem_ref), MAX(Changed.problem_ref, Other.problem_ref), '
+                            'COUNT(*), '
+                            'SUM(CASE WHEN Changed.problem_ref < Other.problem_ref THEN Changed.cases ELSE Other.cases END), '
+                            'SUM(CASE WHEN Changed.problem_ref < Other.problem_ref THEN Other.cases ELSE Changed.cases END) '
+                            'FROM ChangedHashes AS Changed JOIN (SELECT problem_ref, io_hash, COUNT(*) AS cases '
+                            'FROM Cases WHERE io_hash IN (SELECT io_hash FROM ChangedHashes) '
+                            'GROUP BY problem_ref, io_hash) AS Other '
+                            'ON Other.io_hash = Changed.io_hash AND Other.problem_ref != Changed.problem_ref '
+                            'GROUP BY Changed.problem_ref, Other.problem_ref')
+
+    def rebuild(self):
+        self.db_cur.execute('DELETE FROM ProblemsOverlaps')
+        self.update(row[0] for row in self.db_cur.execute('SELECT id FROM Problems').fetchall())
+
+    def overlaps_with_previous(self, problems, distinct=False):
+        # Same as cases_index.overlaps_with_previous for problems loaded by ProblemsDAO
+        problems = list(problems)
+        positions = {problem.db_id: position for position, problem in enumerate(problems)}
+        overlaps = [dict() for problem in problems]
+        for problem_1, problem_2, same_cases, cases_1, cases_2 in self.db_cur.execute(
+                'SELECT problem_1, problem_2, same_cases, cases_1, cases_2 FROM ProblemsOverlaps'):
+            if problem_1 not in positions or problem_2 not in positions:
+                continue
+            position_1, position_2 = positions[problem_1], positions[problem_2]
+            if position_1 < position_2:
+                overlaps[position_2][position_1] = same_cases if distinct else cases_2
+            else:
+                overlaps[position_1][position_2] = same_cases if distinct else cases_1
+        return overlaps
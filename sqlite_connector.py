@@ -1,14 +1,20 @@
 import sqlite3
 import logging
+from urllib.request import pathname2url
 
 
 class SQLiteConnector:
     def __init__(self):
         self.sqlite_connection = None
+        self.db_dir = None
 
-    def create_connection(self, db_dir):
+    def create_connection(self, db_dir, read_only=False):
         logging.debug('Connecting to ' + db_dir)
-        self.sqlite_connection = sqlite3.connect(db_dir)
+        self.db_dir = db_dir
+        if read_only:
+            self.sqlite_connection = sqlite3.connect('file:{}?mode=ro'.format(pathname2url(db_dir)), uri=True)
+        else:
+            self.sqlite_connection = sqlite3.connect(db_dir)
         self.sqlite_connection.row_factory = sqlite3.Row
 
     def get_cursor(self):
@@ -1,5 +1,53 @@
 import dao
+import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from materialized_stats import MaterializedStats
+from sharding_visitor import ShardingVisitor
+from sqlite_connector import SQLiteConnector
+
+
+PARTITIONS_PER_JOB = 4
+PARTITION_QUERIES = {'contest': 'SELECT DISTINCT contest_id FROM Contests'}
+# Partition values with the last submit among the submits with ids in (?, ?]
+PARTITION_NEW_SUBMITS_QUERIES = {
+    'contest': 'SELECT Contests.contest_id, MAX(Submits.id) FROM Submits '
+               'JOIN Problems ON Problems.id = Submits.problem_ref JOIN Contests ON Contests.id = Problems.contest_ref '
+               'WHERE Submits.id > ? AND Submits.id <= ? GROUP BY Contests.contest_id',
+}
+
+# filter -> condition, {} is replaced by placeholders of the values if the filter is a list
+PROBLEM_FILTERS = [
+    ('scoring', 'Contests.scoring = ?'),
+    ('contest', 'Contests.contest_id = ?'),
+    ('problem', 'Problems.problem_id = ?'),
+    ('origin', 'Contests.origin = ?'),
+    ('contests_from', 'Contests.contest_id >= ?'),
+    ('contests_to', 'Contests.contest_id <= ?'),
+]
+SUBMIT_FILTERS = [
+    ('since', 'Submits.timestamp >= ?'),
+    ('until', 'Submits.timestamp < ?'),
+    ('langs', 'Submits.lang_id IN ({})'),
+    ('users', 'Submits.user_ref IN (SELECT id FROM Users WHERE user_id IN ({}))'),
+    ('submits_after', 'Submits.id > ?'),
+    ('submits_until', 'Submits.id <= ?'),
+]
+
+
+def compile_filters(filters, known_filters):
+    cond, vals = [], []
+    for name, condition in known_filters:
+        if name not in filters:
+            continue
+        if isinstance(filters[name], (list, tuple)):
+            cond.append(condition.format(', '.join('?' * len(filters[name]))))
+            vals.extend(filters[name])
+        else:
+            cond.append(condition)
+            vals.append(filters[name])
+    return cond, vals
 
 class Statistics:
 
@@ -29,38 +77,163 @@ class Statistics:
                 f.write(res)
 
 
+def _calc_partitions(stat_class, db_dir, filters, extra, partition, values):
+    connection = SQLiteConnector()
+    connection.create_connection(db_dir, read_only=True)
+    stat = stat_class(connection, filters, dict(extra, partition=(partition, values)))
+    connection.close_connection()
+    return stat.result
+
+
 class SubmitStatistics(Statistics):
 
-    def _create_query(self):
-        query = 'SELECT {}, Contests.scoring, Contests.contest_id, Problems.problem_id FROM Submits JOIN Problems ON Submits.problem_ref=Problems.id JOIN Contests ON Problems.contest_ref = CONTESTS.id'.format(dao.SubmitsDAO.columns)
-        cond = []
-        if 'scoring' in self.filters:
-            cond.append(('Contests.scoring = ?', self.filters['scoring']))
-        if 'contest' in self.filters:
-            cond.append(('Contests.contest_id = ?', self.filters['contest']))
-        if 'problem' in self.filters:
-            cond.append(('Problems.problem_id = ?', self.filters['problem']))
+    columnar = False  # if True, visitors get dao.RunsColumns of each problem instead of submits
+    # Columns the visitors use, e.g. {'Submits.lang_id', 'Runs.outcome'}, the others are read as NULL.
+    # Runs are not read at all if no column of Runs or Cases is used. None means all columns
+    fields = None
+    key_fields = {'Submits.id', 'Submits.problem_ref', 'Runs.submit_ref'}
+
+    def __init__(self, connection, filters={}, extra={}):
+        self.filters = filters
+        self.extra = extra
+        if 'partition' in extra:
+            self.calc(self._get_partitions_input_data(connection, *extra['partition']))
+            return
+        partition = self._get_partition() if extra.get('jobs', 1) > 1 or 'incremental' in extra else None
+        if partition is not None and 'incremental' in extra:
+            self.result = self._calc_incremental(connection, partition)
+        elif partition is None or partition in filters or getattr(connection, 'db_dir', None) in (None, ':memory:'):
+            if 'incremental' in extra:
+                logging.info('{} can not be calculated incrementally'.format(self._name))
+            self.calc(self.get_input_data(connection))
+        else:
+            self.result = self._calc_parallel(connection, partition, extra['jobs'])
+
+    def _get_partition(self):
+        # The filter of the outermost shard key which splits the submits into independent parts
+        vis = self._create_visitor()
+        while isinstance(vis, ShardingVisitor) and vis.problem_level:
+            if vis.partition_filter is not None:
+                return vis.partition_filter
+            vis = vis.factory.create()
+        return None
+
+    def _get_partitions_input_data(self, connection, partition, values):
+        filters = self.filters
+        for value in values:
+            self.filters = dict(filters, **{partition: value})
+            yield from self.get_input_data(connection)
+        self.filters = filters
+
+    def _get_state_key(self):
+        # Saved visitors can be reused only by the runs with the same key
+        return json.dumps({key: value for key, value in self.filters.items() if key != 'contest'}, sort_keys=True)
+
+    def _calc_incremental(self, connection, partition):
+        cursor = connection.get_cursor()
+        high_water = cursor.execute('SELECT MAX(id) FROM Submits').fetchone()[0] or 0
+        if partition in self.filters:
+            values = [self.filters[partition]]
+        else:
+            values = [row[0] for row in cursor.execute(PARTITION_QUERIES[partition])]
+        saved = MaterializedStats(cursor, self._name, self._get_state_key())
+        # Only the contests which are not saved or have new submits are visited,
+        # the others get the new high water mark without rewriting their visitors
+        changed = {value for value in values if not saved.get_high_water(value)}
+        lowest_covered = min((saved.get_high_water(value) for value in values if value not in changed), default=None)
+        if lowest_covered is not None and lowest_covered < high_water:
+            for value, last_submit in cursor.execute(PARTITION_NEW_SUBMITS_QUERIES[partition],
+                                                     [lowest_covered, high_water]).fetchall():
+                if last_submit > saved.get_high_water(value):
+                    changed.add(value)
+        filters = self.filters
+        result = self._create_visitor()
+        for value in values:
+            covered, vis = saved.get(value)
+            if vis is None or value in changed:
+                if vis is None:
+                    vis = self._create_visitor()
+                self.filters = dict(filters, **{partition: value, 'submits_after': covered,
+                                                'submits_until': high_water})
+                self._visit_all(vis, self.get_input_data(connection))
+                saved.put(value, high_water, vis)
+            result.merge(vis)
+        self.filters = filters
+        logging.info('Visited new submits of {} contests of {}'.format(len(saved.updated), len(values)))
+        saved.advance(high_water, [filters[partition]] if partition in filters else None)
+        saved.flush()
+        connection.commit()
+        return result
+
+    def _calc_parallel(self, connection, partition, jobs):
+        values = [row[0] for row in connection.get_cursor().execute(PARTITION_QUERIES[partition])]
+        groups_number = jobs * PARTITIONS_PER_JOB
+        extra = {key: value for key, value in self.extra.items() if key != 'jobs'}
+        result = self._create_visitor()
+        with ProcessPoolExecutor(jobs) as executor:
+            futures = [executor.submit(_calc_partitions, type(self), connection.db_dir, self.filters, extra,
+                                       partition, values[i::groups_number]) for i in range(groups_number)]
+            for future in futures:
+                result.merge(future.result())
+        return result
+
+    def _project(self, columns, table):
+        if self.fields is None:
+            return columns
+        projected = []
+        for column in columns.split(', '):
+            name = column if '.' in column else table + '.' + column
+            projected.append(column if name in self.fields or name in self.key_fields else 'NULL')
+        return ', '.join(projected)
+
+    def _needs_runs(self):
+        return self.fields is None or any(field.startswith(('Runs.', 'Cases.')) for field in self.fields)
+
+    def _create_query(self, with_runs=False):
+        if with_runs:
+            query = 'SELECT {} FROM Submits JOIN Problems ON Submits.problem_ref=Problems.id JOIN Contests ON Problems.contest_ref = CONTESTS.id JOIN Runs ON Runs.submit_ref = Submits.id'.format(self._project(dao.RunsDAO.joined_columns, 'Runs'))
+            if self.fields is None or 'Cases.case_id' in self.fields:
+                query += ' LEFT JOIN Cases ON Runs.case_ref = Cases.id'
+        else:
+            query = 'SELECT {}, Contests.scoring, Contests.contest_id, Problems.problem_id FROM Submits JOIN Problems ON Submits.problem_ref=Problems.id JOIN Contests ON Problems.contest_ref = CONTESTS.id'.format(self._project(dao.SubmitsDAO.columns, 'Submits'))
+        cond, vals = compile_filters(self.filters, PROBLEM_FILTERS + SUBMIT_FILTERS)
         if cond:
-            query += ' WHERE ' + ' AND '.join(i[0] for i in cond)
-        return (query, [i[1] for i in cond])
+            query += ' WHERE ' + ' AND '.join(cond)
+        return (query, vals)
 
     def _create_visitor(self):
         return None
 
     def get_input_data(self, connection):
-        cursor = connection.get_cursor()
+        # Submits and their runs are read by two queries in the same order and merged on the fly,
+        # plain tuples are much faster to create than rows. Columns are collected problem by problem
+        order = ' ORDER BY Submits.problem_ref, Submits.id' if self.columnar else ' ORDER BY Submits.id'
+        submits_cursor, runs_cursor = connection.get_cursor(), connection.get_cursor()
+        submits_cursor.row_factory = runs_cursor.row_factory = None
         query, vals = self._create_query()
-        sdao = dao.SubmitsDAO(connection)
-        for submit_row in cursor.execute(query, vals):
-            yield sdao.deep_load(submit_row, tuple(submit_row)[-2:], tuple(submit_row)[-3])
+        submits_rows = submits_cursor.execute(query + order, vals)
+        if self._needs_runs():
+            query, vals = self._create_query(with_runs=True)
+            runs_rows = runs_cursor.execute(query + order + ', Runs.case_ref, Runs.id', vals)
+        else:
+            runs_rows = []
+        if self.columnar:
+            return dao.RunsColumns.load_all(submits_rows, runs_rows)
+        return dao.SubmitsDAO.load_with_runs(submits_rows, runs_rows)
 
-    def calc(self, data):
-        vis = self._create_visitor()
+    def _visit_all(self, vis, data):
         visited = False
         for submit in data:
-            vis.visit(submit)
+            if self.columnar:
+                vis.visit_columns(submit)
+            else:
+                vis.visit(submit)
             visited = True
-        if not visited:
+        return visited
+
+    def calc(self, data):
+        vis = self._create_visitor()
+        if not self._visit_all(vis, data):
             logging.info('no submits processed')
         self.result = vis
 
@@ -72,18 +245,12 @@ class ProblemStatistics(Statistics):
 
     counter_class = None
 
-    def _create_query(self):
-        query = 'SELECT {}, Contests.contest_id FROM Problems JOIN Contests ON Problems.contest_ref = Contests.id'.format(dao.ProblemsDAO.columns)
-        cond = []
-        if 'scoring' in self.filters:
-            cond.append(('Contests.scoring = ?', self.filters['scoring']))
-        if 'contest' in self.filters:
-            cond.append(('Contests.contest_id = ?', self.filters['contest']))
-        if 'problem' in self.filters:
-            cond.append(('Problems.problem_id = ?', self.filters['problem']))
+    def _create_query(self, columns=None, joins='', joins_vals=()):
+        query = 'SELECT {} FROM Problems JOIN Contests ON Problems.contest_ref = Contests.id'.format(columns or dao.ProblemsDAO.columns + ', Contests.contest_id') + joins
+        cond, vals = compile_filters(self.filters, PROBLEM_FILTERS)
         if cond:
-            query += ' WHERE ' + ' AND '.join(i[0] for i in cond)
-        return (query, [i[1] for i in cond])
+            query += ' WHERE ' + ' AND '.join(cond)
+        return (query, list(joins_vals) + vals)
 
     def get_input_data(self, connection):
         cursor = connection.get_cursor()
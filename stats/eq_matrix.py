@@ -2,36 +2,108 @@ from copy import deepcopy
 
 from visitor import Visitor
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+BATCH_SIZE = 4096
+
+
+def _popcount(value):
+    return value.bit_count()
+
+
+if not hasattr(int, 'bit_count'):
+    def _popcount(value):
+        return bin(value).count('1')
+
 
 class EqMatrix(Visitor):
+    """Counts for each pair of cases the submits in which both cases passed or both failed.
+
+    Outcomes of a batch of submits are packed into a passed and a failed bitset per case, so the counts of
+    a pair are popcounts of the bitsets intersections instead of a loop over the submits. With numpy the
+    counts of all pairs are P * P^T + F * F^T of the passed and failed 0/1 matrices.
+    """
+
     def __init__(self):
         super().__init__()
         self.result = []
         self.runs_num = 0
+        self.passed = []  # case -> b'0'/b'1' for each submit of the batch
+        self.failed = []
+        self.batch_len = 0
 
-    def visit(self, submit):
-        case_amount = len(submit.runs)  # amount of cases in this submit
+    @property
+    def result(self):
+        if self.batch_len:
+            self._flush()
+        return self._result
+
+    @result.setter
+    def result(self, value):
+        self._result = value
 
+    def visit(self, submit):
         self.runs_num += len(submit.runs)  # for same_runs.py
+        self._add_outcomes([run.outcome for run in submit.runs])
+
+    def visit_columns(self, columns):
+        self.runs_num += len(columns.runs_outcomes)
+        offsets, outcomes = columns.offsets, columns.runs_outcomes
+        for i in range(len(columns)):
+            self._add_outcomes(outcomes[offsets[i]:offsets[i + 1]])
+
+    def merge(self, other):
+        result, other_result = self.result, other.result
+        for row in result:
+            row.extend([0] * (len(other_result) - len(row)))
+        result.extend([[0] * len(other_result) for i in range(len(other_result) - len(result))])
+        for i, row in enumerate(other_result):
+            for j, count in enumerate(row):
+                result[i][j] += count
+        self.runs_num += other.runs_num
+
+    def _add_outcomes(self, outcomes):
+        while len(self.passed) < len(outcomes):
+            self.passed.append(bytearray(b'0' * BATCH_SIZE))
+            self.failed.append(bytearray(b'0' * BATCH_SIZE))
+        submit = self.batch_len
+        for case, outcome in enumerate(outcomes):
+            (self.passed if outcome == 'OK' else self.failed)[case][submit] = ord('1')
+        self.batch_len += 1
+        if self.batch_len == BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        cases = len(self.passed)
+        for row in self._result:
+            row.extend([0] * (cases - len(self._result)))
+        self._result.extend([[0] * cases for i in range(cases - len(self._result))])
+
+        if numpy is not None:
+            # Counts are at most BATCH_SIZE, so they are exact in float64 which has fast matrix products
+            passed, failed = ((numpy.frombuffer(b''.join(bytes(bits[:self.batch_len]) for bits in bitsets), numpy.uint8)
+                               .reshape(cases, self.batch_len) == ord('1')).astype(numpy.float64)
+                              for bitsets in (self.passed, self.failed))
+            counts = (passed @ passed.T + failed @ failed.T).astype(numpy.int64).tolist()
+            for row, counts_row in zip(self._result, counts):
+                for j, count in enumerate(counts_row):
+                    row[j] += count
+        else:
+            passed = [int(bits[:self.batch_len], 2) for bits in self.passed]
+            failed = [int(bits[:self.batch_len], 2) for bits in self.failed]
+            for i in range(cases):
+                for j in range(i, cases):
+                    count = _popcount(passed[i] & passed[j]) + _popcount(failed[i] & failed[j])
+                    self._result[i][j] += count
+                    if i != j:
+                        self._result[j][i] += count
 
-        if case_amount > len(self.result):  # extending matrix in case we found more cases
-            for i in range(len(self.result)):
-                self.result[i].extend([0] * (case_amount - len(self.result)))
-            self.result.extend([[0] * case_amount for i in range(case_amount - len(self.result))])
-
-        for i in range(case_amount):
-            for j in range(case_amount):
-                comp_list = []  # this is needed in order to unite "WA", "ML" etc
-                if submit.runs[i].outcome == "OK":
-                    comp_list.append(1)
-                else:
-                    comp_list.append(0)
-                if submit.runs[j].outcome == "OK":
-                    comp_list.append(1)
-                else:
-                    comp_list.append(0)
-                if comp_list[0] == comp_list[1]:
-                    self.result[i][j] += 1
+        self.passed, self.failed = [], []
+        self.batch_len = 0
 
     def pretty_print(self):
         print_data = ""
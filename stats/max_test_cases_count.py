@@ -8,6 +8,9 @@ class MaxTestCasesCount(Visitor):
     def visit(self, submit):
         self.result = max(self.result, len(submit.runs))
 
+    def merge(self, other):
+        self.result = max(self.result, other.result)
+
     def get_stat_data(self):
         return self.result
 
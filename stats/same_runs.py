@@ -91,6 +91,17 @@ class SameRuns(Visitor):
                 self.times[run.case_id][0] += 1
                 self.times[run.case_id][1] += int(run.time)
 
+    def merge(self, other):
+        if other.submit_number:
+            self.problem_id = other.problem_id
+        self.cases = max(self.cases, other.cases)
+        self.submit_number += other.submit_number
+        self.time += other.time
+        for case_id, (submits_number, time) in other.times.items():
+            times = self.times.setdefault(case_id, [0, 0])
+            times[0] += submits_number
+            times[1] += time
+
     def calc(self):
         pass
 
@@ -101,7 +112,7 @@ class SameRuns(Visitor):
         for component in self.connected_components:
             mn = float('Inf')
             sm = 0
-            for run in component:
+            for run in sorted(component, key=int):  # the same boss however the set was built
                 sm += self.times[run][1]
                 if mn > self.times[run][1] / self.times[run][0]:
                     mn = self.times[run][1] / self.times[run][0]
@@ -149,10 +160,11 @@ class SameRuns(Visitor):
 class SameRunsKirov(SameRuns):
     def __init__(self):
         super().__init__()
+        self.dropped = {}  # case missing in a submit -> its component before that submit, needed by merge
 
     def visit(self, submit):
         if (self.submit_number == 0):
-            self.connected_components.append(run.case_id for run in submit.runs)
+            self.connected_components.append(set(run.case_id for run in submit.runs))
 
         self.pre_visit(submit)
         temp_connected_components = []
@@ -165,6 +177,8 @@ class SameRunsKirov(SameRuns):
                         first.add(submit.runs[i].case_id)
                     else:
                         second.add(submit.runs[i].case_id)
+            for case_id in component - first - second:
+                self.dropped[case_id] = component
 
             if len(first) == 1:
                 self.strong_runs.add(list(first)[0])
@@ -176,6 +190,42 @@ class SameRunsKirov(SameRuns):
                 temp_connected_components.append(second)
         self.connected_components = temp_connected_components
 
+    def merge(self, other):
+        # Other's submits split each component of self the same way they split other's components: the case
+        # stays with the cases of the intersection, or is dropped when its intersection has another case.
+        if not other.submit_number:
+            return
+        if not self.submit_number:
+            self.connected_components = [set(component) for component in other.connected_components]
+            self.strong_runs = set(other.strong_runs)
+            self.dropped = dict(other.dropped)
+            super().merge(other)
+            return
+        their_components = {case_id: component for component in other.connected_components
+                            for case_id in component}
+        components = []
+        for own in self.connected_components:
+            parts = {}  # id of other's component -> part of own
+            for case_id in own:
+                if case_id in other.strong_runs:
+                    self.strong_runs.add(case_id)
+                elif case_id in their_components:
+                    parts.setdefault(id(their_components[case_id]), set()).add(case_id)
+                else:
+                    # dropped by other's first submit or with the cases of other.dropped[case_id]
+                    common = own & other.dropped[case_id] if case_id in other.dropped else own
+                    if len(common) == 1:
+                        self.strong_runs.add(case_id)
+                    else:
+                        self.dropped[case_id] = common
+            for part in parts.values():
+                if len(part) == 1:
+                    self.strong_runs |= part
+                else:
+                    components.append(part)
+        self.connected_components = components
+        super().merge(other)
+
     def pretty_print(self):
         return self.pretty()
 
@@ -200,6 +250,12 @@ class SameRunsACM(SameRuns):
             self.mx = len(submit.runs)
             self.runs = [x.case_id for x in submit.runs]
 
+    def merge(self, other):
+        super().merge(other)
+        self.base |= other.base
+        if other.mx > self.mx:
+            self.mx, self.runs = other.mx, other.runs
+
     def calc(self):
         self.connected_components = []
         self.strong_runs = set()
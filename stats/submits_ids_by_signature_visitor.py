@@ -21,6 +21,23 @@ class SubmitsIdsBySignatureVisitor(Visitor):
             else:
                 self.result[submit.runs_results][1].append(submit.submit_id)
 
+    def merge(self, other):
+        for signature, (count, samples) in other.result.items():
+            if signature not in self.result:
+                self.result[signature] = [count, list(samples)]
+                continue
+            own_count, own_samples = self.result[signature]
+            # Each sample of the merged list is taken from a part with probability proportional to its submits
+            own_samples, samples = own_samples[:], samples[:]
+            random.shuffle(own_samples)
+            random.shuffle(samples)
+            merged = []
+            while (own_samples or samples) and len(merged) <= self.sample_count:
+                if not samples or own_samples and random.randint(1, own_count + count) <= own_count:
+                    merged.append(own_samples.pop())
+                else:
+                    merged.append(samples.pop())
+            self.result[signature] = [own_count + count, merged]
 
     def get_stat_data(self):
         for arr in self.result.values():
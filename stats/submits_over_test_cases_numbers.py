@@ -13,6 +13,19 @@ class SubmitsOverTestCasesNumbers(Visitor):
         else:
             self.result[submit.problem_id] = {runs_number: 1}
 
+    def visit_columns(self, columns):
+        result = self.result.setdefault(columns.problem_id, {})
+        for runs_number in columns.runs_numbers():
+            result[runs_number] = result.get(runs_number, 0) + 1
+        if not result:
+            del self.result[columns.problem_id]
+
+    def merge(self, other):
+        for problem_id, numbers in other.result.items():
+            result = self.result.setdefault(problem_id, {})
+            for runs_number, submits_number in numbers.items():
+                result[runs_number] = result.get(runs_number, 0) + submits_number
+
     def get_stat_data(self):
         return self.result
 
@@ -0,0 +1,97 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import dao
+from db_submits_filler import BulkSubmitsFiller
+from model import Submit, Run
+from pesto_testcase import create_test_database
+from sqlite_connector import SQLiteConnector
+from statistics import SubmitStatistics
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reports peak memory of loading all submits with their runs, '
+                                                 'compared with submits and runs having __dict__')
+    parser.add_argument('--database', help='take submits from the database instead of generating them')
+    parser.add_argument('--submits', help='number of generated submits', type=int, default=20000)
+    parser.add_argument('--runs', help='maximal number of runs of a generated submit', type=int, default=30)
+    parser.add_argument('--seed', help='seed of generated submits', type=int, default=0)
+    return vars(parser.parse_args())
+
+
+class LoadSubmits(SubmitStatistics):
+
+    _name = 'load_submits'
+
+    def calc(self, data):
+        self.result = list(data)
+
+
+class DictSubmit:
+    # Submit as it was before __slots__, runs_results is joined at once
+
+    __init__ = Submit.__init__
+
+    def count_results(self):
+        self.runs_results = ''.join([str(run.outcome) for run in self.runs])
+
+
+class DictRun:
+    __init__ = Run.__init__
+
+
+def generate_database(filename, count, max_runs, seed):
+    generator = random.Random(seed)
+    connection = create_test_database()
+    filler = BulkSubmitsFiller(connection.cursor())
+    for submit_id in range(count):
+        problem_id = (str(submit_id % 50 + 1), 'ABCDE'[submit_id % 5])
+        runs = [Run(problem_id, submit_id, case_id + 1, '0.1', str(generator.randrange(1000)),
+                    'OK' if generator.random() < 0.8 else 'WA') for case_id in range(generator.randint(1, max_runs))]
+        filler.fill_db_from_submit(Submit(submit_id, problem_id, str(submit_id % 300), '1', runs, runs[-1].outcome,
+                                          'ACM', submit_id), 'origin')
+    filler.flush()
+    disk = sqlite3.connect(filename)
+    connection.backup(disk)
+    disk.close()
+
+
+def measure(connection):
+    tracemalloc.start()
+    start = time.time()
+    submits = LoadSubmits(connection).result
+    spent = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(submits), sum(len(submit.runs) for submit in submits), peak, spent
+
+
+def main():
+    args = parse_args()
+    filename = args['database']
+    if not filename:
+        fd, filename = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        generate_database(filename, args['submits'], args['runs'], args['seed'])
+    connection = SQLiteConnector()
+    connection.create_connection(filename, read_only=True)
+    try:
+        for name, submit_class, run_class in [('slots', Submit, Run), ('dict', DictSubmit, DictRun)]:
+            dao.Submit, dao.Run = submit_class, run_class
+            submits, runs, peak, spent = measure(connection)
+            print('{}: {} submits, {} runs, peak {:.1f} MB in {:.2f}s'.format(
+                name, submits, runs, peak / 2 ** 20, spent))
+    finally:
+        dao.Submit, dao.Run = Submit, Run
+        connection.close_connection()
+        if not args['database']:
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    main()
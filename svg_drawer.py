@@ -0,0 +1,52 @@
+from os import path
+from xml.sax.saxutils import escape, quoteattr
+
+
+def _color(color):
+    return 'rgb({},{},{})'.format(*color) if isinstance(color, tuple) else color
+
+
+def _number(value):
+    return '{:g}'.format(value)
+
+
+class SvgImage:
+    """drawer.Image writing the elements to an SVG file one by one as they are drawn."""
+
+    def __init__(self, file, img_size, background_color):
+        self.file = file
+        self.file.write('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" height="{1}" '
+                        'viewBox="0 0 {0} {1}">\n'.format(*img_size))
+        self.file.write('<rect width="100%" height="100%" fill={}/>\n'.format(quoteattr(_color(background_color))))
+
+    def draw_line(self, begin, end, line_thickness, line_color):
+        self.draw_line_strip([begin, end], line_thickness, line_color)
+
+    def draw_circle(self, center, radius, border_thickness, border_color, circle_color):
+        self.file.write('<circle cx="{}" cy="{}" r="{}" fill={} stroke={} stroke-width="{}"/>\n'.format(
+            _number(center[0]), _number(center[1]), _number(radius), quoteattr(_color(circle_color)),
+            quoteattr(_color(border_color)), _number(border_thickness)))
+
+    def draw_line_strip(self, points, line_thickness, line_color):
+        if len(points) < 2:
+            return
+        self.file.write('<polyline points="{}" fill="none" stroke={} stroke-width="{}"/>\n'.format(
+            ' '.join('{},{}'.format(_number(x), _number(y)) for x, y in points),
+            quoteattr(_color(line_color)), _number(line_thickness)))
+
+    # begin is a tuple (x0, y0), size is a tuple (size_x, size_y)
+    def draw_rectangle(self, begin, size, border_thickness, border_color, rectangle_color):
+        self.file.write('<rect x="{}" y="{}" width="{}" height="{}" fill={} stroke={} stroke-width="{}"/>\n'.format(
+            _number(begin[0]), _number(begin[1]), _number(size[0]), _number(size[1]),
+            quoteattr(_color(rectangle_color)), quoteattr(_color(border_color)), _number(border_thickness)))
+
+    def draw_text(self, text, begin, font, size, color, align="left"):
+        # The font is named by its file, a text is centered vertically like in drawer.Image
+        self.file.write('<text x="{}" y="{}" font-family={} font-size="{}" fill={} text-anchor="{}" '
+                        'dominant-baseline="central">{}</text>\n'.format(
+                            _number(begin[0]), _number(begin[1]), quoteattr(path.splitext(path.basename(font))[0]),
+                            _number(size), quoteattr(_color(color)), 'start' if align == 'left' else 'middle',
+                            escape(text)))
+
+    def close(self):
+        self.file.write('</svg>\n')
@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import Mock
+
+from cases_index import CasesIndex, MinHashIndex, overlaps_with_previous
+
+
+class TestCasesIndex(unittest.TestCase):
+    def test_overlaps(self):
+        index = CasesIndex()
+        index.add(['a', 'b', 'c'])
+        index.add(['b', 'b', 'd'])
+        index.add([])
+        self.assertEqual(index.size, 3)
+        self.assertEqual(index.postings['b'], [0, 1])
+        self.assertEqual(index.overlaps(['b', 'c', 'b', 'e']), {0: 3, 1: 2})
+        self.assertEqual(index.overlaps(['e']), {})
+
+    def test_signature(self):
+        index = MinHashIndex(4, 2)
+        signature = index.signature(['a', 'b', 'c', 'b'])
+        self.assertEqual(len(signature), 8)
+        self.assertEqual(index.signature(['c', 'b', 'a']), signature)
+        self.assertNotEqual(MinHashIndex(4, 2, seed=1).signature(['a', 'b', 'c']), signature)
+        self.assertIsNone(index.signature([]))
+
+    def test_min_hash_overlaps(self):
+        index = MinHashIndex(8, 2)
+        index.add(['a', 'b', 'c', 'd'])
+        index.add([])
+        index.add(['x', 'y', 'z'])
+        index.add(['a', 'b', 'c', 'e'])
+        self.assertEqual(index.size, 4)
+        self.assertEqual(index.overlaps(['a', 'b', 'c', 'd', 'a']), {0: 5, 3: 4})
+        self.assertEqual(index.overlaps(['q']), {})
+        self.assertEqual(index.overlaps([]), {})
+
+    def test_overlaps_with_previous(self):
+        problems = [Mock(cases=['a', 'b']), Mock(cases=['c']), Mock(cases=['b', 'c', 'b'])]
+        self.assertEqual(list(overlaps_with_previous(problems)), [{}, {}, {0: 2, 1: 1}])
+        self.assertEqual(list(overlaps_with_previous(problems, distinct=True)), [{}, {}, {0: 1, 1: 1}])
+        problems.append(Mock(cases=['a', 'b', 'a']))
+        self.assertEqual(list(overlaps_with_previous(problems, approximate=(16, 1)))[-1], {0: 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import Mock, call, patch
 
-from dao import UsersDAO, ContestsDAO, ProblemsDAO, SubmitsDAO, CasesDAO, RunsDAO
+from dao import UsersDAO, ContestsDAO, ProblemsDAO, SubmitsDAO, CasesDAO, RunsDAO, RunsColumns
 import dao
 import model
 
@@ -321,6 +321,23 @@ class SubmitsDAOTest(unittest.TestCase):
         self.assertEqual(res.runs, [1, 2])
         self.assertEqual(res.mock_calls, [call.count_results()])
 
+    def test_load_with_runs(self):
+        submits_rows = [(1, 's1', 'l1', 10, 100, 'OK', 't1', 'acm', 'c', 'A'),
+                        (2, 's2', 'l2', 10, 101, 'CE', 't2', 'acm', 'c', 'A'),
+                        (3, 's3', 'l1', 11, 100, 'WA', 't3', 'kirov', 'c', 'B')]
+        runs_rows = [(1, 5, '0.1', '0.2', 'OK', 1), (1, 6, '0.3', '0.4', 'OK', 2), (3, 7, '0.5', '0.6', 'WA', 1)]
+        submits = list(SubmitsDAO.load_with_runs(submits_rows, runs_rows))
+        self.assertEqual([(s.submit_id, s.problem_id, s.lang_id, s.problem_ref, s.user_ref, s.outcome, s.scoring,
+                           s.timestamp) for s in submits],
+                         [('s1', ('c', 'A'), 'l1', 10, 100, 'OK', 'acm', 't1'),
+                          ('s2', ('c', 'A'), 'l2', 10, 101, 'CE', 'acm', 't2'),
+                          ('s3', ('c', 'B'), 'l1', 11, 100, 'WA', 'kirov', 't3')])
+        self.assertEqual([[(r.submit_ref, r.case_ref, r.case_id, r.real_time, r.time, r.outcome) for r in s.runs]
+                          for s in submits],
+                         [[(1, 5, 1, '0.1', '0.2', 'OK'), (1, 6, 2, '0.3', '0.4', 'OK')], [],
+                          [(3, 7, 1, '0.5', '0.6', 'WA')]])
+        self.assertEqual(submits[0].runs_results, 'OKOK')
+
     def test_define(self):
         self.dao.lookup = Mock(side_effect=[None, 2])
         self.dao.create = Mock(return_value=1)
@@ -466,6 +483,49 @@ class RunsDAOTest(unittest.TestCase):
         self.assertEqual(self.cursor.mock_calls, calls)
 
 
+class RunsColumnsTest(unittest.TestCase):
+    def setUp(self):
+        self.submits_rows = [(1, 's1', 'l1', 10, 100, 'OK', 't1', 'acm', 'c', 'A'),
+                             (2, 's2', 'l2', 10, 101, 'CE', 't2', 'acm', 'c', 'A'),
+                             (3, 's3', 'l1', 11, 100, 'WA', 't3', 'kirov', 'c', 'B')]
+        runs_rows = [(1, 5, '0.1', '0.2', 'OK', 1), (1, 6, '0.3', '0.4', 'OK', 2), (3, 7, '0.5', '0.6', 'WA', 1)]
+        self.columns = list(RunsColumns.load_all(self.submits_rows, runs_rows))
+
+    def test_load_all(self):
+        self.assertEqual([(c.problem_ref, c.problem_id, c.scoring) for c in self.columns],
+                         [(10, ('c', 'A'), 'acm'), (11, ('c', 'B'), 'kirov')])
+        first = self.columns[0]
+        self.assertEqual(len(first), 2)
+        self.assertEqual(first.submit_refs, [1, 2])
+        self.assertEqual(first.user_refs, [100, 101])
+        self.assertEqual(first.offsets, [0, 2, 2])
+        self.assertEqual(first.case_ids, [1, 2])
+        self.assertEqual(first.runs_outcomes, ['OK', 'OK'])
+        self.assertEqual(first.runs_numbers(), [2, 0])
+        self.assertEqual(self.columns[1].runs_numbers(), [1])
+
+    def test_load_all_streams(self):
+        read = []
+
+        def submits_rows():
+            for row in self.submits_rows:
+                read.append(row[0])
+                yield row
+        columns = RunsColumns.load_all(submits_rows(), [])
+        self.assertEqual(next(columns).submit_refs, [1, 2])
+        self.assertEqual(read, [1, 2, 3])
+        self.assertEqual(next(columns).submit_refs, [3])
+        self.assertIsNone(next(columns, None))
+        self.assertEqual(list(RunsColumns.load_all([], [])), [])
+
+    def test_submits(self):
+        submits = list(self.columns[0].submits())
+        self.assertEqual([(s.submit_id, s.problem_id, s.user_ref, s.outcome) for s in submits],
+                         [('s1', ('c', 'A'), 100, 'OK'), ('s2', ('c', 'A'), 101, 'CE')])
+        self.assertEqual([(r.submit_ref, r.case_ref, r.case_id, r.time) for r in submits[0].runs],
+                         [(1, 5, 1, '0.2'), (1, 6, 2, '0.4')])
+        self.assertEqual(submits[1].runs, [])
+
 
 if __name__ == "__main__":
     unittest.main()
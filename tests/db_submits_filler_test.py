@@ -2,7 +2,9 @@ import unittest
 
 from unittest.mock import Mock, call
 
-from db_submits_filler import DBSubmitsFiller
+from db_submits_filler import DBSubmitsFiller, BulkSubmitsFiller
+from model import Submit, Run
+from pesto_testcase import create_test_database
 
 
 class TestDBSubmitsFiller(unittest.TestCase):
@@ -88,5 +90,61 @@ class TestDBSubmitsFiller(unittest.TestCase):
         self.assertEqual(self.filler.db_cur.mock_calls, [call.execute(*params)])
 
 
+def dump_database(connection):
+    result = dict()
+    for table in ['Contests', 'Users', 'Problems', 'Submits', 'Cases', 'Runs', 'sqlite_sequence']:
+        result[table] = sorted(map(tuple, connection.execute('SELECT * FROM {}'.format(table))), key=str)
+    return result
+
+
+def make_submit(contest_id, problem_id, submit_id, user_id, outcomes, scoring='ACM'):
+    runs = [Run((contest_id, problem_id), submit_id, i + 1, '1' + str(i), str(i), outcome)
+            for i, outcome in enumerate(outcomes)]
+    return Submit(submit_id, (contest_id, problem_id), user_id, 2, runs, outcomes[-1], scoring, '2016-07-01 10:00:00')
+
+
+class TestBulkSubmitsFiller(unittest.TestCase):
+    def setUp(self):
+        self.submits = [make_submit('1', 1, '10', 5, ['OK', 'OK', 'WA']),
+                        make_submit('1', 1, '11', 6, ['OK', 'TL']),
+                        make_submit('1', 2, '12', 5, ['OK', 'OK', 'OK', 'OK']),
+                        make_submit('2', 1, '10', 5, ['WA'], 'kirov'),
+                        make_submit('1', 1, '10', 7, ['OK', 'OK', 'OK', 'OK']),
+                        make_submit('1', 1, '13', 6, ['RT', 'OK', 'OK']),
+                        make_submit('1', 1, '11', 6, ['OK', 'OK'])]
+
+    def fill(self, filler, submits):
+        for submit in submits:
+            filler.fill_db_from_submit(submit, 'origin')
+        filler.flush()
+
+    def test_same_as_row_by_row(self):
+        for batch_size in [1, 2, 3, 100]:
+            expected, actual = create_test_database(), create_test_database()
+            self.fill(DBSubmitsFiller(expected.cursor()), self.submits)
+            self.fill(BulkSubmitsFiller(actual.cursor(), batch_size), self.submits)
+            self.assertEqual(dump_database(actual), dump_database(expected))
+
+    def test_refill(self):
+        expected, actual = create_test_database(), create_test_database()
+        self.fill(DBSubmitsFiller(expected.cursor()), self.submits[:4])
+        self.fill(DBSubmitsFiller(actual.cursor()), self.submits[:4])
+        self.fill(DBSubmitsFiller(expected.cursor()), self.submits)
+        self.fill(BulkSubmitsFiller(actual.cursor(), 3), self.submits)
+        self.assertEqual(dump_database(actual), dump_database(expected))
+
+    def test_batches(self):
+        filler = BulkSubmitsFiller(Mock(), 2)
+        filler.flush = Mock(side_effect=filler._clear_buffers)
+        filler.cached_define_ref = Mock(side_effect=[1, 2, 3] * 3)
+        filler._get_problem_submits = Mock(return_value=dict())
+        filler._get_problem_cases = Mock(return_value=dict())
+        filler._allocate_id = Mock(side_effect=range(100))
+        for submit in self.submits[:3]:
+            filler.fill_db_from_submit(submit, 'origin')
+        filler.flush.assert_called_once_with()
+        self.assertEqual(filler.db_cur.execute.mock_calls, [])
+
+
 if __name__ == "__main__":
     unittest.main()
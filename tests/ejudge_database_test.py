@@ -35,6 +35,41 @@ class TestEjudgeDatabase(unittest.TestCase):
         self.assertIsNone(info)
         self.assertTrue(warn.called)
 
+    @patch('ejudge_database.PREFETCH_CHUNK_SIZE', 2)
+    def test_prefetch_contest(self):
+        rows = [[(5, '1', '2', '3', 4), (6, '7', '8', '9', 10)], [(11, '1', '12', '3', 13)], []]
+        db = EjudgeDatabase(Mock(fetchmany=Mock(side_effect=rows)))
+        db.prefetch_contest('ci')
+        db.db_cursor.execute.assert_called_once_with('SELECT run_id,prob_id,user_id,lang_id,create_time '
+                                                     'FROM ejudge.runs WHERE contest_id=%(contest)s',
+                                                     {'contest': 'ci'})
+        info = db.get_submit_info('ci', '6')
+        self.assertEqual((info.problem_id, info.user_id, info.lang_id, info.timestamp), ('7', '8', '9', 10))
+        info = db.get_submit_info('ci', '11')
+        self.assertEqual((info.problem_id, info.user_id, info.lang_id, info.timestamp), ('1', '12', '3', 13))
+        self.assertEqual(db.db_cursor.execute.call_count, 1)
+        self.assertFalse(db.db_cursor.fetchone.called)
+
+    @patch('logging.warning')
+    def test_prefetch_misses(self, warn):
+        db = EjudgeDatabase(Mock(fetchmany=Mock(side_effect=[[(5, '1', '2', '3', 4)], []])))
+        db.prefetch_contest('ci')
+        self.assertIsNone(db.get_submit_info('ci', '6'))
+        self.assertIsNone(db.get_submit_info('ci', '7'))
+        self.assertFalse(warn.called)
+        db.report_misses('ci')
+        warn.assert_called_once_with('2 submits from contest ci not found in database: 6, 7')
+        db.report_misses('ci')
+        self.assertEqual(warn.call_count, 1)
+
+    def test_prefetch_other_contest(self):
+        db = EjudgeDatabase(Mock(fetchmany=Mock(side_effect=[[(5, '1', '2', '3', 4)], []]),
+                                 fetchone=Mock(return_value=['7', '8', '9', 10])))
+        db.prefetch_contest('ci')
+        info = db.get_submit_info('other', '5')
+        self.assertEqual(info.problem_id, '7')
+        self.assertEqual(db.db_cursor.execute.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
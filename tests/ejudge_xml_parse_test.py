@@ -1,4 +1,7 @@
+import gzip
+import io
 import unittest
+from unittest.mock import patch
 
 from ejudge_xml_parse import ejudge_xml_parse, EjudgeXmlParseResult
 
@@ -57,6 +60,30 @@ class TestEjudgeXmlParse(unittest.TestCase):
         file.close()
         self.assertEqual(res, None)
 
+    def test_gzip(self):
+        with open('testdata/xml/normal.xml', 'rb') as file:
+            data = gzip.compress(file.read())
+        res = ejudge_xml_parse(gzip.GzipFile(fileobj=io.BytesIO(data)))
+        self.assertEqual(res.submit_id, '15')
+        self.assertEqual(len(res.run_outcomes), 4)
+
+    @patch('ejudge_xml_parse.READ_CHUNK_SIZE', 3)
+    def test_small_chunks(self):
+        data = ('Content-type: text/xml\n\n<?xml version="1.0" encoding="utf-8"?>\n'
+                '<testing-report run-id="7" status="WA" scoring="ACM"><!-- Пук -->'
+                '<test time="1" status="OK"/><test time="2" real-time="3" status="WA"/></testing-report>\n')
+        res = ejudge_xml_parse(io.BytesIO(data.encode()))
+        self.assertEqual((res.submit_id, res.submit_outcome, res.scoring), ('7', 'WA', 'ACM'))
+        self.assertEqual(res.run_outcomes, [('1', '1', 'OK'), ('3', '2', 'WA')])
+
+    def test_truncated(self):
+        data = ('Content-type: text/xml\n\n<?xml version="1.0" encoding="utf-8"?>\n'
+                '<testing-report run-id="7" status="WA" scoring="ACM"><test time="1" status="OK"/>')
+        self.assertIsNone(ejudge_xml_parse(io.StringIO(data)))
+
+    def test_header_only(self):
+        self.assertIsNone(ejudge_xml_parse(io.BytesIO(b'Content-type: text/xml\n\n')))
+
 
 if __name__ == '__main__':
     unittest.main()
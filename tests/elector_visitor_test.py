@@ -60,6 +60,23 @@ class TestElectorVisitor(unittest.TestCase):
         self.elector.visitor = Mock(get_stat_data=Mock(return_value=42))
         self.assertEqual(self.elector.get_stat_data(), 42)
 
+    def test_merge(self):
+        other = self.elector.empty()
+        self.assertEqual((other.factory, other.key, other.visitor), (228, None, None))
+        self.elector.merge(other)
+        self.assertIsNone(self.elector.key)
+        visitor1, visitor2, visitor3 = Mock(), Mock(), Mock()
+        other.key, other.visitor = '15', visitor1
+        self.elector.merge(other)
+        self.assertEqual((self.elector.key, self.elector.visitor), ('15', visitor1))
+        other.key, other.visitor = '15', visitor2
+        self.elector.merge(other)
+        visitor1.merge.assert_called_once_with(visitor2)
+        other.key, other.visitor = '12', visitor3
+        self.elector.merge(other)
+        self.assertEqual((self.elector.key, self.elector.visitor), ('15', visitor1))
+        visitor1.merge.assert_called_once_with(visitor2)
+
 
 class TestElectorByMaxCases(unittest.TestCase):
     def test_key(self):
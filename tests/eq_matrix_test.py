@@ -1,8 +1,11 @@
 import unittest
+from unittest.mock import patch
 
+import stats.eq_matrix
 from stats.eq_matrix import EqMatrix
 from model import Submit
 from model import Run
+from dao import RunsColumns
 
 
 class PositiveTests(unittest.TestCase):
@@ -134,6 +137,62 @@ class PositiveTests(unittest.TestCase):
 
         self.assertEqual(self.matrix.get_stat_data(), sample)
 
+    @patch('stats.eq_matrix.BATCH_SIZE', 3)
+    def test_batches(self):
+        outcomes = [['OK', 'WA'], ['OK'], ['WA', 'WA', 'OK'], [], ['OK', 'OK', 'OK', 'WA'], ['TL', 'OK']]
+        for i, submit_outcomes in enumerate(outcomes):
+            runs = [Run(0, i, case, '100', '100', outcome) for case, outcome in enumerate(submit_outcomes)]
+            self.matrix.visit(Submit(i, (0, 0), 0, 0, runs, 0, 'ACM', 37))
+            if i == 2:
+                self.assertEqual(self.matrix.get_stat_data(), [[3, 1, 0], [1, 2, 0], [0, 0, 1]])
+        self.assertEqual(self.matrix.get_stat_data(), [[5, 2, 1, 0], [2, 4, 1, 0], [1, 1, 2, 0], [0, 0, 0, 1]])
+        self.assertEqual(self.matrix.runs_num, 12)
+
+    def test_merge(self):
+        outcomes = [['OK', 'WA'], ['OK'], ['WA', 'WA', 'OK'], [], ['OK', 'OK', 'OK', 'WA'], ['TL', 'OK']]
+        submits = [Submit(i, (0, 0), 0, 0, [Run(0, i, case, '100', '100', outcome)
+                                            for case, outcome in enumerate(submit_outcomes)], 0, 'ACM', 37)
+                   for i, submit_outcomes in enumerate(outcomes)]
+        first, second = self.matrix, self.matrix.empty()
+        for submit in submits[:3]:
+            first.visit(submit)
+        for submit in submits[3:]:
+            second.visit(submit)
+        first.merge(second)
+        whole = EqMatrix()
+        for submit in submits:
+            whole.visit(submit)
+        self.assertEqual(first.get_stat_data(), whole.get_stat_data())
+        self.assertEqual(first.pretty_print(), whole.pretty_print())
+        self.assertEqual(first.runs_num, 12)
+
+    def test_visit_columns(self):
+        columns = RunsColumns(1, (0, 0), 'ACM')
+        columns.submit_refs = [1, 2, 3]
+        columns.offsets = [0, 2, 3, 5]
+        columns.runs_outcomes = ['OK', 'WA', 'WA', 'OK', 'OK']
+        self.matrix.visit_columns(columns)
+        self.assertEqual(self.matrix.get_stat_data(), [[3, 1], [1, 2]])
+        self.assertEqual(self.matrix.runs_num, 5)
+
+    def test_bitsets_numpy(self):
+        outcomes = [['OK', 'WA', 'TL'], ['OK'], ['WA', 'WA', 'OK'], [], ['OK', 'OK', 'OK', 'WA'], ['TL', 'OK']] * 3
+        submits = [Submit(i, (0, 0), 0, 0, [Run(0, i, case, '100', '100', outcome)
+                                            for case, outcome in enumerate(submit_outcomes)], 0, 'ACM', 37)
+                   for i, submit_outcomes in enumerate(outcomes)]
+        with patch('stats.eq_matrix.BATCH_SIZE', 4), patch('stats.eq_matrix.numpy', None):
+            for submit in submits:
+                self.matrix.visit(submit)
+            bitsets_result = self.matrix.get_stat_data()
+        self.assertEqual(bitsets_result, [[15, 6, 3, 0], [6, 12, 6, 0], [3, 6, 9, 0], [0, 0, 0, 3]])
+        if stats.eq_matrix.numpy is None:
+            return
+        matrix = EqMatrix()
+        with patch('stats.eq_matrix.BATCH_SIZE', 4):
+            for submit in submits:
+                matrix.visit(submit)
+        self.assertEqual(matrix.get_stat_data(), bitsets_result)
+
 
 if __name__ == "__main__":
     unittest.main()
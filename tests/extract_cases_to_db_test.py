@@ -1,69 +1,97 @@
 import unittest
 from unittest.mock import Mock, patch
 
-from pesto_testcase import PestoTestCase
-from extract_cases_to_db import extract_cases_to_db
+from pesto_testcase import PestoTestCase, create_test_database
+from extract_cases_to_db import extract_cases_to_db, CasesHashesWriter
+
+
+def make_problem(contest_id, problem_id, cases, name='A', polygon_id='22'):
+    problem = Mock(problem_id=[contest_id, problem_id], polygon_id=polygon_id, cases=cases)
+    problem.name = name
+    return problem
 
 
 class ExtractCasesToDBTest(PestoTestCase):
-    def prepare_request(self, format_string, data_tuple):
-        return format_string.replace('?', '{}').format(*data_tuple)
+    def setUp(self):
+        self.connection = create_test_database()
+        self.cursor = self.connection.cursor()
+        self.cursor.executemany('INSERT INTO Contests (id, contest_id, origin) VALUES (?, ?, ?)',
+                                [(1, '000003', 'abacaba'), (2, '000003', 'other'), (3, '000005', 'abacaba'),
+                                 (4, '000003', 'abacaba')])
+        self.cursor.executemany('INSERT INTO Problems (id, contest_ref, problem_id, name) VALUES (?, ?, ?, ?)',
+                                [(1, 2, '4', 'old'), (2, 1, '4', 'old'), (3, 4, '4', 'old')])
+        self.cursor.executemany('INSERT INTO Cases (id, problem_ref, case_id) VALUES (?, ?, ?)',
+                                [(1, 2, 1), (2, 2, 2), (3, 2, 3), (4, 1, 1), (5, 3, 1)])
 
-    @patch('builtins.print')
-    def test_common(self, pr):
-        cursor = Mock()
-        cursor.execute.return_value.fetchone = Mock(side_effect=[(1,), (1,), (2,)])
-        cursor.execute.return_value.fetchall.return_value.__len__ = Mock(return_value=1)
-        problem = Mock(problem_id=['3', '4'], polygon_id='22', cases=['qwer', 'asdf', 'zxcv'])
-        problem.name = 'A'
-        # problem_generator = Mock(return_value=problem)
-        with unittest.mock.patch('extract_cases_to_db.problem_generator', return_value=[problem]):
-            extract_cases_to_db(None, cursor, 'abacaba')
-        resulting_requests = []
-        for one_call in cursor.execute.call_args_list[1:]:
-            format_string, data_tuple = tuple(one_call)[0]
-            resulting_requests.append(self.prepare_request(format_string, data_tuple))
-        good_requests = ['SELECT id FROM Contests WHERE origin = abacaba AND contest_id = 000003',
-                         'SELECT id FROM Problems WHERE contest_ref = 1 AND problem_id = 4',
-                         'UPDATE Problems SET name = A, polygon_id = 22 WHERE contest_ref = 1 AND problem_id = 4',
-                         'SELECT id FROM Problems WHERE contest_ref = 1 AND problem_id = 4',
-                         'UPDATE Cases SET io_hash = qwer WHERE problem_ref = 2 AND case_id = 1',
-                         'UPDATE Cases SET io_hash = asdf WHERE problem_ref = 2 AND case_id = 2',
-                         'UPDATE Cases SET io_hash = zxcv WHERE problem_ref = 2 AND case_id = 3']
-        self.maxDiff = None
-        self.assertEqual(resulting_requests, good_requests)
-
-    @patch('builtins.print')
-    def test_empty(self, pr):
+    def extract(self, problems, start_from='1'):
+        with patch('extract_cases_to_db.problem_generator', return_value=problems):
+            extract_cases_to_db(None, self.cursor, 'abacaba', start_from)
+
+    def select(self, query):
+        return [tuple(row) for row in self.cursor.execute(query).fetchall()]
+
+    def test_common(self):
+        self.extract([make_problem('3', '4', ['qwer', 'asdf', 'zxcv'])])
+        self.assertEqual(self.select('SELECT id, contest_ref, problem_id, name, polygon_id FROM Problems'),
+                         [(1, 2, '4', 'old', None), (2, 1, '4', 'A', '22'), (3, 4, '4', 'old', None)])
+        self.assertEqual(self.select('SELECT id, io_hash FROM Cases ORDER BY id'),
+                         [(1, 'qwer'), (2, 'asdf'), (3, 'zxcv'), (4, None), (5, None)])
+
+    def test_no_problem(self):
+        self.extract([make_problem('5', '4', ['qwer', 'asdf']), make_problem('5', '7', [])])
+        self.assertEqual(self.select('SELECT id, contest_ref, problem_id, name, polygon_id FROM Problems '
+                                     'WHERE id > 3'),
+                         [(4, 3, '4', 'A', '22'), (5, 3, '7', 'A', '22')])
+        self.assertEqual(self.select('SELECT io_hash FROM Cases WHERE io_hash IS NOT NULL'), [])
+
+    @patch('logging.warning')
+    def test_no_contest(self, warn):
+        self.extract([make_problem('6', '4', ['qwer']), make_problem('3', '4', ['asdf'])])
+        warn.assert_called_once_with('Contest #6 not found')
+        self.assertEqual(self.select('SELECT COUNT(*) FROM Problems'), [(3,)])
+        self.assertEqual(self.select('SELECT id, io_hash FROM Cases WHERE io_hash IS NOT NULL'), [(1, 'asdf')])
+
+    def test_start_from(self):
+        self.extract([make_problem('3', '4', ['qwer']), make_problem('5', '4', ['asdf'])], start_from='4')
+        self.assertEqual(self.select('SELECT io_hash FROM Cases WHERE io_hash IS NOT NULL'), [])
+        self.assertEqual(self.select('SELECT contest_ref FROM Problems WHERE name = "A"'), [(3,)])
+
+    @patch('extract_cases_to_db.CONTESTS_IN_BATCH', 1)
+    def test_batches(self):
+        with patch.object(CasesHashesWriter, 'flush', autospec=True, side_effect=CasesHashesWriter.flush) as flush:
+            self.extract([make_problem('3', '4', ['qwer']), make_problem('5', '1', []),
+                          make_problem('3', '4', ['zxcv'], name='B')])
+        self.assertEqual(flush.call_count, 3)
+        self.assertFalse(self.connection.in_transaction)
+        self.assertEqual(self.select('SELECT id, io_hash FROM Cases WHERE io_hash IS NOT NULL'), [(1, 'zxcv')])
+        self.assertEqual(self.select('SELECT name FROM Problems WHERE id = 2'), [('B',)])
+
+    def test_similarity_index(self):
+        self.cursor.execute("UPDATE Cases SET io_hash = 'asdf' WHERE id = 4")
+        self.extract([make_problem('3', '4', ['qwer', 'asdf', 'zxcv'])])
+        self.assertEqual(self.select('SELECT problem_1, problem_2, same_cases, cases_1, cases_2 FROM ProblemsOverlaps'),
+                         [(1, 2, 1, 1, 1)])
+        self.extract([make_problem('3', '4', ['qwer', 'qwer', 'zxcv'])])
+        self.assertEqual(self.select('SELECT COUNT(*) FROM ProblemsOverlaps'), [(0,)])
+
+    def test_similarity_index_unchanged(self):
+        self.cursor.execute("UPDATE Cases SET io_hash = 'asdf' WHERE id = 4")
+        self.extract([make_problem('3', '4', ['qwer', 'asdf', 'zxcv'])])
+        self.cursor.execute('UPDATE ProblemsOverlaps SET same_cases = 5')
+        with patch('extract_cases_to_db.SimilarityIndex') as index:
+            self.extract([make_problem('3', '4', ['qwer', 'asdf', 'zxcv'])])
+        index.return_value.update.assert_not_called()
+        self.assertEqual(self.select('SELECT problem_1, problem_2, same_cases FROM ProblemsOverlaps'), [(1, 2, 5)])
+        self.extract([make_problem('3', '4', ['qwer', 'asdf', 'zxcv'])])
+        self.assertEqual(self.select('SELECT problem_1, problem_2, same_cases FROM ProblemsOverlaps'), [(1, 2, 5)])
+
+    def test_empty(self):
         cursor = Mock()
         cursor.execute.return_value.fetchone = Mock(side_effect=[(0,)])
-        with unittest.mock.patch('extract_cases_to_db.problem_generator', return_value=[None]):
+        with patch('extract_cases_to_db.problem_generator', return_value=[None]):
             extract_cases_to_db(None, cursor, 'abacaba')
         cursor.execute.assert_called_once_with('SELECT COUNT(id) FROM Contests')
 
-    @patch('builtins.print')
-    def test_no_problem(self, pr):
-        cursor = Mock()
-        cursor.execute.return_value.fetchone = Mock(side_effect=[(1,), (1,), (2,)])
-        cursor.execute.return_value.fetchall.return_value.__len__ = Mock(return_value=0)
-        problem = Mock(problem_id=['3', '4'], polygon_id='22', cases=['qwer', 'asdf', 'zxcv'])
-        problem.name = 'A'
-        with unittest.mock.patch('extract_cases_to_db.problem_generator', return_value=[problem]):
-            extract_cases_to_db(None, cursor, 'abacaba')
-        resulting_requests = []
-        for one_call in cursor.execute.call_args_list[1:]:
-            format_string, data_tuple = tuple(one_call)[0]
-            resulting_requests.append(self.prepare_request(format_string, data_tuple))
-        good_requests = ['SELECT id FROM Contests WHERE origin = abacaba AND contest_id = 000003',
-                         'SELECT id FROM Problems WHERE contest_ref = 1 AND problem_id = 4',
-                         'INSERT INTO Problems (id, contest_ref, polygon_id, problem_id, name) VALUES (NULL, 1, 22, 4, A)',
-                         'SELECT id FROM Problems WHERE contest_ref = 1 AND problem_id = 4',
-                         'UPDATE Cases SET io_hash = qwer WHERE problem_ref = 2 AND case_id = 1',
-                         'UPDATE Cases SET io_hash = asdf WHERE problem_ref = 2 AND case_id = 2',
-                         'UPDATE Cases SET io_hash = zxcv WHERE problem_ref = 2 AND case_id = 3']
-        self.maxDiff = None
-        self.assertEqual(resulting_requests, good_requests)
-
 
 if __name__ == "__main__":
     unittest.main()
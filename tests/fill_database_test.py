@@ -1,8 +1,16 @@
 import unittest
 from unittest.mock import patch, MagicMock, Mock, call
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import tempfile
 
-from fill_database import create_submit_walker, fill_from_xml
+from fill_database import create_submit_walker, fill_from_xml, parse_reports
 import fill_database as fill_database
+from db_submits_filler import DBSubmitsFiller
+from ejudge_database import EjudgeSubmitInfo
+from walker import SubmitWalker
+from pesto_testcase import create_test_database
 
 
 class TestFillDatabase(unittest.TestCase):
@@ -14,11 +22,12 @@ class TestFillDatabase(unittest.TestCase):
         ed.assert_called_once_with(1)
 
 
+    @patch('fill_database.MaterializedStats')
     @patch('builtins.print')
     @patch('fill_database.create_submit_walker')
     @patch('fill_database.MultipleContestWalker')
     @patch('fill_database.EjudgeRunsFilesWorker')
-    def test_fill_from_xml(self, er, mc, sw, pr):
+    def test_fill_from_xml(self, er, mc, sw, pr, ms):
         walker = MagicMock(walk=MagicMock(return_value=[10, 20]))
         er.return_value = MagicMock(walk=MagicMock(return_value=[(1, 'a'), (2, 'b')]))
         mc.return_value = MagicMock(walk=MagicMock(return_value=[(1, 'a'), (2, 'b')]))
@@ -32,6 +41,93 @@ class TestFillDatabase(unittest.TestCase):
                 "call(20, 'origin'),\n call(10, 'origin'),\n call(20, 'origin'),\n "
                 "call(10, 'origin'),\n call(20, 'origin')]")
         self.assertEqual(str(fill.fill_db_from_submit.call_args_list), good)
+        self.assertEqual(ms.invalidate.call_args_list, [call('sqlite', '000001'), call('sqlite', '000002')])
+
+    @patch('fill_database.PARSE_CHUNK_SIZE', 2)
+    @patch('fill_database.parse_report_files', side_effect=lambda names: [name.upper() for name in names])
+    def test_parse_reports(self, prf):
+        names = ['a', 'b', 'c', 'd', 'e']
+        with ThreadPoolExecutor(2) as executor:
+            res = list(parse_reports(iter(names), executor, 2))
+        self.assertEqual(res, [(name, name.upper()) for name in names])
+        self.assertEqual(prf.call_count, 3)
+
+    @patch('fill_database.MaterializedStats', Mock())
+    @patch('fill_database.ProcessPoolExecutor', ThreadPoolExecutor)
+    @patch('fill_database.parse_report_files', side_effect=lambda names: [name + '!' for name in names])
+    @patch('fill_database.create_submit_walker')
+    @patch('fill_database.MultipleContestWalker')
+    @patch('fill_database.EjudgeRunsFilesWorker')
+    def test_fill_from_xml_jobs(self, er, mc, sw, prf):
+        walker = Mock(get_submit_from_parse_result=Mock(side_effect=lambda res: None if res == 'b!' else res))
+        er.return_value = MagicMock(walk=MagicMock(return_value=[('xml', 'a'), ('xml', 'b'), ('gzip', 'c')]))
+        mc.return_value = MagicMock(walk=MagicMock(return_value=[(1, 'x'), (2, 'y')]))
+        sw.return_value = walker
+        fill = Mock()
+        fill_database.DBSubmitsFiller = Mock(return_value=fill)
+        fill_from_xml('sqlite', 'ejudge', 'dir', 'origin', jobs=2)
+        self.assertEqual(fill.fill_db_from_submit.call_args_list,
+                         [call('a!', 'origin'), call('c!', 'origin')] * 2)
+        self.assertEqual(fill.flush.call_count, 2)
+
+
+class TestFillWithManifest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        reports_dir = os.path.join(self.dir, 'var', 'archive', 'xmlreports')
+        os.makedirs(reports_dir)
+        self.paths = [os.path.join('var', 'archive', 'xmlreports', name) for name in ('000015', '000016')]
+        self.files = [os.path.join(self.dir, path) for path in self.paths]
+        for file_name in self.files:
+            shutil.copy(os.path.join('testdata', 'xml', 'normal.xml'), file_name)
+        self.cursor = create_test_database().cursor()
+        self.database = Mock(get_submit_info=Mock(return_value=EjudgeSubmitInfo('A', '11', '2', 42)))
+        self.filler = DBSubmitsFiller(self.cursor)
+        self.filler.fill_db_from_submit = Mock(side_effect=self.filler.fill_db_from_submit)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def fill(self, jobs=1):
+        with patch('fill_database.create_submit_walker', return_value=SubmitWalker(self.database)), \
+                patch('fill_database.create_filler', return_value=self.filler), \
+                patch('fill_database.MultipleContestWalker') as mc, \
+                patch('fill_database.ProcessPoolExecutor', ThreadPoolExecutor):
+            mc.return_value.walk.return_value = [('17', self.dir)]
+            fill_from_xml(self.cursor, 'ejudge', 'dir', 'origin', jobs=jobs, use_manifest=True)
+        calls = self.filler.fill_db_from_submit.call_count
+        self.filler.fill_db_from_submit.reset_mock()
+        return calls
+
+    def test_refill(self):
+        for jobs in (1, 2):
+            self.assertEqual(self.fill(jobs), 2)
+            self.assertEqual(self.fill(jobs), 0)
+            self.cursor.execute('DELETE FROM ReportsManifest')
+        self.cursor.execute('SELECT COUNT(*) FROM Submits')
+        self.assertEqual(self.cursor.fetchone()[0], 1)
+
+    def test_touched(self):
+        self.fill()
+        os.utime(self.files[0], (1000000000, 1000000000))
+        with open(self.files[1], 'a') as file:
+            file.write(' ')
+        self.assertEqual(self.fill(), 1)
+        self.assertEqual(self.fill(), 0)
+        self.cursor.execute('SELECT path, submit_ref FROM ReportsManifest ORDER BY path')
+        self.assertEqual(self.cursor.fetchall(), [(self.paths[0], 1), (self.paths[1], 1)])
+
+    def test_missing_run(self):
+        self.database.get_submit_info.return_value = None
+        self.assertEqual(self.fill(), 0)
+        self.cursor.execute('SELECT COUNT(*) FROM ReportsManifest')
+        self.assertEqual(self.cursor.fetchone()[0], 0)
+
+    def test_broken(self):
+        shutil.copy(os.path.join('testdata', 'xml', 'wrong.xml'), self.files[1])
+        self.assertEqual(self.fill(), 1)
+        self.cursor.execute('SELECT path, submit_ref FROM ReportsManifest ORDER BY path')
+        self.assertEqual(self.cursor.fetchall(), [(self.paths[0], 1), (self.paths[1], None)])
 
 
 if __name__ == "__main__":
@@ -40,6 +40,17 @@ class TestFindSimilarProblems(unittest.TestCase):
                     self.assertEqual(self.finder.get_removed_tests_count(problem_1, problem_2),
                                      len(set(problem_1.cases) - set(problem_2.cases)))
 
+    def test_sparse(self):
+        self.assertEqual(sum(len(neighbours) for neighbours in self.finder.neighbours), 2)
+        self.assertEqual(self.finder.get_similarity(self.problems[3], self.problems[0]), 5 / 6)
+        self.assertEqual(self.finder.get_similarity(self.problems[0], self.problems[1]), 0.0)
+        self.assertEqual(self.finder.get_similarity(self.problems[5], self.problems[6]), 0.0)
+
+    def test_approximate(self):
+        finder = SimilarProblemsFinder(self.problems, (64, 1))
+        self.assertEqual(finder.get_stat_data(), self.finder.get_stat_data())
+        self.assertEqual(finder.get_same_tests_count(self.problems[0], self.problems[3]), 5)
+
     def test_str(self):
         result_string = str(self.finder)
         correct_string = """Problems 42a from contest #42 and problem 43b from contest #43 are similar (83%). Tests: +1, -1, 5 not changed.
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from hash_cache import HashCache
+from pesto_testcase import create_test_database
+
+
+class TestHashCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.input, self.output = os.path.join(self.dir, '01'), os.path.join(self.dir, '01.a')
+        self.write(self.input, '1 2')
+        self.write(self.output, '3')
+        self.cursor = create_test_database().cursor()
+        self.cache = HashCache(self.cursor)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, file_name, data, mtime=1000000000):
+        with open(file_name, 'w') as file:
+            file.write(data)
+        os.utime(file_name, (mtime, mtime))
+
+    def test_cached(self):
+        self.assertIsNone(self.cache.get(self.input, self.output))
+        self.cache.put(self.input, self.output, 'hash')
+        self.cache.flush()
+        self.assertEqual(self.cache.get(self.input, self.output), 'hash')
+        self.assertIsNone(HashCache(self.cursor).get(self.input, self.output + '.other'))
+
+    def test_changed(self):
+        self.cache.get(self.input, self.output)
+        self.cache.put(self.input, self.output, 'hash')
+        self.cache.flush()
+        self.write(self.output, '3', 1000000001)
+        self.assertIsNone(self.cache.get(self.input, self.output))
+        self.cache.put(self.input, self.output, 'new hash')
+        self.cache.flush()
+        self.assertEqual(self.cache.get(self.input, self.output), 'new hash')
+        self.cursor.execute('SELECT COUNT(*) FROM HashCache')
+        self.assertEqual(self.cursor.fetchone()[0], 1)
+
+    def test_missing_file(self):
+        os.remove(self.output)
+        self.assertIsNone(self.cache.get(self.input, self.output))
+        self.cache.put(self.input, self.output, 'hash')
+        self.cache.flush()
+        self.cursor.execute('SELECT COUNT(*) FROM HashCache')
+        self.assertEqual(self.cursor.fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
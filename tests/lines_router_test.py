@@ -0,0 +1,111 @@
+import math
+import random
+import unittest
+from unittest.mock import patch
+
+import lines_router
+from lines_router import LinesRouter, LinesEngine, route_lines
+
+
+def reference_route(problems_and_coords, size, radius, problem_1, problem_2):
+    # The step by step routing with the scalar math the router is expected to repeat exactly
+    chunk_size = lines_router.CHUNK_SIZE
+    chunks_x, chunks_y = (size[0] + chunk_size - 1) // chunk_size, (size[1] + chunk_size - 1) // chunk_size
+    chunks = [[] for i in range(chunks_x * chunks_y)]
+    for problem, coords in problems_and_coords:
+        chunks[int(coords[0]) // chunk_size * chunks_y + int(coords[1]) // chunk_size].append((problem, coords))
+    coords = dict(problems_and_coords)
+    curr_x, curr_y = coords[problem_1]
+    destination = coords[problem_2]
+    curr_vx, curr_vy = 0.0, 3.0
+    line = []
+    for steps in range(1, lines_router.LOCATE_LINES_MAX_ITERATIONS):
+        speed_sqr = curr_vx * curr_vx + curr_vy * curr_vy
+        if speed_sqr > lines_router.LOCATE_LINES_MAX_SPEED_SQR:
+            speed = math.sqrt(speed_sqr)
+            curr_vx *= lines_router.LOCATE_LINES_MAX_SPEED / speed
+            curr_vy *= lines_router.LOCATE_LINES_MAX_SPEED / speed
+        if not line or (int(curr_x), int(curr_y)) != line[-1]:
+            line.append((int(curr_x), int(curr_y)))
+        curr_x += curr_vx
+        curr_y += curr_vy
+        if (curr_x - destination[0]) ** 2 + (curr_y - destination[1]) ** 2 <= radius ** 2:
+            return line
+        chunk_x, chunk_y = int(curr_x) // chunk_size, int(curr_y) // chunk_size
+        for curr_chunk_x in range(chunk_x - 1, chunk_x + 2):
+            for curr_chunk_y in range(chunk_y - 1, chunk_y + 2):
+                if not (0 <= curr_chunk_x < chunks_x and 0 <= curr_chunk_y < chunks_y):
+                    continue
+                for problem, problem_coords in chunks[curr_chunk_x * chunks_y + curr_chunk_y]:
+                    if problem in (problem_1, problem_2):
+                        continue
+                    x, y = curr_x - problem_coords[0], curr_y - problem_coords[1]
+                    distance = math.sqrt(x * x + y * y) - radius
+                    inverse_distance_sqr = 1.0 / (distance * distance)
+                    x, y = problem_coords[0] - curr_x, problem_coords[1] - curr_y
+                    length = math.sqrt(x * x + y * y)
+                    curr_vx += lines_router.LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * (x / length)
+                    curr_vy += lines_router.LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * (y / length)
+        x, y = destination[0] - curr_x, destination[1] - curr_y
+        length = math.sqrt(x * x + y * y)
+        curr_vx += lines_router.LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (x / length)
+        curr_vy += lines_router.LOCATE_LINES_DESTINATION_CONSTANT_FORCE * (y / length)
+    return []
+
+
+class LinesRouterTest(unittest.TestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        self.coords = [(220.0 + 40 * (i % 25), 85.0 + 220 * (i // 25)) for i in range(100)]
+        self.size = (1270, 800)
+        self.pairs = [tuple(generator.sample(range(len(self.coords)), 2)) for i in range(20)]
+
+    def test_same_as_reference(self):
+        router = LinesRouter(self.coords, self.size, 10)
+        for source, destination in self.pairs:
+            line = router.route(source, destination)
+            self.assertEqual(line, reference_route(list(enumerate(self.coords)), self.size, 10, source, destination))
+            self.assertEqual(line[0], tuple(map(int, self.coords[source])))
+
+    def test_fail(self):
+        with patch('lines_router.LOCATE_LINES_MAX_ITERATIONS', 10):
+            self.assertEqual(LinesRouter(self.coords, self.size, 10).route(0, 99), [])
+
+    @patch('lines_router.LINES_IN_TASK', 3)
+    def test_jobs(self):
+        self.assertEqual(route_lines(self.coords, self.size, 10, self.pairs, jobs=2),
+                         route_lines(self.coords, self.size, 10, self.pairs))
+
+
+@unittest.skipIf(lines_router.numpy is None, 'numpy is not installed')
+class LinesEngineTest(unittest.TestCase):
+    setUp = LinesRouterTest.setUp
+
+    def test_same_as_router(self):
+        self.assertEqual(LinesEngine(self.coords, self.size, 10).route_all(self.pairs),
+                         LinesRouter(self.coords, self.size, 10).route_all(self.pairs))
+
+    def test_same_as_router_random(self):
+        # Jittered coordinates give the square roots of many different numbers
+        generator = random.Random(10)
+        coords = [(200.0 + 40 * (i % 30) + generator.uniform(-5, 5), 85.0 + 250 * (i // 30) + generator.uniform(-5, 5))
+                  for i in range(600)]
+        size = (1450, 5100)
+        pairs = []
+        for i in range(80):
+            source = generator.randrange(len(coords) - 30)
+            pairs.append((source, min(len(coords) - 1, source + generator.randrange(30, 90))))
+        self.assertEqual(LinesEngine(coords, size, 10).route_all(pairs), LinesRouter(coords, size, 10).route_all(pairs))
+
+    @patch('lines_router.LINES_IN_TICK', 30)
+    def test_few_lines(self):
+        self.assertEqual(LinesEngine(self.coords, self.size, 10).route_all(self.pairs),
+                         LinesRouter(self.coords, self.size, 10).route_all(self.pairs))
+
+    def test_engine_fail(self):
+        with patch('lines_router.LOCATE_LINES_MAX_ITERATIONS', 10):
+            self.assertEqual(LinesEngine(self.coords, self.size, 10).route_all(self.pairs), [[]] * len(self.pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+
+from materialized_stats import MaterializedStats
+from pesto_testcase import create_test_database
+
+
+class MaterializedStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.cursor = create_test_database().cursor()
+
+    def test_put_get(self):
+        stats = MaterializedStats(self.cursor, 'stat', 'key')
+        self.assertEqual(stats.get('000001'), (0, None))
+        stats.put('000001', 10, {'a': [1, 2]})
+        stats.put('000002', 10, 'b')
+        stats.flush()
+        stats.put('000001', 15, {'a': [3]})
+        stats.flush()
+        stats = MaterializedStats(self.cursor, 'stat', 'key')
+        self.assertEqual(stats.get('000001'), (15, {'a': [3]}))
+        self.assertEqual(stats.get('000002'), (10, 'b'))
+        self.assertEqual(MaterializedStats(self.cursor, 'stat', 'other').get('000001'), (0, None))
+        self.assertEqual(MaterializedStats(self.cursor, 'other', 'key').get('000001'), (0, None))
+
+    def test_invalidate(self):
+        for stat_name in ['stat', 'other']:
+            stats = MaterializedStats(self.cursor, stat_name, 'key')
+            stats.put('000001', 10, 'a')
+            stats.put('000002', 10, 'b')
+            stats.flush()
+        MaterializedStats.invalidate(self.cursor, '000001')
+        for stat_name in ['stat', 'other']:
+            stats = MaterializedStats(self.cursor, stat_name, 'key')
+            self.assertEqual(stats.get('000001'), (0, None))
+            self.assertEqual(stats.get('000002'), (10, 'b'))
+
+    def test_advance(self):
+        stats = MaterializedStats(self.cursor, 'stat', 'key')
+        for contest_id, high_water in [('000001', 10), ('000002', 20), ('000003', 5)]:
+            stats.put(contest_id, high_water, contest_id)
+        stats.flush()
+        other = MaterializedStats(self.cursor, 'other', 'key')
+        other.put('000001', 5, 'other')
+        other.flush()
+        stats.advance(15, ['000001', '000002'])
+        stats = MaterializedStats(self.cursor, 'stat', 'key')
+        self.assertEqual([stats.get_high_water(contest_id) for contest_id in ['000001', '000002', '000003', '000004']],
+                         [15, 20, 5, 0])
+        stats.advance(30)
+        stats = MaterializedStats(self.cursor, 'stat', 'key')
+        self.assertEqual([stats.get(contest_id) for contest_id in ['000001', '000002', '000003']],
+                         [(30, '000001'), (30, '000002'), (30, '000003')])
+        self.assertEqual(MaterializedStats(self.cursor, 'other', 'key').get('000001'), (5, 'other'))
+
+    @patch('logging.warning')
+    def test_broken_state(self, warning):
+        self.cursor.execute('INSERT INTO MaterializedStats (stat_name, state_key, contest_id, high_water, state) '
+                            'VALUES (?, ?, ?, ?, ?)', ['stat', 'key', '000001', 10, b'broken'])
+        self.assertEqual(MaterializedStats(self.cursor, 'stat', 'key').get('000001'), (0, None))
+        warning.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,16 @@ class MaxTestCountTest(unittest.TestCase):
         self.assertEqual(res1, 10)
         self.assertEqual(res2, 11)
 
+    def test_merge(self):
+        visitor1 = MaxTestCasesCount()
+        visitor2 = visitor1.empty()
+        visitor1.visit(self.submit1)
+        visitor2.visit(self.submit3)
+        visitor1.merge(visitor2)
+        self.assertEqual(visitor1.get_stat_data(), 11)
+        visitor1.merge(visitor1.empty())
+        self.assertEqual(visitor1.get_stat_data(), 11)
+
     def test_pretty_print(self):
         visitor = MaxTestCasesCount()
         visitor.result = 42
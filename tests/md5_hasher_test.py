@@ -1,18 +1,28 @@
+import hashlib
 import unittest
 from unittest.mock import Mock, patch
 
-from md5_hasher import _md5_update, get_hash
+from md5_hasher import _md5_update, get_hash, CHUNK_SIZE
 
 
 class TestMD5Hasher(unittest.TestCase):
     @patch('builtins.open', return_value=Mock(read=Mock(return_value='contents'), __exit__=Mock(),
-                                              __enter__=Mock(return_value=Mock(read=Mock(return_value='contents'),
+                                              __enter__=Mock(return_value=Mock(read=Mock(side_effect=['contents', '']),
                                                                                close=Mock()))))
     def test_update(self, d):
         md5 = Mock()
         _md5_update(md5, 'filename')
         open.assert_called_once_with('filename', 'rb')
         md5.update.assert_called_once_with('contents')
+        open.return_value.__enter__.return_value.read.assert_called_with(CHUNK_SIZE)
+
+    @patch('md5_hasher.CHUNK_SIZE', 7)
+    def test_chunks(self):
+        data = b''
+        for filename in ('testdata/xml/normal.xml', 'testdata/xml/wrong.xml'):
+            with open(filename, 'rb') as file:
+                data += file.read()
+        self.assertEqual(get_hash('testdata/xml/normal.xml', 'testdata/xml/wrong.xml'), hashlib.md5(data).hexdigest())
 
     @patch('md5_hasher._md5_update', lambda md5, name: md5.update(name))
     def test_get_hash(self):
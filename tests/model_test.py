@@ -22,6 +22,12 @@ class TestRun(unittest.TestCase):
     def test_repr(self):
         self.assertEqual(str(self.run), repr(self.run))
 
+    def test_slots(self):
+        self.run.submit_ref, self.run.case_ref = 1, 2
+        self.assertFalse(hasattr(self.run, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.run.unknown = 1
+
 
 class TestSubmit(unittest.TestCase):
     def setUp(self):
@@ -55,6 +61,17 @@ class TestSubmit(unittest.TestCase):
         self.submit = Submit('0', ('1', '1'), '179', '0', self.runs, '1', 'kirov', 37)
         self.assertEqual(self.submit.runs_results, self.runs_results)
 
+    def test_count_results(self):
+        self.submit = Submit('0', ('1', '1'), '179', '0', [], '1', 'kirov', 37)
+        self.assertEqual(self.submit.runs_results, '')
+        self.submit.runs = self.runs
+        self.assertEqual(self.submit.runs_results, '')
+        self.submit.count_results()
+        self.assertEqual(self.submit.runs_results, self.runs_results)
+        self.submit.runs_results = 'x'
+        self.assertEqual(self.submit.runs_results, 'x')
+        self.assertFalse(hasattr(self.submit, '__dict__'))
+
 
 class TestProblem(unittest.TestCase):
     def setUp(self):
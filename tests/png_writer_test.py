@@ -0,0 +1,45 @@
+import io
+import struct
+import unittest
+import zlib
+
+from png_writer import PngWriter, PNG_SIGNATURE
+
+
+def read_chunks(data):
+    chunks = []
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        chunk_type, chunk = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        crc, = struct.unpack('>I', data[position + 8 + length:position + 12 + length])
+        chunks.append((chunk_type, chunk, crc == zlib.crc32(chunk_type + chunk)))
+        position += 12 + length
+    return chunks
+
+
+class PngWriterTest(unittest.TestCase):
+    def test_write(self):
+        file = io.BytesIO()
+        writer = PngWriter(file, (2, 3))
+        writer.write_rows(bytes(range(12)))
+        writer.write_rows(bytes(range(12, 18)))
+        writer.close()
+        data = file.getvalue()
+        self.assertEqual(data[:len(PNG_SIGNATURE)], PNG_SIGNATURE)
+        chunks = read_chunks(data)
+        self.assertTrue(all(crc_ok for chunk_type, chunk, crc_ok in chunks))
+        self.assertEqual(chunks[0][:2], (b'IHDR', struct.pack('>IIBBBBB', 2, 3, 8, 2, 0, 0, 0)))
+        self.assertEqual(chunks[-1][:2], (b'IEND', b''))
+        rows = zlib.decompress(b''.join(chunk for chunk_type, chunk, crc_ok in chunks if chunk_type == b'IDAT'))
+        self.assertEqual(rows, b'\0' + bytes(range(6)) + b'\0' + bytes(range(6, 12)) + b'\0' + bytes(range(12, 18)))
+
+    def test_wrong_rows(self):
+        writer = PngWriter(io.BytesIO(), (2, 1))
+        self.assertRaises(ValueError, writer.write_rows, bytes(5))
+        self.assertRaises(ValueError, writer.close)
+        self.assertRaises(ValueError, writer.write_rows, bytes(12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 from unittest.mock import Mock, patch
 
-from problem_generator import problem_generator
+from concurrent.futures import ThreadPoolExecutor
+
+from problem_generator import problem_generator, get_tests_hashes
 import md5_hasher
 
 
@@ -27,6 +29,30 @@ class TestProblemGenerator(unittest.TestCase):
             self.assertEqual(problem.cases, ['hash', 'hash'])
         self.assertEqual(md5_hasher.get_hash.call_args_list, [(('a', 'b'),), (('c', 'd'),)] * 4)
 
+    @patch('md5_hasher.get_hash', Mock(return_value='hash'))
+    @patch('ejudge_contest.EjudgeContest')
+    def test_jobs(self, ec):
+        ec.return_value.get_problem_ids = Mock(return_value=[('42', '1')])
+        ec.return_value.get_test_paths_by_problem_id = Mock(return_value=[('a', 'b'), ('c', 'd')])
+        result = list(problem_generator(['000042'], jobs=2))
+        self.assertEqual(result[0].cases, ['hash', 'hash'])
+
+
+class TestGetTestsHashes(unittest.TestCase):
+    @patch('md5_hasher.get_hash', side_effect=lambda input_path, output_path: input_path + output_path)
+    def test_cache(self, get_hash):
+        cache = Mock(get=Mock(side_effect=[None, 'cached', None]))
+        tests_paths = [('a', 'b'), ('c', 'd'), ('e', 'f')]
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(get_tests_hashes(tests_paths, cache, executor), ['ab', 'cached', 'ef'])
+        self.assertEqual(sorted(get_hash.call_args_list), [(('a', 'b'),), (('e', 'f'),)])
+        self.assertEqual(cache.put.call_args_list, [(('a', 'b', 'ab'),), (('e', 'f', 'ef'),)])
+        cache.flush.assert_called_once_with()
+
+    @patch('md5_hasher.get_hash', side_effect=lambda input_path, output_path: input_path + output_path)
+    def test_no_cache(self, get_hash):
+        self.assertEqual(get_tests_hashes([('a', 'b'), ('c', 'd')]), ['ab', 'cd'])
+
 
 """class TestSqliteProblemGenerator(unittest.TestCase):
     def setUp(self):
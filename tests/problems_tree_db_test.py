@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import problems_tree_db
+import problems_tree_json
+from model import Problem
+from problems_tree import ProblemsTree
+from stats.contests_grouper import ContestsGrouper, _Contest
+
+
+class ProblemsTreeDbTest(unittest.TestCase):
+    def setUp(self):
+        self.problems = [Problem(('42', '1'), '', '42a', ['a1', 'a2', 'a3', 'a4']),
+                         Problem(('42', '2'), '', '42b', ['b1', 'b2']),
+                         Problem(('43', '1'), '', '43a', ['a1', 'a2', 'a3', 'a5']),
+                         Problem(('44', '1'), '', '44a', ['a1', 'a2', 'a3', 'a5', 'a6'])]
+        self.tree = ProblemsTree(self.problems)
+        self.contests_grouper = ContestsGrouper([])
+        self.contests_grouper.contests = {'42': _Contest(2016, 'Июль', '1', 'A'),
+                                          '43': _Contest(2017, 'Август', '', 'B'),
+                                          '44': _Contest(2017, 'Зима', 'exam', 'C')}
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'tree.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_load(self):
+        problems_tree_db.save_tree(self.tree, self.contests_grouper, self.filename)
+        self.assertTrue(problems_tree_db.is_tree_file(self.filename))
+        tree, contests_grouper = problems_tree_db.load_tree(self.filename)
+        self.assertIsNone(tree._problems)
+        problems = tree.get_problems()
+        self.assertEqual([(problem.problem_id, problem.name, len(problem.cases)) for problem in problems],
+                         [(problem.problem_id, problem.name, len(problem.cases)) for problem in self.problems])
+        self.assertIsNone(tree._problem_previous)
+        self.assertIsNone(tree.get_previous_problem(problems[1]))
+        self.assertEqual(tree.get_relation_to_parent(problems[2]), (problems[0], 0.75, 3, 1, 1))
+        self.assertEqual(tree.get_relation_to_parent(problems[3]), (problems[2], 0.8, 4, 1, 0))
+        self.assertIsNone(tree.connection)
+        self.assertEqual({contest_id: vars(contest) for contest_id, contest in contests_grouper.contests.items()},
+                         {contest_id: vars(contest) for contest_id, contest in self.contests_grouper.contests.items()})
+
+    def test_overwrite(self):
+        problems_tree_db.save_tree(self.tree, self.contests_grouper, self.filename)
+        problems_tree_db.save_tree(ProblemsTree(self.problems[:2]), self.contests_grouper, self.filename)
+        self.assertEqual(len(problems_tree_db.load_tree(self.filename)[0].get_problems()), 2)
+
+    def test_overwrite_json(self):
+        with open(self.filename, 'w') as file:
+            file.write(problems_tree_json.save_tree(self.tree, self.contests_grouper))
+        problems_tree_db.save_tree(self.tree, self.contests_grouper, self.filename)
+        tree, contests_grouper = problems_tree_db.load_tree(self.filename)
+        self.assertEqual(len(tree.get_problems()), 4)
+        tree.close()
+        self.assertEqual(os.listdir(self.directory.name), ['tree.db'])
+
+    def test_json_is_not_tree_file(self):
+        with open(self.filename, 'w') as file:
+            file.write(problems_tree_json.save_tree(self.tree, self.contests_grouper))
+        self.assertFalse(problems_tree_db.is_tree_file(self.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,6 +37,10 @@ class TestProblemsTree(unittest.TestCase):
         self.assertEqual(self.tree.get_previous_problem(self.problems[5]), self.problems[4])
         self.assertEqual(self.tree.get_previous_problem(self.problems[6]), self.problems[4])
 
+    def test_approximate(self):
+        tree = ProblemsTree(self.problems, (64, 1))
+        self.assertEqual(tree.problem_previous, self.tree.problem_previous)
+
     def test_str(self):
         result_string = str(self.tree)
         correct_string = """Problem #1 ("42a") from contest #42: it is a new problem. Tests: 6.
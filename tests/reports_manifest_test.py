@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from reports_manifest import ReportsManifest
+from pesto_testcase import create_test_database
+
+
+class TestReportsManifest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = [os.path.join(self.dir, name) for name in ('000001', '000002.gz')]
+        for file_name in self.files:
+            self.write(file_name, 'report')
+        self.cursor = create_test_database().cursor()
+        self.manifest = ReportsManifest(self.cursor, 'origin')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, file_name, data, mtime=1000000000):
+        with open(file_name, 'w') as file:
+            file.write(data)
+        os.utime(file_name, (mtime, mtime))
+
+    def refill(self):
+        self.manifest.start_contest('17', self.dir)
+        return list(self.manifest.changed_reports(self.files))
+
+    def test_new_reports(self):
+        self.assertEqual(self.refill(), [(self.files[0], None), (self.files[1], None)])
+        self.manifest.record(self.files[0], 'h1', 5)
+        self.manifest.record(self.files[1], 'h2', None)
+        self.manifest.flush()
+        self.assertEqual(self.refill(), [])
+        self.cursor.execute('SELECT origin, contest_id, path, size, mtime, content_hash, submit_ref '
+                            'FROM ReportsManifest ORDER BY path')
+        self.assertEqual(self.cursor.fetchall(),
+                         [('origin', '17', '000001', 6, 1000000000 * 10 ** 9, 'h1', 5),
+                          ('origin', '17', '000002.gz', 6, 1000000000 * 10 ** 9, 'h2', None)])
+
+    def test_changed_reports(self):
+        self.refill()
+        self.manifest.record(self.files[0], 'h1', 5)
+        self.manifest.record(self.files[1], 'h2', 6)
+        self.manifest.flush()
+        self.write(self.files[0], 'report', 1000000001)
+        self.write(self.files[1], 'longer report')
+        self.assertEqual(self.refill(), [(self.files[0], 'h1'), (self.files[1], 'h2')])
+        self.manifest.touch(self.files[0])
+        self.manifest.record(self.files[1], 'h3', 6)
+        self.manifest.flush()
+        self.assertEqual(self.refill(), [])
+        self.cursor.execute('SELECT path, mtime, content_hash, submit_ref FROM ReportsManifest ORDER BY path')
+        self.assertEqual(self.cursor.fetchall(), [('000001', 1000000001 * 10 ** 9, 'h1', 5),
+                                                  ('000002.gz', 1000000000 * 10 ** 9, 'h3', 6)])
+
+    def test_other_origin(self):
+        self.refill()
+        self.manifest.record(self.files[0], 'h1', 5)
+        self.manifest.flush()
+        self.manifest = ReportsManifest(self.cursor, 'other')
+        self.assertEqual(len(self.refill()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,6 +99,49 @@ class PositiveTestsKirov(unittest.TestCase):
         self.assertEqual(self.same.pretty_print(), 'Submits - 10\nUnique tests: {1 2}\n')
 
 
+class TestsMerge(unittest.TestCase):
+    def submits(self, outcomes):
+        return [Submit(i, (0, 0), 0, 0, [Run(0, i, case_id, '100', '100', outcome)
+                                         for case_id, outcome in submit_outcomes], 0, 'kirov', 37)
+                for i, submit_outcomes in enumerate(outcomes)]
+
+    def check_merge(self, visitor_class, submits):
+        whole = visitor_class()
+        for submit in submits:
+            whole.visit(submit)
+        strong_runs, result = set(whole.strong_runs), whole.pretty_print()
+        for cut in range(len(submits) + 1):
+            first = visitor_class()
+            second = first.empty()
+            for submit in submits[:cut]:
+                first.visit(submit)
+            for submit in submits[cut:]:
+                second.visit(submit)
+            first.merge(second)
+            self.assertEqual(first.strong_runs, strong_runs)
+            self.assertEqual(first.pretty_print(), result)
+
+    def test_kirov(self):
+        self.check_merge(SameRunsKirov, self.submits([
+            [(2, 'OK'), (3, 'OK')],
+            [(1, 'WA'), (2, 'WA'), (3, 'OK'), (4, 'OK')],
+            [(1, 'OK'), (3, 'OK'), (4, 'OK')],
+            [(1, 'OK'), (2, 'WA'), (3, 'OK')],
+            [(1, 'WA'), (2, 'OK'), (3, 'OK'), (4, 'WA')]]))
+        self.check_merge(SameRunsKirov, self.submits([
+            [(1, 'OK'), (2, 'OK'), (3, 'OK'), (4, 'OK'), (5, 'WA')],
+            [(1, 'OK'), (2, 'OK'), (3, 'WA'), (4, 'WA'), (5, 'WA')],
+            [(1, 'OK'), (3, 'WA'), (4, 'WA'), (5, 'OK')],
+            [(1, 'WA'), (2, 'OK'), (3, 'WA'), (4, 'WA')]]))
+
+    def test_acm(self):
+        self.check_merge(SameRunsACM, self.submits([
+            [(1, 'OK'), (2, 'OK'), (3, 'WA')],
+            [(1, 'OK'), (2, 'OK'), (3, 'OK'), (4, 'OK'), (5, 'OK')],
+            [(1, 'WA')],
+            [(1, 'OK'), (2, 'OK'), (3, 'OK'), (4, 'WA')]]))
+
+
 class TestsACM(unittest.TestCase):
     def setUp(self):
         self.same = SameRunsACM()
@@ -75,6 +75,32 @@ def do_visits(visitor):
     visitor.visit(Submit("0", ("1", "2"), "1", "1", [], 'OK', 'kirov', 37))
 
 
+class TestMerge(unittest.TestCase):
+    def test_merge(self):
+        first = ShardingByScoringVisitor(Mock())
+        second = first.empty()
+        self.assertEqual((type(second), second.factory, second.visitors), (ShardingByScoringVisitor, first.factory, {}))
+        first.visitors = {'ACM': ShardingByContestVisitor(Mock()), 'kirov': 1}
+        second.visitors = {'ACM': ShardingByContestVisitor(Mock()), 'olymp': 2}
+        leaf, other_leaf = Mock(), Mock()
+        first.visitors['ACM'].visitors = {'1': 3, '2': leaf}
+        second.visitors['ACM'].visitors = {'2': other_leaf, '3': 4}
+        first.merge(second)
+        self.assertEqual(sorted(first.visitors), ['ACM', 'kirov', 'olymp'])
+        self.assertEqual(first.visitors['ACM'].visitors, {'1': 3, '2': leaf, '3': 4})
+        leaf.merge.assert_called_once_with(other_leaf)
+
+
+class TestVisitColumns(unittest.TestCase):
+    def test_not_problem_level(self):
+        visitor = ShardingByUserVisitor(Mock(create=lambda key: Mock()))
+        submits = [Submit('0', ('1', '2'), '1', '1', [], 'OK', 'kirov', 37),
+                   Submit('1', ('1', '2'), '2', '1', [], 'OK', 'kirov', 38)]
+        visitor.visit_columns(Mock(submits=Mock(return_value=submits)))
+        self.assertEqual(sorted(visitor.visitors), ['1', '2'])
+        visitor.visitors['1'].visit.assert_called_once_with(submits[0])
+
+
 class TestByProblem(unittest.TestCase):
     def test_key(self):
         visitor = ShardingByProblemVisitor(Mock())
@@ -94,6 +120,12 @@ class TestByContest(unittest.TestCase):
         visitor = ShardingByContestVisitor(Mock())
         self.assertEqual(visitor.build_key(Mock(problem_id=('1', '2'))), '1')
 
+    def test_visit_columns(self):
+        visitor = ShardingByContestVisitor(Mock(create=lambda key: Mock()))
+        columns = Mock(problem_id=('1', '2'))
+        visitor.visit_columns(columns)
+        visitor.visitors['1'].visit_columns.assert_called_once_with(columns)
+
     def test_pretty_key(self):
         visitor = ShardingByContestVisitor(Mock())
         self.assertEqual(visitor.pretty_key('1'), 'Contest #1')
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+import scheme_update_funcs
+from cases_index import overlaps_with_previous
+from find_similar_problems import SimilarProblemsFinder
+from model import Problem
+from pesto_testcase import create_test_database
+from problems_tree import ProblemsTree
+from similarity_index import SimilarityIndex
+
+
+class SimilarityIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.cursor = create_test_database().cursor()
+        generator = random.Random(1)
+        self.problems = []
+        for ref in range(1, 31):
+            cases = [str(generator.randrange(40)) for i in range(generator.randrange(8))]
+            self.add_problem(ref, cases)
+        self.index = SimilarityIndex(self.cursor)
+
+    def add_problem(self, ref, cases):
+        self.cursor.execute('INSERT INTO Problems (id, contest_ref, problem_id) VALUES (?, 1, ?)', [ref, str(ref)])
+        self.cursor.executemany('INSERT INTO Cases (problem_ref, case_id, io_hash) VALUES (?, ?, ?)',
+                                [[ref, case_id + 1, io_hash] for case_id, io_hash in enumerate(cases)])
+        problem = Problem(('1', str(ref)), '', str(ref), cases)
+        problem.db_id = ref
+        self.problems.append(problem)
+
+    def check_overlaps(self):
+        for problems in [self.problems, self.problems[::-1]]:
+            for distinct in [False, True]:
+                self.assertEqual(list(self.index.overlaps_with_previous(problems, distinct)),
+                                 list(overlaps_with_previous(problems, distinct)))
+
+    def test_rebuild(self):
+        self.index.rebuild()
+        self.check_overlaps()
+
+    def test_migration(self):
+        self.cursor.execute('DROP TABLE ProblemsOverlaps')
+        self.cursor.execute('DROP INDEX cases_index_2')
+        scheme_update_funcs.update_from_v7_to_v8(self.cursor)
+        self.check_overlaps()
+
+    def test_update(self):
+        self.index.rebuild()
+        self.add_problem(31, ['1', '2', '2', '3'])
+        changed = self.problems[3]
+        changed.cases = ['1', '2', '5']
+        self.cursor.execute('DELETE FROM Cases WHERE problem_ref = 4')
+        self.cursor.executemany('INSERT INTO Cases (problem_ref, case_id, io_hash) VALUES (4, ?, ?)',
+                                [[1, '1'], [2, '2'], [3, '5'], [4, None]])
+        self.index.update([4, 31, 4])
+        self.check_overlaps()
+        self.index.update([])
+        self.check_overlaps()
+
+    def test_subset(self):
+        self.index.rebuild()
+        problems = self.problems[5:20]
+        self.assertEqual(list(self.index.overlaps_with_previous(problems)), list(overlaps_with_previous(problems)))
+
+    def test_finders(self):
+        self.index.rebuild()
+        finder = SimilarProblemsFinder(self.problems, index=self.index)
+        self.assertEqual(finder.get_stat_data(), SimilarProblemsFinder(self.problems).get_stat_data())
+        tree = ProblemsTree(self.problems, index=self.index)
+        self.assertEqual(tree.problem_previous, ProblemsTree(self.problems).problem_previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import sqlite3
 from unittest.mock import MagicMock, patch
@@ -29,6 +31,22 @@ class SQLiteConnectorTest(pesto_testcase.PestoTestCase):
         sqlite3.connect.commit.assert_called_once()
         sqlite3.connect.close.assert_called_once()
 
+    def test_read_only_connection(self):
+        fd, db_dir = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        try:
+            self.connector.create_connection(db_dir)
+            self.connector.get_cursor().execute('CREATE TABLE T (a INTEGER)')
+            self.connector.close_connection()
+            self.connector.create_connection(db_dir, read_only=True)
+            self.assertEqual(self.connector.db_dir, db_dir)
+            self.assertEqual(self.connector.get_cursor().execute('SELECT COUNT(*) FROM T').fetchone()[0], 0)
+            with self.assertRaises(sqlite3.OperationalError):
+                self.connector.get_cursor().execute('INSERT INTO T VALUES (1)')
+            self.connector.close_connection()
+        finally:
+            os.remove(db_dir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,16 @@
+import os
+import sqlite3
+import tempfile
 import unittest
 from unittest.mock import Mock, MagicMock, patch
 from statistics import Statistics, SubmitStatistics, ProblemStatistics
+from sharding_visitor import ShardingByContestVisitor, ShardingByScoringVisitor, ShardingByLangVisitor
+from sqlite_connector import SQLiteConnector
+from db_submits_filler import BulkSubmitsFiller
+from materialized_stats import MaterializedStats
+from model import Submit, Run
+from pesto_testcase import create_test_database
+import tool_config
 
 class TestStatistics(unittest.TestCase):
     def test_init(self):
@@ -38,15 +48,82 @@ class TestSubmitStatistics(unittest.TestCase):
         self.assertEqual(s._create_query(), (good + ' WHERE Contests.contest_id = ?', ['c']))
 
     @patch('statistics.SubmitStatistics.calc')
-    @patch('dao.SubmitsDAO')
-    def test_get_data(self, dao, c):
+    @patch('dao.SubmitsDAO.columns', '_c_')
+    def test_create_query_submit_filters(self, c):
+        s = SubmitStatistics(Mock())
+        s.filters = {'since': '2020-07-01 00:00:00', 'until': '2020-08-01 00:00:00', 'origin': 'camp',
+                     'langs': ['1', '2'], 'users': ['3'], 'contests_from': '000010', 'contests_to': '000020'}
+        query, vals = s._create_query()
+        self.assertTrue(query.endswith(' WHERE Contests.origin = ? AND Contests.contest_id >= ? AND Contests.contest_id <= ? '
+                                       'AND Submits.timestamp >= ? AND Submits.timestamp < ? AND Submits.lang_id IN (?, ?) '
+                                       'AND Submits.user_ref IN (SELECT id FROM Users WHERE user_id IN (?))'))
+        self.assertEqual(vals, ['camp', '000010', '000020', '2020-07-01 00:00:00', '2020-08-01 00:00:00', '1', '2', '3'])
+
+    @patch('statistics.SubmitStatistics.calc')
+    @patch('dao.RunsDAO.joined_columns', '_r_')
+    def test_create_query_with_runs(self, c):
+        good = ('SELECT _r_ FROM Submits '
+                'JOIN Problems ON Submits.problem_ref=Problems.id JOIN Contests ON Problems.contest_ref = CONTESTS.id '
+                'JOIN Runs ON Runs.submit_ref = Submits.id LEFT JOIN Cases ON Runs.case_ref = Cases.id')
+        s = SubmitStatistics(Mock())
+        self.assertEqual(s._create_query(with_runs=True), (good, []))
+        s.filters = {'contest': 'c'}
+        self.assertEqual(s._create_query(with_runs=True), (good + ' WHERE Contests.contest_id = ?', ['c']))
+
+    @patch('statistics.SubmitStatistics.calc')
+    @patch('dao.SubmitsDAO.load_with_runs', side_effect=lambda *rows: ['submits', rows])
+    @patch('dao.RunsColumns.load_all', side_effect=lambda *rows: ['columns', rows])
+    def test_get_data(self, load_all, load_with_runs, c):
         conn = Mock()
+        submits_cursor = Mock(execute=Mock(return_value='submits_rows'))
+        runs_cursor = Mock(execute=Mock(return_value='runs_rows'))
+        conn.get_cursor.side_effect = [submits_cursor, runs_cursor] * 3
         s = SubmitStatistics(conn)
-        s._create_query = Mock(return_value=('query {}', ('val',)))
-        dao.return_value.deep_load = lambda *p:p
-        conn.get_cursor.return_value.execute.return_value = [(10, 11, 12), (20, 21, 22)]
-        self.assertEqual(list(s.get_input_data(conn)), [((10, 11, 12), (11, 12), 10), ((20, 21, 22), (21, 22), 20)])
-        conn.get_cursor.return_value.execute.assert_called_with('query {}', ('val',))
+        s._create_query = Mock(side_effect=lambda with_runs=False: ('runs' if with_runs else 'submits', ['val']))
+        self.assertEqual(s.get_input_data(conn), ['submits', ('submits_rows', 'runs_rows')])
+        submits_cursor.execute.assert_called_with('submits ORDER BY Submits.id', ['val'])
+        runs_cursor.execute.assert_called_with('runs ORDER BY Submits.id, Runs.case_ref, Runs.id', ['val'])
+        self.assertIsNone(submits_cursor.row_factory)
+        self.assertIsNone(runs_cursor.row_factory)
+        s.columnar = True
+        self.assertEqual(s.get_input_data(conn), ['columns', ('submits_rows', 'runs_rows')])
+        submits_cursor.execute.assert_called_with('submits ORDER BY Submits.problem_ref, Submits.id', ['val'])
+        runs_cursor.execute.assert_called_with('runs ORDER BY Submits.problem_ref, Submits.id, Runs.case_ref, Runs.id',
+                                               ['val'])
+
+    @patch('statistics.SubmitStatistics.calc')
+    @patch('dao.SubmitsDAO.columns', 'Submits.id, submit_id, lang_id, problem_ref')
+    @patch('dao.RunsDAO.joined_columns', 'Runs.submit_ref, Runs.outcome, Cases.case_id')
+    def test_create_query_fields(self, c):
+        s = SubmitStatistics(Mock())
+        s.fields = {'Submits.lang_id', 'Runs.outcome'}
+        self.assertTrue(s._create_query()[0].startswith('SELECT Submits.id, NULL, lang_id, problem_ref, Contests.scoring'))
+        query = s._create_query(with_runs=True)[0]
+        self.assertTrue(query.startswith('SELECT Runs.submit_ref, Runs.outcome, NULL FROM'))
+        self.assertNotIn('Cases', query)
+        s.fields.add('Cases.case_id')
+        query = s._create_query(with_runs=True)[0]
+        self.assertTrue(query.startswith('SELECT Runs.submit_ref, Runs.outcome, Cases.case_id FROM'))
+        self.assertTrue(query.endswith('LEFT JOIN Cases ON Runs.case_ref = Cases.id'))
+
+    @patch('statistics.SubmitStatistics.calc')
+    @patch('dao.SubmitsDAO.load_with_runs', side_effect=lambda *p: p)
+    def test_get_data_without_runs(self, load_with_runs, c):
+        conn = Mock()
+        s = SubmitStatistics(conn)
+        s.fields = {'Submits.submit_id'}
+        conn.get_cursor.return_value.execute = Mock(return_value='submits_rows')
+        self.assertEqual(s.get_input_data(conn), ('submits_rows', []))
+        conn.get_cursor.return_value.execute.assert_called_once()
+
+    def test_calc_columns(self):
+        s = SubmitStatistics(MagicMock())
+        vis = Mock()
+        s._create_visitor = Mock(return_value=vis)
+        s.columnar = True
+        s.calc([1])
+        vis.visit_columns.assert_called_once_with(1)
+        self.assertFalse(vis.visit.called)
 
     def test_calc(self):
         s = SubmitStatistics(MagicMock())
@@ -63,6 +140,140 @@ class TestSubmitStatistics(unittest.TestCase):
         s.result = Mock(pretty_print=Mock(return_value='pp'))
         self.assertEqual(s.as_string(), 'pp')
 
+    def test_get_partition(self):
+        s = SubmitStatistics(MagicMock())
+        self.assertIsNone(s._get_partition())
+        contest = ShardingByContestVisitor(Mock())
+        s._create_visitor = Mock(return_value=ShardingByScoringVisitor(Mock(create=Mock(return_value=contest))))
+        self.assertEqual(s._get_partition(), 'contest')
+        s._create_visitor = Mock(return_value=ShardingByLangVisitor(Mock(create=Mock(return_value=contest))))
+        self.assertIsNone(s._get_partition())
+
+    @patch('statistics.SubmitStatistics._calc_parallel')
+    @patch('statistics.SubmitStatistics._get_partition', return_value='contest')
+    @patch('statistics.SubmitStatistics.calc')
+    def test_sequential_without_db_file(self, calc, get_partition, calc_parallel):
+        SubmitStatistics(Mock(db_dir=':memory:'), {}, {'jobs': 2})
+        SubmitStatistics(Mock(db_dir='db'), {'contest': '1'}, {'jobs': 2})
+        self.assertEqual(calc.call_count, 2)
+        self.assertFalse(calc_parallel.called)
+        SubmitStatistics(Mock(db_dir='db'), {}, {'jobs': 2})
+        calc_parallel.assert_called_once()
+
+
+class TestParallelSubmitStatistics(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_dir = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        connection = create_test_database()
+        filler = BulkSubmitsFiller(connection.cursor())
+        for submit_id in range(40):
+            problem_id = (str(submit_id % 5 + 1), 'AB'[submit_id % 2])
+            runs = [Run(problem_id, submit_id, case_id + 1, '1', '1', 'OK') for case_id in range(submit_id % 7)]
+            filler.fill_db_from_submit(Submit(submit_id, problem_id, str(submit_id % 3), '1', runs, 'OK',
+                                              'ACM' if submit_id % 5 else 'kirov', submit_id), 'origin')
+        filler.flush()
+        disk = sqlite3.connect(self.db_dir)
+        connection.backup(disk)
+        disk.close()
+        self.connection = SQLiteConnector()
+        self.connection.create_connection(self.db_dir)
+
+    def tearDown(self):
+        self.connection.close_connection()
+        os.remove(self.db_dir)
+
+    def test_same_as_sequential(self):
+        for stat_class in [tool_config.StatSubmitsByTests, tool_config.StatEqMatrix, tool_config.StatSameRuns]:
+            sequential = stat_class(self.connection, {}, {}).as_string()
+            parallel = stat_class(self.connection, {}, {'jobs': 2}).as_string()
+            self.assertTrue(sequential)
+            self.assertEqual(parallel, sequential)
+
+    def test_filters(self):
+        sequential = tool_config.StatSubmitsByTests(self.connection, {'scoring': 'ACM'}, {}).as_string()
+        parallel = tool_config.StatSubmitsByTests(self.connection, {'scoring': 'ACM'}, {'jobs': 2}).as_string()
+        self.assertEqual(parallel, sequential)
+        self.assertNotIn('Contest #1:', parallel)
+
+    def test_fields(self):
+        for stat_class in [tool_config.StatSubmitsByTests, tool_config.StatEqMatrix, tool_config.StatSameRuns]:
+            projected = stat_class(self.connection, {}, {}).as_string()
+            with patch.object(stat_class, 'fields', None):
+                self.assertEqual(stat_class(self.connection, {}, {}).as_string(), projected)
+
+    def test_count_submits(self):
+        cursor = self.connection.get_cursor()
+        cursor.execute("INSERT INTO Problems (id, contest_ref, problem_id) VALUES (NULL, 1, 'C')")
+        stat = tool_config.StatCountSubmits(self.connection, {}, {})
+        counts = {}
+        for row in cursor.execute('SELECT Contests.contest_id, Problems.problem_id, Problems.id FROM Problems '
+                                  'JOIN Contests ON Problems.contest_ref = Contests.id'):
+            counts[row[0], row[1]] = cursor.connection.execute('SELECT COUNT(*) FROM Submits WHERE problem_ref = ?',
+                                                               [row[2]]).fetchone()[0]
+        self.assertEqual(stat.result, counts)
+        self.assertIn(0, stat.result.values())
+        stat = tool_config.StatCountSubmits(self.connection, {'scoring': 'kirov'}, {})
+        self.assertEqual(stat.result, {key: value for key, value in counts.items() if key[0] == '000001'})
+        stat = tool_config.StatCountSubmits(self.connection, {'langs': ['1', '2'], 'users': ['0', '2']}, {})
+        users_counts = dict.fromkeys(counts, 0)
+        for submit_id in range(40):
+            if submit_id % 3 != 1:
+                users_counts[str(submit_id % 5 + 1).rjust(6, '0'), 'AB'[submit_id % 2]] += 1
+        self.assertEqual(stat.result, users_counts)
+        stat = tool_config.StatCountSubmits(self.connection, {'langs': ['2']}, {})
+        self.assertEqual(stat.result, dict.fromkeys(counts, 0))
+
+    def test_filters_with_runs(self):
+        filters = {'contests_from': '000002', 'contests_to': '000003', 'langs': ['1']}
+        stat = tool_config.StatSubmitsByTests(self.connection, filters, {})
+        self.assertEqual(stat.result.visitors.keys(), {'000002', '000003'})
+
+    def test_incremental(self):
+        for stat_class in [tool_config.StatSubmitsByTests, tool_config.StatEqMatrix, tool_config.StatSameRuns]:
+            sequential = stat_class(self.connection, {}, {}).as_string()
+            self.assertEqual(stat_class(self.connection, {}, {'incremental': True}).as_string(), sequential)
+            self.assertEqual(stat_class(self.connection, {}, {'incremental': True}).as_string(), sequential)
+        filler = BulkSubmitsFiller(self.connection.get_cursor())
+        for submit_id in range(40, 50):
+            problem_id = (str(submit_id % 5 + 1), 'AB'[submit_id % 2])
+            runs = [Run(problem_id, submit_id, case_id + 1, '1', '1', 'OK') for case_id in range(submit_id % 7)]
+            filler.fill_db_from_submit(Submit(submit_id, problem_id, str(submit_id % 3), '1', runs, 'OK',
+                                              'ACM' if submit_id % 5 else 'kirov', submit_id), 'origin')
+        filler.flush()
+        for stat_class in [tool_config.StatSubmitsByTests, tool_config.StatEqMatrix, tool_config.StatSameRuns]:
+            sequential = stat_class(self.connection, {}, {}).as_string()
+            self.assertEqual(stat_class(self.connection, {}, {'incremental': True}).as_string(), sequential)
+        high_waters = self.connection.get_cursor().execute('SELECT DISTINCT high_water FROM MaterializedStats')
+        self.assertEqual([row[0] for row in high_waters], [50])
+
+    def test_incremental_unchanged_contests(self):
+        sequential = tool_config.StatSubmitsByTests(self.connection, {}, {}).as_string()
+        tool_config.StatSubmitsByTests(self.connection, {}, {'incremental': True})
+        filler = BulkSubmitsFiller(self.connection.get_cursor())
+        runs = [Run(('2', 'A'), 40, 1, '1', '1', 'OK')]
+        filler.fill_db_from_submit(Submit(40, ('2', 'A'), '1', '1', runs, 'OK', 'ACM', 40), 'origin')
+        filler.flush()
+        with patch.object(MaterializedStats, 'put', autospec=True, side_effect=MaterializedStats.put) as put:
+            incremental = tool_config.StatSubmitsByTests(self.connection, {}, {'incremental': True})
+        self.assertEqual([call[0][1] for call in put.call_args_list], ['000002'])
+        self.assertNotEqual(incremental.as_string(), sequential)
+        self.assertEqual(incremental.as_string(), tool_config.StatSubmitsByTests(self.connection, {}, {}).as_string())
+        high_waters = self.connection.get_cursor().execute('SELECT DISTINCT high_water FROM MaterializedStats')
+        self.assertEqual([row[0] for row in high_waters],
+                         [self.connection.get_cursor().execute('SELECT MAX(id) FROM Submits').fetchone()[0]])
+        with patch.object(MaterializedStats, 'put') as put:
+            tool_config.StatSubmitsByTests(self.connection, {}, {'incremental': True})
+        put.assert_not_called()
+
+    def test_incremental_filters(self):
+        sequential = tool_config.StatSubmitsByTests(self.connection, {'scoring': 'ACM'}, {}).as_string()
+        tool_config.StatSubmitsByTests(self.connection, {}, {'incremental': True})
+        incremental = tool_config.StatSubmitsByTests(self.connection, {'scoring': 'ACM'}, {'incremental': True})
+        self.assertEqual(incremental.as_string(), sequential)
+        keys = self.connection.get_cursor().execute('SELECT DISTINCT state_key FROM MaterializedStats ORDER BY state_key')
+        self.assertEqual([row[0] for row in keys], ['{"scoring": "ACM"}', '{}'])
+
 class TestProblemStatistics(unittest.TestCase):
     @patch('statistics.ProblemStatistics.calc')
     @patch('dao.ProblemsDAO.columns', '_c_')
@@ -75,6 +286,14 @@ class TestProblemStatistics(unittest.TestCase):
         s.filters = {'contest':'c'}
         self.assertEqual(s._create_query(), (good + ' WHERE Contests.contest_id = ?', ['c']))
 
+    @patch('statistics.ProblemStatistics.calc')
+    def test_create_query_joins(self, c):
+        s = ProblemStatistics(Mock())
+        s.filters = {'origin': 'camp', 'since': '2020-07-01 00:00:00'}
+        self.assertEqual(s._create_query('_c_', ' JOIN T ON T.a = ?', ['a']),
+                         ('SELECT _c_ FROM Problems JOIN Contests ON Problems.contest_ref = Contests.id '
+                          'JOIN T ON T.a = ? WHERE Contests.origin = ?', ['a', 'camp']))
+
     @patch('statistics.ProblemStatistics.calc')
     @patch('dao.ProblemsDAO')
     def test_get_data(self, dao, c):
@@ -33,6 +33,28 @@ class TestSubmitsIdBySingnatureVisitor(unittest.TestCase):
         self.assertEqual(res["OKOKOK"], [1, ['1']])
         self.assertEqual(res["WAWAWA"], [1, ['2']])
 
+    def test_merge(self):
+        other = self.visitor.empty()
+        self.visitor.visit(self.submit1)
+        self.visitor.visit(self.submit3)
+        other.visit(self.submit2)
+        other.visit(self.submit4)
+        self.visitor.merge(other)
+        res = self.visitor.get_stat_data()
+        self.assertEqual(res["OKWAOK"], [2, ['3', '4']])
+        self.assertEqual(res["OKOKOK"], [1, ['1']])
+        self.assertEqual(res["WAWAWA"], [1, ['2']])
+
+    def test_merge_samples(self):
+        other = self.visitor.empty()
+        for i in range(30):
+            (self.visitor if i % 3 else other).visit(Submit(str(i), '2', '3', '0', self.runs_OK, '0', 'ACM', 37))
+        self.visitor.merge(other)
+        count, samples = self.visitor.get_stat_data()["OKOKOK"]
+        self.assertEqual(count, 30)
+        self.assertEqual(len(samples), 11)
+        self.assertEqual(len(set(samples)), 11)
+
     def test_pretty(self):
         self.visitor.visit(self.submit1)
         self.visitor.visit(self.submit2)
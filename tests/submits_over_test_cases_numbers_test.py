@@ -36,6 +36,21 @@ class SubmitsOverCasesTest(unittest.TestCase):
                 "   15 #################################################################################################### 1"]
         self.assertEqual(res, good)
 
+    def test_merge(self):
+        other = self.visitor.empty()
+        self.visitor.visit(Mock(problem_id=('1', '1'), runs=[0] * 5))
+        self.visitor.visit(Mock(problem_id=('1', '2'), runs=[0] * 3))
+        other.visit(Mock(problem_id=('1', '1'), runs=[0] * 5))
+        other.visit(Mock(problem_id=('1', '1'), runs=[0] * 4))
+        other.visit(Mock(problem_id=('1', '3'), runs=[0]))
+        self.visitor.merge(other)
+        self.assertEqual(self.visitor.get_stat_data(),
+                         {('1', '1'): {5: 2, 4: 1}, ('1', '2'): {3: 1}, ('1', '3'): {1: 1}})
+
+    def test_visit_columns(self):
+        self.visitor.visit_columns(Mock(problem_id=('1', '1'), runs_numbers=Mock(return_value=[5, 10, 5])))
+        self.visitor.visit_columns(Mock(problem_id=('1', '2'), runs_numbers=Mock(return_value=[])))
+        self.assertEqual(self.visitor.get_stat_data(), {('1', '1'): {10: 1, 5: 2}})
 
     def test_sort(self):
         self.visitor.visit(Mock(problem_id=('1', '2'), runs=[0]))
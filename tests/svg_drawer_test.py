@@ -0,0 +1,44 @@
+import io
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from svg_drawer import SvgImage
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+class SvgImageTest(unittest.TestCase):
+    def draw(self, *calls):
+        file = io.StringIO()
+        image = SvgImage(file, (300, 200), 'black')
+        for method, args in calls:
+            getattr(image, method)(*args)
+        image.close()
+        return ElementTree.fromstring(file.getvalue())
+
+    def test_empty(self):
+        root = self.draw()
+        self.assertEqual((root.get('width'), root.get('height')), ('300', '200'))
+        self.assertEqual([(element.tag, element.get('fill')) for element in root], [(SVG + 'rect', 'black')])
+
+    def test_elements(self):
+        root = self.draw(('draw_line_strip', ([(1, 2), (3, 4), (5, 6)], 2, (255, 0, 10))),
+                         ('draw_line_strip', ([(1, 2)], 2, (255, 0, 10))),
+                         ('draw_line', ((0, 0), (7.5, 8), 1, 'white')),
+                         ('draw_circle', ((20.0, 30.5), 10, 2, '#FF9347', '#FF9347')),
+                         ('draw_text', ('A & <B>', (100.0, 15.0), 'fonts/Arial.ttf', 25, 'white', 'left')),
+                         ('draw_text', ('2019.июль', (100, 50), 'fonts/Arial.ttf', 22, 'white', 'center')))
+        background, line, short_line, circle, text_1, text_2 = root
+        self.assertEqual(line.get('points'), '1,2 3,4 5,6')
+        self.assertEqual((line.get('stroke'), line.get('stroke-width')), ('rgb(255,0,10)', '2'))
+        self.assertEqual(short_line.get('points'), '0,0 7.5,8')
+        self.assertEqual((circle.get('cx'), circle.get('cy'), circle.get('r'), circle.get('fill')),
+                         ('20', '30.5', '10', '#FF9347'))
+        self.assertEqual((text_1.text, text_1.get('font-family'), text_1.get('font-size'), text_1.get('text-anchor')),
+                         ('A & <B>', 'Arial', '25', 'start'))
+        self.assertEqual((text_2.text, text_2.get('x'), text_2.get('text-anchor')), ('2019.июль', '100', 'middle'))
+
+
+if __name__ == '__main__':
+    unittest.main()
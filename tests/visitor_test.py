@@ -0,0 +1,12 @@
+import unittest
+
+from visitor import Visitor
+
+
+class VisitorTest(unittest.TestCase):
+    def test_merge_not_implemented(self):
+        self.assertRaises(NotImplementedError, Visitor().merge, Visitor())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ from walker import EjudgeRunsFilesWorker
 
 from walker import AllFilesWalker
 from walker import SubmitWalker
+from walker import parse_report_file, parse_report_files, scan_report_file
 
 
 class TestSingleContestWalker(PestoTestCase):
@@ -74,6 +75,20 @@ class TestSubmitWalker(PestoTestCase):
         self.assertEqual(w.database, '7')
         self.assertEqual(w.contest_id, 0)
 
+    def test_start_contest(self):
+        w = SubmitWalker(Mock())
+        w.start_contest('7')
+        self.assertEqual(w.contest_id, '7')
+        w.database.prefetch_contest.assert_called_once_with('7')
+        w.finish_contest()
+        w.database.report_misses.assert_called_once_with('7')
+
+    def test_start_contest_without_database(self):
+        w = SubmitWalker(None)
+        w.start_contest('7')
+        w.finish_contest()
+        self.assertEqual(w.contest_id, '7')
+
     @patch('walker.ejudge_xml_parse', return_value=Mock(submit_id='5', submit_outcome='OK', scoring='ACM',
                                                         run_outcomes=[('2', '3', 'OK'), ('4', '5', 'WA')]))
     def test_get_submit_from_xml(self, par):
@@ -109,6 +124,37 @@ class TestSubmitWalker(PestoTestCase):
         res = w._get_submit_from_xml('filename')
         self.assertIsNone(res)
 
+    def test_get_submit_from_parse_result_none(self):
+        w = SubmitWalker(Mock())
+        self.assertIsNone(w.get_submit_from_parse_result(None))
+
+
+class TestParseReportFile(PestoTestCase):
+    def test_xml(self):
+        res = parse_report_file(os.path.join('testdata', 'xml', 'normal.xml'))
+        self.assertIsNotNone(res)
+        self.assertTrue(len(res.run_outcomes) > 0)
+
+    def test_gzip(self):
+        res = parse_report_file(os.path.join('testdata', 'count_submit_test', '000017', 'A', '000068.gz'))
+        self.assertIsNotNone(res)
+        self.assertTrue(len(res.run_outcomes) > 0)
+
+    def test_missing_file(self):
+        self.assertIsNone(parse_report_file(os.path.join('testdata', 'xml', 'no_such_file.xml')))
+
+    def test_scan_report_file(self):
+        file_name = os.path.join('testdata', 'xml', 'normal.xml')
+        content_hash, res = scan_report_file(file_name)
+        self.assertEqual(len(content_hash), 32)
+        self.assertEqual(res.submit_id, '15')
+        self.assertEqual(scan_report_file(file_name, content_hash), (content_hash, None))
+        self.assertEqual(scan_report_file(os.path.join('testdata', 'xml', 'no_such_file.xml')), (None, None))
+
+    @patch('walker.parse_report_file', side_effect=lambda name: name * 2)
+    def test_parse_report_files(self, prf):
+        self.assertEqual(parse_report_files(['a', 'b']), ['aa', 'bb'])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,7 @@ from stats.submits_ids_by_signature_visitor import SubmitsIdsBySignatureVisitor
 from stats.submits_over_test_cases_numbers import SubmitsOverTestCasesNumbers
 from find_same_problems import SameProblemsFinder
 from find_similar_problems import SimilarProblemsFinder
+from similarity_index import SimilarityIndex
 from case_counter import CasesCounter
 from sharding_visitor import ShardingByContestVisitor
 from sharding_visitor import ShardingByProblemVisitor
@@ -14,10 +15,12 @@ from elector_visitor import ElectorByMaxCasesVisitor
 from visitor import Visitor
 from os import path
 from statistics import Statistics, SubmitStatistics, ProblemStatistics
+from statistics import compile_filters, SUBMIT_FILTERS
 from shard import shard
 from stats.contests_grouper import ContestsGrouper
 from problems_tree import ProblemsTree
 import problems_tree_json
+import problems_tree_db
 from problem_generator import sqlite_contest_generator
 import logging
 
@@ -42,9 +45,12 @@ class StatCountSubmits(ProblemStatistics):
     _desc = 'Counts number of submits for each problem.'
 
     def get_input_data(self, connection):
-        cursor = connection.get_cursor()
-        for problem in super().get_input_data(connection):
-            yield (problem.problem_id, next(cursor.execute('SELECT COUNT(*) FROM Submits WHERE problem_ref=?', (problem.db_id,)))[0])
+        # Submits filters are in the join, so problems without matching submits are counted too
+        cond, vals = compile_filters(self.filters, SUBMIT_FILTERS)
+        joins = ' LEFT JOIN Submits ON ' + ' AND '.join(['Submits.problem_ref = Problems.id'] + cond)
+        query, vals = self._create_query('Contests.contest_id, Problems.problem_id, COUNT(Submits.id)', joins, vals)
+        for row in connection.get_cursor().execute(query + ' GROUP BY Problems.id', vals):
+            yield ((row[0], row[1]), row[2])
 
     def calc(self, data):
         data = list(data)
@@ -61,6 +67,9 @@ class StatEqMatrix(SubmitStatistics):
     _name = 'eq_matrix'
     _desc = 'Creates matrix for each problem which contains how many times cases were launched together.'
 
+    columnar = True
+    fields = {'Runs.outcome'}
+
     def _create_visitor(self):
         return sharder_wrap(EqMatrix, 'scoring contest problem')
 
@@ -69,6 +78,8 @@ class StatSameRuns(SubmitStatistics):
     _name = 'same_runs'
     _desc = 'Counts for each problem lists of runs that were launched together.'
 
+    fields = {'Runs.time', 'Runs.outcome', 'Cases.case_id'}
+
     def _create_visitor(self):
         return sharder_wrap(SameRuns, 'scoring contest problem')
 
@@ -77,6 +88,11 @@ class StatSubmitsBySignature(SubmitStatistics):
     _name = 'submits_by_signature'
     _desc = 'Counts submits with each outcome for each problem (for each language).'
 
+    fields = {'Submits.submit_id', 'Submits.lang_id', 'Runs.outcome'}
+
+    def _get_state_key(self):
+        return super()._get_state_key() + (' lang_sharding' if 'lang_sharding' in self.extra else '')
+
     def _create_visitor(self):
         SubmitsIdsBySignatureVisitor.min_submits = self.extra.get('min_submits', 0)
         return sharder_wrap(SubmitsIdsBySignatureVisitor, 'contest problem lang' if 'lang_sharding' in self.extra else 'contest problem')
@@ -86,6 +102,9 @@ class StatSubmitsByTests(SubmitStatistics):
     _name = 'submits_by_tests'
     _desc = 'Counts submits with each number of launched tests for each problem.'
 
+    columnar = True
+    fields = {'Runs.submit_ref'}  # only the number of runs of each submit
+
     def _create_visitor(self):
          return sharder_wrap(SubmitsOverTestCasesNumbers, 'contest')
 
@@ -110,12 +129,20 @@ class StatSimilarProblems(ProblemStatistics):
 
     counter_class = SimilarProblemsFinder
 
+    def get_input_data(self, connection):
+        self.index = None if 'approximate' in self.extra else SimilarityIndex(connection.get_cursor())
+        return super().get_input_data(connection)
+
+    def calc(self, data):
+        self.result = self.counter_class(data, self.extra.get('approximate'), self.index)
+
 class StatBuildTree(ProblemStatistics):
 
     _name = 'build_tree_json'
-    _desc = 'Build tree of similar problems and write it to json file.'
+    _desc = 'Build tree of similar problems and write it to tree file (json if it is named *.json).'
 
     def get_input_data(self, connection):
+        self.index = None if 'approximate' in self.extra else SimilarityIndex(connection.get_cursor())
         problems = list(super().get_input_data(connection))
         contests = list(sqlite_contest_generator(connection))
         return problems, contests
@@ -135,30 +162,40 @@ class StatBuildTree(ProblemStatistics):
         problems = []
         for contest in contests:
             problems += contest_to_problems[contest.contest_id]
-        tree = ProblemsTree(problems)
-        self.result = problems_tree_json.save_tree(tree, cg, 'pretty_json' in self.extra)
+        tree = ProblemsTree(problems, self.extra.get('approximate'), self.index)
+        self.result = (tree, cg)
+
+    def as_string(self):
+        return problems_tree_json.save_tree(*self.result, 'pretty_json' in self.extra)
+
+    def save_to_file(self, filename):
+        if filename is None or filename.lower().endswith('.json'):
+            super().save_to_file(filename)
+        else:
+            problems_tree_db.save_tree(*self.result, filename)
 
 class StatDrawTree(Statistics):
 
     _name = 'draw_saved_tree'
-    _desc = 'Load tree from json and draw it to file.'
+    _desc = 'Load tree from tree file (or json) and draw it to file.'
 
-    def _get_json(self):
+    def _get_tree(self):
         saved_tree_filename = self.extra.get('tree_json')
         if not saved_tree_filename:
             print('Saved tree file is not specified')
             exit()  # TODO something more clever here
+        if problems_tree_db.is_tree_file(saved_tree_filename):
+            return problems_tree_db.load_tree(saved_tree_filename)
         with open(saved_tree_filename) as saved_tree_file:
-            data = result = saved_tree_file.read()
-        return data
+            return problems_tree_json.load_tree(saved_tree_file.read())
 
     def save_to_file(self, filename):
         if filename is None:
             print('Sorry, I can\'t draw tree to console')
             return
-        tree, contests_grouper = problems_tree_json.load_tree(self._get_json())
+        tree, contests_grouper = self._get_tree()
         from tree_drawer import TreeDrawer
-        drawer = TreeDrawer(tree, contests_grouper)  # TODO "saving..." when all lines are located
+        drawer = TreeDrawer(tree, contests_grouper, self.extra.get('jobs', 1))  # TODO "saving..." when all lines are located
         drawer.save_image_to_file(filename)
 
 class StatBuildDrawTree(StatBuildTree, StatDrawTree):  # sorry
@@ -166,8 +203,11 @@ class StatBuildDrawTree(StatBuildTree, StatDrawTree):  # sorry
     _name = 'draw_tree'
     _desc = 'Build tree of similar problems and draw it to file.'
 
-    def _get_json(self):
-        return self.result  # TODO do not convert json to string
+    def _get_tree(self):
+        return self.result
+
+    def save_to_file(self, filename):
+        StatDrawTree.save_to_file(self, filename)
 
 def sharder_wrap(visitor, sharders):
     sharders = list(map(str.capitalize, sharders.split()))
@@ -223,6 +263,12 @@ class SameRuns(Visitor):
                 self.child = ElectorByMaxCasesVisitor(ClassFactory(SameRunsKirov))
         self.child.visit(submit)
 
+    def merge(self, other):
+        if self.child is None:
+            self.child = other.child
+        elif other.child is not None:
+            self.child.merge(other.child)
+
     def get_stat_data(self):
         return self.child.get_stat_data()
 
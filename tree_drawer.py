@@ -1,8 +1,13 @@
 import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import logging
 
 import drawer
+from lines_router import route_lines
+from png_writer import PngWriter
+from svg_drawer import SvgImage
 
 
 BACKGROUND_COLOR = "black"
@@ -15,13 +20,6 @@ PROBLEM_BORDER_THICKNESS = 2
 
 LINE_THICKNESS = 2
 
-LOCATE_LINES_MAX_SPEED = 3.0
-LOCATE_LINES_MAX_SPEED_SQR = LOCATE_LINES_MAX_SPEED ** 2
-LOCATE_LINES_PROBLEMS_FORCE = -150.0
-LOCATE_LINES_DESTINATION_CONSTANT_FORCE = 2.0
-LOCATE_LINES_MAX_ITERATIONS = 40000
-CHUNK_SIZE = 200
-
 LOCATE_LINES_LINE_CONSTANT_FORCE = 0.25
 LOCATE_LINES_LINE_FORCE_DISTANCE = 10
 
@@ -45,6 +43,9 @@ END_SPACE = 50
 MAX_GROUP_COUNT = 15
 SEASON_SPACING = 150
 
+STRIP_HEIGHT = 256  # the picture is drawn by strips of rows
+STRIP_MARGIN = 8  # rows drawn above a strip, PIL draws elements starting above an image a bit differently
+
 
 def _is_point_in_rectangle(point, rect_start, rect_size):
     return rect_start[0] <= point[0] <= rect_start[0] + rect_size[0] and \
@@ -95,8 +96,9 @@ def _point_rectangle_distance_sqr(point, rect_begin, rect_size):
 
 
 class TreeDrawer:
-    def __init__(self, tree, contests_grouper):
+    def __init__(self, tree, contests_grouper, jobs=1):
         self.tree = tree
+        self.jobs = jobs
         self.contests_grouper = contests_grouper
         self.problems = self.tree.get_problems()
         self.seasons = []
@@ -109,7 +111,8 @@ class TreeDrawer:
         self.lines, self.arrows = [], []
         self._locate_lines()
 
-        self.image = drawer.Image((self.size_x, self.size_y), BACKGROUND_COLOR)
+        self.elements = []  # (method of drawer.Image, arguments) in the order of drawing
+        self.strips = [[] for i in range((self.size_y + STRIP_HEIGHT - 1) // STRIP_HEIGHT)]
         self._draw_tree()
 
     def _locate_problems_and_texts(self):
@@ -205,16 +208,8 @@ class TreeDrawer:
     def _locate_lines(self):
         self.lines, self.arrows, self.lines_colors = [], [], []
 
-        chunks_x, chunks_y = (self.size_x + CHUNK_SIZE - 1) // CHUNK_SIZE, \
-                             (self.size_y + CHUNK_SIZE - 1) // CHUNK_SIZE
-        chunks = [[] for i in range(chunks_x * chunks_y)]
-        for problem_and_coords in self.problems_and_coords:
-            coords = problem_and_coords[1]
-            chunk_x = int(coords[0]) // CHUNK_SIZE
-            chunk_y = int(coords[1]) // CHUNK_SIZE
-            chunks[chunk_x * chunks_y + chunk_y].append(problem_and_coords)
-
-        fails = 0
+        indices = {problem: index for index, (problem, coords) in enumerate(self.problems_and_coords)}
+        pairs, destinations = [], []
         for problem_2 in self.problems:
             if problem_2 not in self.problem_coords:
                 logging.warning('wtf {} {}'.format(problem_2.problem_id, problem_2.name))  # idk what it means
@@ -224,56 +219,23 @@ class TreeDrawer:
                 if problem_1 is not None:
                     logging.warning('wtf {} {}'.format(problem_1.problem_id, problem_1.name))  # same here
                 continue
-            curr_x, curr_y = tuple(map(lambda x: float(x), self.problem_coords[problem_1]))
-            destination = tuple(map(float, self.problem_coords[problem_2]))
-            curr_vx, curr_vy = 0.0, 3.0
-            self.lines.append([])
+            pairs.append((indices[problem_1], indices[problem_2]))
+            destinations.append(tuple(map(float, self.problem_coords[problem_2])))
             self.lines_colors.append(self._get_line_color(problem_2))
 
-            steps = 0
-            while True:
-                steps += 1
-                if steps == LOCATE_LINES_MAX_ITERATIONS:
-                    logging.warning("Failed to locate line {}".format(len(self.lines) - 1))
-                    fails += 1
-                    self.lines[-1] = []
-                    break
-                speed_sqr = _vector_length_sqr((curr_vx, curr_vy))
-                if speed_sqr > LOCATE_LINES_MAX_SPEED_SQR:
-                    speed = speed_sqr ** 0.5
-                    curr_vx *= LOCATE_LINES_MAX_SPEED / speed
-                    curr_vy *= LOCATE_LINES_MAX_SPEED / speed
-                new_line_point = (int(curr_x), int(curr_y))
-                if len(self.lines[-1]) == 0 or new_line_point != self.lines[-1][-1]:
-                    self.lines[-1].append(new_line_point)
-                curr_x += curr_vx
-                curr_y += curr_vy
-                if _distance_sqr((curr_x, curr_y), destination) <= PROBLEM_RADIUS ** 2:
-                    logging.info("Line {} located".format(len(self.lines) - 1))
-                    break
-                chunk_x = int(curr_x) // CHUNK_SIZE
-                chunk_y = int(curr_y) // CHUNK_SIZE
-                for curr_chunk_x in range(chunk_x - 1, chunk_x + 2):
-                    for curr_chunk_y in range(chunk_y - 1, chunk_y + 2):
-                        if not (0 <= curr_chunk_x < chunks_x and 0 <= curr_chunk_y < chunks_y):
-                            continue
-                        for problem, problem_coords in chunks[curr_chunk_x * chunks_y + curr_chunk_y]:
-                            if problem in (problem_1, problem_2):
-                                continue
-                            distance_sqr = (
-                                           _distance_sqr((curr_x, curr_y), problem_coords) ** 0.5 - PROBLEM_RADIUS) ** 2
-                            inverse_distance_sqr = 1.0 / distance_sqr
-                            direction = _normalize((problem_coords[0] - curr_x, problem_coords[1] - curr_y))
-                            curr_vx += LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * direction[0]
-                            curr_vy += LOCATE_LINES_PROBLEMS_FORCE * inverse_distance_sqr * direction[1]
-                destination_direction = _normalize((destination[0] - curr_x, destination[1] - curr_y))
-                curr_vx += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * destination_direction[0]
-                curr_vy += LOCATE_LINES_DESTINATION_CONSTANT_FORCE * destination_direction[1]
-
+        coords = [coords for problem, coords in self.problems_and_coords]
+        self.lines = route_lines(coords, (self.size_x, self.size_y), PROBLEM_RADIUS, pairs, self.jobs)
+        fails = 0
+        for line_index, destination in enumerate(destinations):
+            if self.lines[line_index]:
+                logging.info("Line {} located".format(line_index))
+            else:
+                logging.warning("Failed to locate line {}".format(line_index))
+                fails += 1
             self.arrows.append([])
-            if len(self.lines[-1]) > 1:
-                point_1 = self.lines[-1][-2]
-                point_2 = self.lines[-1][-1]
+            if len(self.lines[line_index]) > 1:
+                point_1 = self.lines[line_index][-2]
+                point_2 = self.lines[line_index][-1]
                 bs_l, bs_r = 0.0, 1.0
                 while bs_r - bs_l > 0.001:
                     bs_mid = (bs_l + bs_r) * 0.5
@@ -294,24 +256,102 @@ class TreeDrawer:
                 self.arrows[-1].append((point_3[0] + arrow_vector_2[0], point_3[1] + arrow_vector_2[1]))
         logging.info("Lines located, {} fails".format(fails))
 
+    def _draw(self, top, bottom, method, *args):
+        # Adds an element drawn between the rows top and bottom to the strips having them
+        self.elements.append((method, args))
+        for strip in range(max(int(top), 0) // STRIP_HEIGHT,
+                           min(int(bottom) // STRIP_HEIGHT + 1, len(self.strips))):
+            self.strips[strip].append(len(self.elements) - 1)
+
+    def _draw_line_strip(self, points, line_color):
+        if points:
+            top, bottom = min(point[1] for point in points), max(point[1] for point in points)
+            self._draw(top - LINE_THICKNESS, bottom + LINE_THICKNESS, 'draw_line_strip',
+                       points, LINE_THICKNESS, line_color)
+
     def _draw_problem(self, problem, coords):
-        self.image.draw_circle(coords, PROBLEM_RADIUS, PROBLEM_BORDER_THICKNESS,
-                               PROBLEM_BORDER_COLOR, PROBLEM_FILL_COLOR)
+        space = PROBLEM_RADIUS + PROBLEM_BORDER_THICKNESS
+        self._draw(coords[1] - space, coords[1] + space, 'draw_circle', coords, PROBLEM_RADIUS,
+                   PROBLEM_BORDER_THICKNESS, PROBLEM_BORDER_COLOR, PROBLEM_FILL_COLOR)
 
     def _draw_tree(self):
         for index in range(len(self.lines)):
             line = self.lines[index]
             arrow = self.arrows[index]
             line_color = self.lines_colors[index]
-            self.image.draw_line_strip(line, LINE_THICKNESS, line_color)
-            self.image.draw_line_strip(arrow, LINE_THICKNESS, line_color)
+            self._draw_line_strip(line, line_color)
+            self._draw_line_strip(arrow, line_color)
         for problem, problem_coords in self.problems_and_coords:
             self._draw_problem(problem, problem_coords)
         for text in self.texts:
-            self.image.draw_text(*text)
+            text_height = drawer.get_text_size(text[0], text[2], text[3])[1]
+            top = text[1][1] - text_height // 2  # as in drawer.Image.draw_text
+            self._draw(top, top + text_height, 'draw_text', *text)
 
     def save_image_to_file(self, filename):
-        self.image.save_png(filename)
+        # SVG for a file named *.svg, PNG otherwise
+        size = (self.size_x, self.size_y)
+        if filename.lower().endswith('.svg'):
+            with open(filename, 'w', encoding='utf-8') as file:
+                image = SvgImage(file, size, BACKGROUND_COLOR)
+                for method, args in self.elements:
+                    getattr(image, method)(*args)
+                image.close()
+            return
+        with open(filename, 'wb') as file:
+            writer = PngWriter(file, size)
+            for rows in render_strips(size, self.elements, self.strips, self.jobs):
+                writer.write_rows(rows)
+            writer.close()
+
+
+class StripsRenderer:
+    """Draws the strips of STRIP_HEIGHT rows of a picture, each one only with the elements it has."""
+
+    def __init__(self, size, elements, strips):
+        self.size = size
+        self.elements = elements
+        self.strips = strips
+
+    def render(self, strip):
+        # Returns raw RGB rows of the strip
+        top = strip * STRIP_HEIGHT
+        margin = min(STRIP_MARGIN, top)
+        image = drawer.Image((self.size[0], min(STRIP_HEIGHT, self.size[1] - top) + margin), BACKGROUND_COLOR,
+                             (0, top - margin))
+        for index in self.strips[strip]:
+            method, args = self.elements[index]
+            getattr(image, method)(*args)
+        return image.tobytes()[margin * 3 * self.size[0]:]
+
+
+_renderer = None
+
+
+def _init_renderer(size, elements, strips):
+    global _renderer
+    _renderer = StripsRenderer(size, elements, strips)
+
+
+def _render_strip(strip):
+    return _renderer.render(strip)
+
+
+def render_strips(size, elements, strips, jobs=1):
+    # Yields the rows of the strips from top to bottom, at most two strips for a job are kept at once
+    if jobs <= 1:
+        renderer = StripsRenderer(size, elements, strips)
+        for strip in range(len(strips)):
+            yield renderer.render(strip)
+        return
+    with ProcessPoolExecutor(jobs, initializer=_init_renderer, initargs=(size, elements, strips)) as executor:
+        futures = deque()
+        for strip in range(len(strips)):
+            futures.append(executor.submit(_render_strip, strip))
+            if len(futures) > 2 * jobs:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
 
 
 class Season:
@@ -6,6 +6,20 @@ class Visitor:
     def visit(self, submit):
         self.the_number_of_transmitted_submits += 1
 
+    # Visits all submits of a problem given as dao.RunsColumns
+    def visit_columns(self, columns):
+        for submit in columns.submits():
+            self.visit(submit)
+
+    # Returns a visitor of the same configuration which has not visited anything
+    def empty(self):
+        return type(self)()
+
+    # Adds the state of an empty() visitor which visited the next submits, statistics run with -j or
+    # --incremental need it, so a visitor without its own merge fails instead of merging wrongly
+    def merge(self, other):
+        raise NotImplementedError('{} can not be merged'.format(type(self).__name__))
+
     # Returns ready for print string of result data
     def pretty_print(self):
         return ""
@@ -1,4 +1,5 @@
 import os
+import hashlib
 from gzip import open as gzip_open
 from ejudge_xml_parse import ejudge_xml_parse
 
@@ -6,6 +7,47 @@ from model import Run
 from model import Submit
 
 
+def parse_report_file(file_name):
+    try:
+        if file_name.endswith('.gz'):
+            with gzip_open(file_name) as current_file:
+                return ejudge_xml_parse(current_file)
+        with open(file_name, encoding='utf-8') as current_file:
+            return ejudge_xml_parse(current_file)
+    except OSError:
+        return None
+
+
+def parse_report_files(file_names):
+    return [parse_report_file(file_name) for file_name in file_names]
+
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_report_hash(file_name):
+    md5 = hashlib.md5()
+    with open(file_name, 'rb') as report_file:
+        for data in iter(lambda: report_file.read(HASH_CHUNK_SIZE), b''):
+            md5.update(data)
+    return md5.hexdigest()
+
+
+def scan_report_file(file_name, known_hash=None):
+    # Returns the content hash and the parse result, which is None if the content is known_hash
+    try:
+        content_hash = get_report_hash(file_name)
+    except OSError:
+        return None, None
+    if content_hash == known_hash:
+        return content_hash, None
+    return content_hash, parse_report_file(file_name)
+
+
+def scan_report_files(reports):
+    return [scan_report_file(file_name, known_hash) for file_name, known_hash in reports]
+
+
 class Walker:
     def walk(self, start_dir):
         yield None
@@ -55,6 +97,15 @@ class SubmitWalker(Walker):
         self.database = ejudge_DB
         self.contest_id = 0
 
+    def start_contest(self, contest_id):
+        self.contest_id = contest_id
+        if self.database != None:
+            self.database.prefetch_contest(contest_id)
+
+    def finish_contest(self):
+        if self.database != None:
+            self.database.report_misses(self.contest_id)
+
     def walk(self, file_name):
         if file_name.endswith('.gz'):
             with gzip_open(file_name) as current_file:
@@ -70,8 +121,10 @@ class SubmitWalker(Walker):
             result = ejudge_xml_parse(xml_file)
         except OSError:
             return None
+        return self.get_submit_from_parse_result(result)
 
-        if result is None:
+    def get_submit_from_parse_result(self, result):
+        if self.database == None or result is None:
             return None
 
         submit_id = result.submit_id